@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de los handlers Lambda contra AWS simulado en proceso (moto)
+
+Cada escenario invoca el lambda_handler real con eventos de API Gateway o
+SQS sobre una tabla precargada con N tareas, y reporta throughput,
+percentiles de latencia, llamadas a DynamoDB por request (de las métricas
+EMF de utils/instrumentation.py) y memoria máxima.
+
+Uso:
+    python benchmarks/bench_handlers.py                          # 1k y 10k, compara con baselines.json
+    python benchmarks/bench_handlers.py --sizes 1000,100000 --iterations 500
+    python benchmarks/bench_handlers.py --sizes 1000000          # lento: la precarga en moto tarda minutos
+    python benchmarks/bench_handlers.py --update-baseline        # guardar los resultados como baseline
+
+Las llamadas a DynamoDB por request son deterministas: cualquier aumento es
+una regresión. La latencia depende de la máquina, así que solo falla si el
+p99 supera el baseline en más de --latency-tolerance (por defecto 50%).
+"""
+
+import argparse
+import base64
+import contextlib
+import json
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'lambdas'))
+
+# AWS simulado: credenciales falsas y métricas a memoria (no a stdout)
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'bench')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'bench')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ['AWS_REGION'] = os.environ['AWS_DEFAULT_REGION']
+os.environ['METRICS_SINK'] = 'memory'
+os.environ.pop('LOCALSTACK_ENDPOINT', None)
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baselines.json')
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_ITERATIONS = 200
+WARMUP_ITERATIONS = 5
+MEMORY_ITERATIONS = 20
+DEFAULT_LATENCY_TOLERANCE = 0.5
+
+# Los escenarios destructivos (delete) van al final
+SCENARIOS = ['create', 'list', 'update', 'upload', 'sqs_processor', 'delete']
+
+TAGS = ['trabajo', 'personal', 'urgente', 'backend', 'frontend', 'infra', 'revisión', 'cliente', 'bug', 'docs']
+PRIORITIES = ['low', 'medium', 'high']
+STATUSES = ['pending', 'in_progress', 'completed']
+
+ATTACHMENT_BYTES = 4096
+SQS_BATCH_SIZE = 10
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def create_resources():
+    """Tablas, bucket, cola y tópico con el mismo esquema que setup_localstack.py"""
+    region = os.environ['AWS_REGION']
+    dynamodb = boto3.resource('dynamodb', region_name=region)
+    dynamodb.create_table(
+        TableName=os.getenv('DYNAMODB_TABLE_NAME', 'tasks-table'),
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'due_shard', 'AttributeType': 'S'},
+            {'AttributeName': 'due_date', 'AttributeType': 'S'}
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': 'due-date-index',
+            'KeySchema': [
+                {'AttributeName': 'due_shard', 'KeyType': 'HASH'},
+                {'AttributeName': 'due_date', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'}
+        }],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    dynamodb.create_table(
+        TableName=os.getenv('DYNAMODB_INDEX_TABLE_NAME', 'tasks-index-table'),
+        KeySchema=[
+            {'AttributeName': 'pk', 'KeyType': 'HASH'},
+            {'AttributeName': 'sk', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'pk', 'AttributeType': 'S'},
+            {'AttributeName': 'sk', 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    
+    boto3.client('s3', region_name=region).create_bucket(Bucket=os.getenv('S3_BUCKET_NAME', 'task-manager-files'))
+    os.environ['SQS_QUEUE_URL'] = boto3.client('sqs', region_name=region).create_queue(QueueName='task-queue')['QueueUrl']
+    os.environ['SNS_TOPIC_ARN'] = boto3.client('sns', region_name=region).create_topic(Name='task-notifications')['TopicArn']
+    
+    from utils.aws_config import reset_settings
+    reset_settings()
+
+
+def seed_tasks(size, rng):
+    """Precargar `size` tareas con BatchWriteItem directo (sin pasar por los handlers)"""
+    from models import Task
+    from repositories.task_repository import TaskRepository
+    
+    repository = TaskRepository()
+    now = datetime.utcnow()
+    task_ids = []
+    with repository.table.batch_writer() as batch:
+        for n in range(size):
+            created_at = now - timedelta(minutes=rng.randrange(60 * 24 * 90))
+            task = Task(
+                id=str(uuid.uuid4()),
+                title=f'Tarea {n}',
+                description='Tarea precargada para el benchmark',
+                status=rng.choice(STATUSES),
+                priority=rng.choice(PRIORITIES),
+                due_date=created_at + timedelta(days=rng.randrange(1, 30)) if rng.random() < 0.5 else None,
+                tags=rng.sample(TAGS, rng.randrange(0, 4)),
+                created_at=created_at,
+                updated_at=created_at,
+                files=[]
+            )
+            item = repository._task_to_dynamodb_item(task)
+            batch.put_item(Item={k: v for k, v in item.items() if v is not None and v != set()})
+            task_ids.append(task.id)
+    return task_ids
+
+
+def sns_record(rng):
+    """Mensaje task_created envuelto por SNS, como lo entrega la suscripción SQS"""
+    now = datetime.utcnow().isoformat()
+    message = {'notification_type': 'task_created', 'task_id': str(uuid.uuid4()), 'created_at': now}
+    return {
+        'messageId': str(uuid.uuid4()),
+        'body': json.dumps({'Type': 'Notification', 'Subject': 'Nueva tarea', 'Message': json.dumps(message), 'Timestamp': now})
+    }
+
+
+def build_event(scenario, rng, task_ids):
+    """Evento del handler para una invocación del escenario"""
+    if scenario == 'create':
+        return {'body': json.dumps({
+            'title': f'Nueva {rng.randrange(10 ** 6)}',
+            'description': 'Creada por el benchmark',
+            'priority': rng.choice(PRIORITIES),
+            'tags': rng.sample(TAGS, rng.randrange(0, 4))
+        })}
+    if scenario == 'list':
+        return {'queryStringParameters': {'status': rng.choice(STATUSES), 'limit': '50'}}
+    if scenario == 'update':
+        return {'pathParameters': {'id': rng.choice(task_ids)}, 'body': json.dumps({'priority': rng.choice(PRIORITIES)})}
+    if scenario == 'upload':
+        return {'pathParameters': {'id': rng.choice(task_ids)}, 'body': json.dumps({
+            'file_name': 'adjunto.bin',
+            'content_type': 'application/octet-stream',
+            'file_content': base64.b64encode(os.urandom(ATTACHMENT_BYTES)).decode()
+        })}
+    if scenario == 'sqs_processor':
+        return {'Records': [sns_record(rng) for _ in range(SQS_BATCH_SIZE)]}
+    if scenario == 'delete':
+        return {'pathParameters': {'id': task_ids.pop()}}
+    raise ValueError(f'Escenario desconocido: {scenario}')
+
+
+def load_handler(scenario):
+    from handlers import (create_task_handler, delete_task_handler, list_tasks_handler,
+                          sqs_processor_handler, update_task_handler, upload_file_handler)
+    return {
+        'create': create_task_handler,
+        'list': list_tasks_handler,
+        'update': update_task_handler,
+        'upload': upload_file_handler,
+        'sqs_processor': sqs_processor_handler,
+        'delete': delete_task_handler
+    }[scenario].lambda_handler
+
+
+def invoke(handler, event):
+    # Los servicios imprimen cada publicación: silenciarlos para no medir la terminal
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        response = handler(event, None)
+    status = response.get('statusCode', 200)
+    if status >= 500:
+        raise RuntimeError(f'El handler respondió {status}: {response.get("body", "")[:200]}')
+    return response
+
+
+def run_scenario(scenario, rng, task_ids, iterations, memory_iterations=MEMORY_ITERATIONS):
+    """Latencias, throughput, llamadas a DynamoDB y memoria de un escenario"""
+    from utils.instrumentation import get_sink
+    sink = get_sink()
+    handler = load_handler(scenario)
+    
+    for _ in range(WARMUP_ITERATIONS):
+        invoke(handler, build_event(scenario, rng, task_ids))
+    sink.clear()
+    
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        event = build_event(scenario, rng, task_ids)
+        call_started = time.perf_counter()
+        invoke(handler, event)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+    
+    summaries = [record for record in sink.records if 'Duration' in record]
+    dynamodb_calls = sum(
+        entry['calls']
+        for record in summaries
+        for operation, entry in record['Operations'].items()
+        if operation.startswith('dynamodb.')
+    )
+    sink.clear()
+    
+    # Pasada aparte con tracemalloc (agrega overhead: no se mezcla con la latencia)
+    tracemalloc.start()
+    for _ in range(memory_iterations):
+        invoke(handler, build_event(scenario, rng, task_ids))
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    sink.clear()
+    
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'throughput_rps': round(iterations / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p90_ms': round(percentile(latencies, 0.90), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'dynamodb_calls_per_request': round(dynamodb_calls / iterations, 2),
+        'peak_alloc_kb': round(peak_bytes / 1024, 1),
+        # ru_maxrss está en KB en Linux: máximo del proceso hasta este punto
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def run_size(size, scenarios, iterations, seed, memory_iterations=MEMORY_ITERATIONS):
+    """Todos los escenarios sobre una tabla nueva de `size` tareas"""
+    rng = random.Random(seed)
+    with mock_aws():
+        create_resources()
+        seed_started = time.perf_counter()
+        task_ids = seed_tasks(size, rng)
+        print(f"📦 {size} tareas precargadas en {time.perf_counter() - seed_started:.1f}s")
+        
+        results = {}
+        for scenario in scenarios:
+            count = iterations
+            if scenario == 'delete':
+                # delete consume ids: no borrar más de los que hay
+                count = min(iterations, len(task_ids) - WARMUP_ITERATIONS - memory_iterations)
+                if count <= 0:
+                    print(f"  delete@{size}: tabla demasiado chica, se omite")
+                    continue
+            key = f'{scenario}@{size}'
+            results[key] = dict(run_scenario(scenario, rng, task_ids, count, memory_iterations), seed=seed)
+            print_result(key, results[key])
+        return results
+
+
+def print_result(key, result):
+    print(f"  {key:<24} {result['throughput_rps']:>8} rps  "
+          f"p50 {result['p50_ms']:>8.2f}ms  p90 {result['p90_ms']:>8.2f}ms  p99 {result['p99_ms']:>8.2f}ms  "
+          f"ddb/req {result['dynamodb_calls_per_request']:>5}  peak {result['peak_alloc_kb']:>8}KB  "
+          f"rss {result['max_rss_mb']}MB")
+
+
+def compare_with_baseline(results, baseline, latency_tolerance):
+    """Regresiones: más llamadas a DynamoDB por request o p99 fuera de tolerancia"""
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if not expected:
+            continue
+        # Con la misma semilla e iteraciones los eventos son idénticos: tolerancia mínima
+        same_run = expected.get('iterations') == result['iterations'] and expected.get('seed') == result['seed']
+        calls_tolerance = 0.01 if same_run else expected['dynamodb_calls_per_request'] * 0.1
+        if result['dynamodb_calls_per_request'] > expected['dynamodb_calls_per_request'] + calls_tolerance:
+            regressions.append(
+                f"{key}: {result['dynamodb_calls_per_request']} llamadas DynamoDB/request "
+                f"(baseline {expected['dynamodb_calls_per_request']})"
+            )
+        if result['p99_ms'] > expected['p99_ms'] * (1 + latency_tolerance):
+            regressions.append(f"{key}: p99 {result['p99_ms']}ms (baseline {expected['p99_ms']}ms)")
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file).get('results', {})
+
+
+def save_baseline(path, results):
+    existing = load_baseline(path)
+    existing.update(results)
+    with open(path, 'w') as baseline_file:
+        json.dump({
+            'generated_at': datetime.utcnow().isoformat(),
+            'python': sys.version.split()[0],
+            'results': dict(sorted(existing.items()))
+        }, baseline_file, indent=2)
+        baseline_file.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de los handlers sobre AWS simulado (moto)')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Tamaños de tabla separados por coma (p. ej. 1000,100000,1000000)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Escenarios a correr')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Invocaciones medidas por escenario')
+    parser.add_argument('--memory-iterations', type=int, default=MEMORY_ITERATIONS,
+                        help='Invocaciones de la pasada con tracemalloc')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla de los datos y eventos')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Archivo de baselines')
+    parser.add_argument('--update-baseline', action='store_true', help='Guardar los resultados como baseline')
+    parser.add_argument('--latency-tolerance', type=float, default=DEFAULT_LATENCY_TOLERANCE,
+                        help='Aumento de p99 tolerado sobre el baseline (0.5 = 50%%)')
+    parser.add_argument('--output', help='Guardar los resultados en este JSON')
+    args = parser.parse_args(argv)
+    
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(',') if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+    
+    results = {}
+    for size in sizes:
+        print(f"\n🚀 Tabla de {size} tareas")
+        results.update(run_size(size, [s for s in SCENARIOS if s in scenarios], args.iterations, args.seed,
+                                args.memory_iterations))
+    
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\n💾 Baseline actualizado en {args.baseline}")
+        return 0
+    
+    regressions = compare_with_baseline(results, load_baseline(args.baseline), args.latency_tolerance)
+    if regressions:
+        print("\n❌ Regresiones respecto al baseline:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        return 1
+    
+    print("\n✅ Sin regresiones respecto al baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1 +1,12 @@
-# Task Manager - Handlers Package
\ No newline at end of file
+# Task Manager - Handlers Package
+
+import os
+
+# Medir el init desde antes de importar cualquier handler (cold start). Solo
+# en Lambda: el hook reemplaza builtins.__import__ en todo el proceso hasta la
+# primera invocación, y sqs_worker o traffic_generator importan handlers sin
+# invocar ninguno a través de instrumented_handler
+from utils.profiling import start_import_timer
+
+if os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
+    start_import_timer()
@@ -1,9 +1,16 @@
 from typing import Dict, Any
 from models import TaskCreate
-from services.task_service import TaskService
-from utils.response_utils import success_response, error_response, parse_request_body
+from services.task_service import TaskService, IdempotencyKeyReusedError
+from utils.response_utils import success_response, error_response, parse_request_body, get_header
+from utils.unit_of_work import with_unit_of_work
+from utils.instrumentation import instrumented_handler
 
+# Límite razonable para claves generadas por clientes (UUID, hashes)
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
 
+
+@instrumented_handler
+@with_unit_of_work
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler para crear una nueva tarea
@@ -15,17 +22,31 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Validar datos de entrada
         task_create = TaskCreate(**body)
         
+        # Reintentos del cliente con la misma clave no duplican la tarea
+        idempotency_key = get_header(event, 'Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            return error_response(400, 'Idempotency-Key inválida')
+        
         # Crear tarea usando el servicio
         task_service = TaskService()
-        task = task_service.create_task(task_create)
+        headers = None
+        if idempotency_key:
+            task, replayed = task_service.create_task_idempotent(task_create, idempotency_key)
+            headers = {'Idempotent-Replayed': 'true' if replayed else 'false'}
+        else:
+            task = task_service.create_task(task_create)
         
         # Respuesta exitosa
         return success_response(
             status_code=201,
             message="Tarea creada exitosamente",
-            task=task
+            task=task,
+            headers=headers
         )
         
+    except IdempotencyKeyReusedError as e:
+        return error_response(422, str(e))
+        
     except Exception as e:
         return error_response(
             status_code=400,
@@ -1,8 +1,12 @@
 from typing import Dict, Any
 from services.task_service import TaskService
 from utils.response_utils import success_response, error_response, get_path_parameter
+from utils.unit_of_work import with_unit_of_work
+from utils.instrumentation import instrumented_handler
 
 
+@instrumented_handler
+@with_unit_of_work
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler para eliminar una tarea
@@ -0,0 +1,49 @@
+from typing import Dict, Any
+from services.task_service import TaskService
+from utils.response_utils import json_response, error_response, get_query_parameters
+from utils.unit_of_work import with_unit_of_work
+from utils.instrumentation import instrumented_handler
+
+
+@instrumented_handler
+@with_unit_of_work
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler para listar tags con su número de tareas (autocompletado)
+    """
+    try:
+        # Obtener parámetros de consulta
+        query_params = get_query_parameters(event)
+        prefix = query_params.get('prefix', '')
+        limit = int(query_params.get('limit', 20))
+        
+        # Obtener contadores usando el servicio
+        task_service = TaskService()
+        tags = task_service.get_tag_counts(prefix=prefix, limit=limit)
+        
+        # Respuesta exitosa
+        return json_response(200, {
+            'message': f"Se encontraron {len(tags)} tags",
+            'tags': tags
+        })
+        
+    except Exception as e:
+        return error_response(
+            status_code=500,
+            message=f'Error al obtener los tags: {str(e)}'
+        )
+
+
+# Para pruebas locales
+if __name__ == "__main__":
+    import json
+    
+    # Evento de prueba - tags que empiezan por "tra"
+    test_event = {
+        'queryStringParameters': {
+            'prefix': 'tra'
+        }
+    }
+    
+    result = lambda_handler(test_event, None)
+    print(json.dumps(result, indent=2))
@@ -1,8 +1,15 @@
 from typing import Dict, Any
 from services.task_service import TaskService
-from utils.response_utils import success_response, error_response, get_query_parameters
+from utils.response_utils import success_response, error_response, get_query_parameters, parse_datetime_param
+from utils.unit_of_work import with_unit_of_work
+from utils.instrumentation import instrumented_handler
 
 
+MAX_IDS = 500
+
+
+@instrumented_handler
+@with_unit_of_work
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler para listar tareas con filtros opcionales
@@ -14,17 +21,48 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Extraer filtros
         status_filter = query_params.get('status')
         priority_filter = query_params.get('priority')
-        tag_filter = query_params.get('tag')
+        tag_filter = query_params.get('tag')  # Varios tags separados por coma
+        tag_mode = query_params.get('tag_mode', 'and')
         limit = int(query_params.get('limit', 50))
         
-        # Obtener tareas usando el servicio
+        if tag_mode not in ('and', 'or'):
+            return error_response(400, "tag_mode debe ser 'and' u 'or'")
+        
+        # Rango de vencimiento (solo tareas abiertas, vía GSI de due_date)
+        try:
+            due_after = parse_datetime_param(query_params.get('due_after'))
+            due_before = parse_datetime_param(query_params.get('due_before'))
+        except ValueError:
+            return error_response(400, 'due_after/due_before deben ser fechas ISO 8601')
+        
         task_service = TaskService()
-        tasks = task_service.list_tasks(
-            status_filter=status_filter,
-            priority_filter=priority_filter,
-            tag_filter=tag_filter,
-            limit=limit
-        )
+        
+        # ids=a,b,c: hidratar tareas conocidas con BatchGetItem. Con ids
+        # presente pero vacío (ids= o ids=,) no hay nada que hidratar: []
+        hydrate = 'ids' in query_params
+        ids = [task_id.strip() for task_id in (query_params.get('ids') or '').split(',') if task_id.strip()]
+        if len(ids) > MAX_IDS:
+            return error_response(400, f'Máximo {MAX_IDS} ids por request')
+        
+        if hydrate:
+            tasks = task_service.get_tasks_by_ids(ids) if ids else []
+        elif due_after or due_before:
+            tasks = task_service.list_tasks_due(
+                due_after=due_after,
+                due_before=due_before,
+                status_filter=status_filter,
+                priority_filter=priority_filter,
+                limit=limit
+            )
+        else:
+            # Obtener tareas usando el servicio
+            tasks = task_service.list_tasks(
+                status_filter=status_filter,
+                priority_filter=priority_filter,
+                tag_filter=tag_filter,
+                limit=limit,
+                tag_match_all=tag_mode == 'and'
+            )
         
         # Respuesta exitosa
         return success_response(
@@ -0,0 +1,48 @@
+"""
+⏰ Reminder Scheduler Handler - Programa recordatorios de tareas por vencer
+==========================================================================
+
+Se ejecuta con una regla programada (EventBridge) cada REMINDER_WINDOW_MINUTES.
+Encola en SQS los recordatorios de la próxima ventana; el SQS processor los
+deduplica y los publica en SNS por lotes.
+"""
+
+import logging
+from typing import Dict, Any
+from services.reminder_service import ReminderService
+from utils.instrumentation import instrumented_handler
+
+# Configuración de logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+@instrumented_handler
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handler principal para programar recordatorios
+    
+    Args:
+        event: Evento programado de EventBridge (no se usa su contenido)
+        context: Contexto de ejecución Lambda
+        
+    Returns:
+        Dict con la ventana procesada y los recordatorios encolados
+    """
+    
+    result = ReminderService().schedule_upcoming()
+    logger.info(f"⏰ Recordatorios: {result['enqueued']}/{result['found']} encolados "
+                f"({result['window_start']} → {result['window_end']})")
+    
+    return {
+        'statusCode': 200,
+        **result
+    }
+
+
+# Para pruebas locales
+if __name__ == "__main__":
+    import json
+    
+    result = lambda_handler({}, None)
+    print(json.dumps(result, indent=2))
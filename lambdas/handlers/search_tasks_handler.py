@@ -0,0 +1,63 @@
+from typing import Dict, Any
+from services.task_service import TaskService
+from utils.response_utils import success_response, error_response, get_query_parameters
+from utils.unit_of_work import with_unit_of_work
+from utils.instrumentation import instrumented_handler
+
+
+# Máximo de resultados por búsqueda
+MAX_SEARCH_LIMIT = 100
+
+
+@instrumented_handler
+@with_unit_of_work
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler para buscar tareas por texto (GET /tasks/search?q=)
+    """
+    try:
+        # Obtener parámetros de consulta
+        query_params = get_query_parameters(event)
+        query = (query_params.get('q') or '').strip()
+        
+        if not query:
+            return error_response(400, 'Parámetro q requerido')
+        
+        try:
+            limit = int(query_params.get('limit', 20))
+        except (TypeError, ValueError):
+            limit = 0
+        if not 1 <= limit <= MAX_SEARCH_LIMIT:
+            return error_response(400, f'limit debe ser un entero entre 1 y {MAX_SEARCH_LIMIT}')
+        
+        # Buscar tareas usando el servicio
+        task_service = TaskService()
+        tasks = task_service.search_tasks(query, limit=limit)
+        
+        # Respuesta exitosa
+        return success_response(
+            status_code=200,
+            message=f"Se encontraron {len(tasks)} tareas",
+            tasks=tasks
+        )
+        
+    except Exception as e:
+        return error_response(
+            status_code=500,
+            message=f'Error al buscar tareas: {str(e)}'
+        )
+
+
+# Para pruebas locales
+if __name__ == "__main__":
+    import json
+    
+    # Evento de prueba
+    test_event = {
+        'queryStringParameters': {
+            'q': 'documentacion'
+        }
+    }
+    
+    result = lambda_handler(test_event, None)
+    print(json.dumps(result, indent=2))
@@ -10,17 +10,49 @@ Funcionalidades:
 - Maneja tareas asíncronas del sistema
 - Logging detallado para debugging
 - Manejo de errores y reintento automático
+- Deduplicación de reentregas (idempotency_key o messageId); una clave
+  solo cuenta como duplicada cuando su efecto terminó
+- Recordatorios publicados en SNS por lotes
+- Rollups de throughput (tareas creadas/completadas por hora y día)
+- Una misma función para todas las colas de la topología (prioridad y bulk);
+  el lote y la concurrencia se configuran por cola en el event source mapping
+- Respuesta parcial (batchItemFailures): solo se reintentan los fallidos
+- Cuarentena de mensajes venenosos en la DLQ con el contexto del error
+- Notificaciones SNS despachadas por MessageAttributes (event_type) sin
+  parsear el cuerpo de los eventos que no tienen handler
+- Cuerpos comprimidos o en S3 (utils/message_codec.py) rehidratados al usarlos
 """
 
 import json
 import logging
 import os
-from typing import Dict, Any, List
+from datetime import datetime, timezone
+from collections.abc import Mapping
+from typing import Dict, Any, List, Tuple
+from repositories.rollup_repository import RollupRepository
+from repositories.idempotency_repository import COMPLETED, IN_PROGRESS
+from services.idempotency_service import IdempotencyService
+from utils.instrumentation import instrumented_handler
+from utils.message_codec import decode_message
+from utils.notification_attributes import EVENT_TYPE_ATTRIBUTE, TASK_CREATED, TASK_UPDATED, attribute_value
+from utils.queue_topology import QUEUE_TOPOLOGY, queue_class_for_arn
 
 # Configuración de logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Reutilizado entre invocaciones del contenedor
+_rollup_repository = None
+
+
+def get_rollup_repository() -> RollupRepository:
+    global _rollup_repository
+    if _rollup_repository is None:
+        _rollup_repository = RollupRepository()
+    return _rollup_repository
+
+
+@instrumented_handler
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handler principal para procesar mensajes SQS
@@ -36,21 +68,64 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         Exception: Si falla el procesamiento de algún mensaje crítico
     """
     
-    logger.info(f"🔄 Procesando batch SQS con {len(event.get('Records', []))} mensajes")
+    queue_class = get_queue_class(event)
+    logger.info(f"🔄 Procesando batch SQS con {len(event.get('Records', []))} mensajes (cola {queue_class})")
     
     # Resultados del procesamiento
     processed_messages = []
     failed_messages = []
+    pending_reminders = []
     
     try:
+        # Reservar las claves de idempotencia de todo el batch de una vez
+        # (in_progress con lease; se completan después del efecto). El lease
+        # dura lo que el visibility timeout: cuando SQS reentrega, ya caducó
+        records = event.get('Records', [])
+        queue = QUEUE_TOPOLOGY.get(queue_class)
+        idempotency = IdempotencyService(lease_seconds=queue.visibility_timeout) if queue else IdempotencyService()
+        keys = [get_idempotency_key(record) for record in records]
+        states = idempotency.claim_many(keys)
+        completed_keys = []
+        
         # Procesar cada mensaje en el batch
-        for record in event.get('Records', []):
+        for record, key, state in zip(records, keys, states):
+            if state == COMPLETED:
+                logger.info(f"🔁 Mensaje duplicado descartado: {key}")
+                processed_messages.append({
+                    'messageId': record.get('messageId', 'unknown'),
+                    'idempotency_key': key,
+                    'duplicate': True,
+                    'processed': True
+                })
+                continue
+            
+            if state == IN_PROGRESS:
+                # Otro consumidor tiene el lease: reintentar cuando caduque
+                failed_messages.append({
+                    'messageId': record.get('messageId', 'unknown'),
+                    'error': f'Clave de idempotencia en curso: {key}',
+                    'body': record.get('body', '')[:200],
+                    'in_progress': True
+                })
+                logger.warning(f"⏳ Mensaje en curso en otro consumidor, se reintentará: {key}")
+                continue
+            
             try:
                 result = process_sqs_message(record)
+                
+                # Los recordatorios se publican juntos al final del batch
+                if result.get('type') == 'reminder':
+                    result['idempotency_key'] = key
+                    pending_reminders.append(result)
+                    continue
+                
                 processed_messages.append(result)
+                completed_keys.append(key)
                 logger.info(f"✅ Mensaje procesado exitosamente: {result['messageId']}")
                 
             except Exception as e:
+                # Liberar la clave para que la reentrega vuelva a intentarlo
+                idempotency.release(key)
                 error_info = {
                     'messageId': record.get('messageId', 'unknown'),
                     'error': str(e),
@@ -59,21 +134,40 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 failed_messages.append(error_info)
                 logger.error(f"❌ Error procesando mensaje {error_info['messageId']}: {e}")
         
+        if pending_reminders:
+            delivered, failed = deliver_reminders(pending_reminders)
+            failed_keys = {error_info['idempotency_key'] for error_info in failed}
+            for key in failed_keys:
+                idempotency.release(key)
+            completed_keys.extend(result['idempotency_key'] for result in pending_reminders
+                                  if result['idempotency_key'] not in failed_keys)
+            processed_messages.extend(delivered)
+            failed_messages.extend(failed)
+        
+        idempotency.complete_many(completed_keys)
+        
+        logger.info(f"🔁 Dedup: {idempotency.stats}")
+        
         # Log de resumen
         logger.info(f"📊 Resumen: {len(processed_messages)} exitosos, {len(failed_messages)} fallidos")
         
-        # Si hay mensajes fallidos, lanzar excepción para triggear retry
-        if failed_messages:
-            logger.warning(f"⚠️ {len(failed_messages)} mensajes fallaron, serán reintentados")
-            # En un entorno real, podrías decidir si fallar completamente o solo parcialmente
-            # raise Exception(f"Failed to process {len(failed_messages)} messages")
+        # Los venenosos van a cuarentena; el resto vuelve a la cola (batchItemFailures)
+        batch_item_failures, quarantined = handle_failures(records, failed_messages)
+        if batch_item_failures:
+            logger.warning(f"⚠️ {len(batch_item_failures)} mensajes fallaron, serán reintentados")
+        if quarantined:
+            logger.warning(f"☣️ {len(quarantined)} mensajes en cuarentena: {quarantined}")
         
         return {
             'statusCode': 200,
+            'queueClass': queue_class,
             'processedCount': len(processed_messages),
             'failedCount': len(failed_messages),
             'processedMessages': processed_messages,
-            'failedMessages': failed_messages
+            'failedMessages': failed_messages,
+            'quarantinedCount': len(quarantined),
+            'batchItemFailures': batch_item_failures,
+            'dedup': idempotency.stats
         }
         
     except Exception as e:
@@ -81,6 +175,80 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         raise
 
 
+def handle_failures(records: List[Dict[str, Any]],
+                    failed_messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, str]], List[str]]:
+    """
+    Separar los mensajes fallidos en reintentables y venenosos
+    
+    Un mensaje que vuelve a fallar tras POISON_RECEIVE_COUNT recepciones se
+    copia a la DLQ con el error y se da por consumido, así no sigue
+    ocupando lotes. Si la cuarentena falla, se reintenta como cualquier otro
+    (la redrive policy es el respaldo).
+    
+    Returns:
+        Tupla (batchItemFailures, messageIds en cuarentena)
+    """
+    
+    if not failed_messages:
+        return [], []
+    
+    # Import diferido: solo los batches con fallos pagan el servicio de DLQ
+    from services.dead_letter_service import DeadLetterService
+    
+    dead_letters = DeadLetterService()
+    records_by_id = {record.get('messageId'): record for record in records}
+    batch_item_failures, quarantined = [], []
+    
+    for error_info in failed_messages:
+        message_id = error_info['messageId']
+        record = records_by_id.get(message_id)
+        
+        # Un mensaje en curso en otro consumidor no es venenoso
+        if record is not None and not error_info.get('in_progress') and dead_letters.is_poison(record):
+            try:
+                dead_letters.quarantine(record, error_info['error'])
+                error_info['quarantined'] = True
+                quarantined.append(message_id)
+                continue
+            except Exception as e:
+                logger.error(f"❌ Error poniendo en cuarentena {message_id}: {e}")
+        
+        batch_item_failures.append({'itemIdentifier': message_id})
+    
+    return batch_item_failures, quarantined
+
+
+def get_queue_class(event: Dict[str, Any]) -> str:
+    """Cola de la topología de la que viene el batch (un event source mapping = una cola)"""
+    records = event.get('Records', [])
+    if not records:
+        return 'unknown'
+    return queue_class_for_arn(records[0].get('eventSourceARN', '')) or 'unknown'
+
+
+def get_idempotency_key(record: Dict[str, Any]) -> str:
+    """
+    Clave de deduplicación de un record SQS
+    
+    Prioridad: idempotency_key de negocio en el body, MessageId de SNS
+    (estable entre reentregas del mismo publish) y por último el messageId de SQS.
+    """
+    
+    try:
+        body = decode_message(record.get('body', '{}'))
+    except (TypeError, ValueError):
+        body = None
+    
+    # Un sobre responde idempotency_key desde sus headers, sin rehidratar
+    if isinstance(body, Mapping):
+        if body.get('idempotency_key'):
+            return body['idempotency_key']
+        if body.get('Type') == 'Notification' and body.get('MessageId'):
+            return f"sns#{body['MessageId']}"
+    
+    return f"sqs#{record.get('messageId', 'unknown')}"
+
+
 def process_sqs_message(record: Dict[str, Any]) -> Dict[str, Any]:
     """
     Procesa un mensaje individual de SQS
@@ -98,8 +266,8 @@ def process_sqs_message(record: Dict[str, Any]) -> Dict[str, Any]:
     logger.info(f"🔍 Procesando mensaje: {message_id}")
     
     try:
-        # Parse del body del mensaje
-        message_body = json.loads(record.get('body', '{}'))
+        # Parse del body del mensaje (los sobres grandes quedan sin rehidratar)
+        message_body = decode_message(record.get('body', '{}'))
         
         # Verificar si es un mensaje SNS
         if 'Type' in message_body and message_body['Type'] == 'Notification':
@@ -139,25 +307,19 @@ def process_sns_notification(sns_message: Dict[str, Any], message_id: str) -> Di
         timestamp = sns_message.get('Timestamp', '')
         topic_arn = sns_message.get('TopicArn', '')
         
-        # Parse del contenido del mensaje (podría ser JSON)
-        try:
-            parsed_message = json.loads(message_content)
-            logger.info(f"📄 Mensaje SNS parseado: {parsed_message}")
-        except json.JSONDecodeError:
-            parsed_message = {'raw_message': message_content}
-            logger.info(f"📄 Mensaje SNS raw: {message_content[:100]}...")
+        # Despacho por MessageAttributes: el cuerpo solo se parsea si el
+        # evento tiene handler (o si el publicador no mandó atributos)
+        notification_type = attribute_value(sns_message.get('MessageAttributes', {}), EVENT_TYPE_ATTRIBUTE)
+        parsed_message = None
+        if notification_type is None:
+            parsed_message = parse_sns_message(message_content)
+            notification_type = parsed_message.get('notification_type', 'general')
         
-        # Aquí puedes agregar lógica específica según el tipo de notificación
-        notification_type = parsed_message.get('notification_type', 'general')
-        
-        if notification_type == 'task_created':
-            handle_task_created_notification(parsed_message)
-        elif notification_type == 'task_updated':
-            handle_task_updated_notification(parsed_message)
-        elif notification_type == 'file_uploaded':
-            handle_file_uploaded_notification(parsed_message)
+        handler = NOTIFICATION_HANDLERS.get(notification_type)
+        if handler is None:
+            logger.info(f"🔔 Notificación {notification_type} procesada: {subject}")
         else:
-            logger.info(f"🔔 Notificación general procesada: {subject}")
+            handler(parsed_message if parsed_message is not None else parse_sns_message(message_content))
         
         return {
             'messageId': message_id,
@@ -173,6 +335,17 @@ def process_sns_notification(sns_message: Dict[str, Any], message_id: str) -> Di
         raise
 
 
+def parse_sns_message(message_content: str) -> Dict[str, Any]:
+    """Contenido de una notificación SNS (JSON o un sobre del codec)"""
+    try:
+        parsed_message = decode_message(message_content)
+        logger.info(f"📄 Mensaje SNS parseado: {parsed_message}")
+    except json.JSONDecodeError:
+        parsed_message = {'raw_message': message_content}
+        logger.info(f"📄 Mensaje SNS raw: {message_content[:100]}...")
+    return parsed_message
+
+
 def process_direct_sqs_message(message: Dict[str, Any], message_id: str) -> Dict[str, Any]:
     """
     Procesa un mensaje enviado directamente a SQS
@@ -188,12 +361,19 @@ def process_direct_sqs_message(message: Dict[str, Any], message_id: str) -> Dict
     logger.info(f"📨 Procesando mensaje directo SQS: {message_id}")
     
     try:
-        message_type = message.get('type', 'unknown')
+        # QueueService identifica los mensajes con 'action'
+        message_type = message.get('type') or message.get('action', 'unknown')
         
         if message_type == 'task_processing':
             return handle_task_processing(message, message_id)
         elif message_type == 'cleanup_request':
             return handle_cleanup_request(message, message_id)
+        elif message_type == 'send_reminder':
+            return {
+                'messageId': message_id,
+                'type': 'reminder',
+                'reminder': message
+            }
         else:
             logger.info(f"🔄 Mensaje genérico procesado: {message_type}")
             
@@ -214,9 +394,11 @@ def handle_task_created_notification(message: Dict[str, Any]) -> None:
     task_id = message.get('task_id', 'unknown')
     logger.info(f"🆕 Tarea creada: {task_id}")
     
+    # Throughput por hora/día (el mensaje ya fue deduplicado por el batch)
+    get_rollup_repository().increment('created', event_time(message.get('created_at')))
+    
     # Aquí puedes agregar lógica adicional como:
     # - Enviar emails de notificación
-    # - Actualizar métricas
     # - Sincronizar con sistemas externos
 
 
@@ -231,10 +413,23 @@ def handle_task_updated_notification(message: Dict[str, Any]) -> None:
     # Lógica específica según el cambio de estado
     if new_status == 'completed':
         logger.info(f"✅ Tarea completada: {task_id}")
+        if old_status != 'completed':
+            get_rollup_repository().increment('completed', event_time(message.get('updated_at')))
     elif new_status == 'cancelled':
         logger.info(f"❌ Tarea cancelada: {task_id}")
 
 
+def event_time(value: Any) -> datetime:
+    """Momento del evento en UTC sin zona (como los timestamps de las tareas)"""
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
 def handle_file_uploaded_notification(message: Dict[str, Any]) -> None:
     """Maneja notificaciones de archivos subidos"""
     task_id = message.get('task_id', 'unknown')
@@ -244,6 +439,14 @@ def handle_file_uploaded_notification(message: Dict[str, Any]) -> None:
     logger.info(f"📎 Archivo subido a tarea {task_id}: {file_key} ({file_size} bytes)")
 
 
+# event_type -> handler; el resto de las notificaciones se reconoce sin parsear
+NOTIFICATION_HANDLERS = {
+    TASK_CREATED: handle_task_created_notification,
+    TASK_UPDATED: handle_task_updated_notification,
+    'file_uploaded': handle_file_uploaded_notification
+}
+
+
 def handle_task_processing(message: Dict[str, Any], message_id: str) -> Dict[str, Any]:
     """Maneja procesamiento asíncrono de tareas"""
     task_id = message.get('task_id', 'unknown')
@@ -281,4 +484,33 @@ def handle_cleanup_request(message: Dict[str, Any], message_id: str) -> Dict[str
         'cleanup_type': cleanup_type,
         'target': target,
         'processed': True
-    }
\ No newline at end of file
+    }
+
+
+def deliver_reminders(pending: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Publicar en SNS, por lotes, los recordatorios de un batch
+    
+    La deduplicación ya ocurrió al reservar la clave de cada mensaje.
+    
+    Returns:
+        Tupla (procesados, fallidos) con el formato de lambda_handler
+    """
+    from services.notification_service import NotificationService
+    
+    failed_task_ids = set(NotificationService().send_task_reminders([result['reminder'] for result in pending]))
+    processed, failed = [], []
+    
+    for result in pending:
+        task_id = result['reminder'].get('task_id')
+        if task_id in failed_task_ids:
+            failed.append({
+                'messageId': result['messageId'],
+                'idempotency_key': result['idempotency_key'],
+                'error': 'Error publicando recordatorio en SNS',
+                'body': result['idempotency_key']
+            })
+        else:
+            processed.append({'messageId': result['messageId'], 'type': 'reminder', 'task_id': task_id, 'processed': True})
+    
+    logger.info(f"⏰ Recordatorios: {len(processed)} enviados, {len(failed)} fallidos")
+    return processed, failed
\ No newline at end of file
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any
+from services.stats_service import StatsService, DEFAULT_TIMESERIES_RANGES
+from utils.response_utils import json_response, error_response, get_query_parameters, parse_datetime_param
+from utils.instrumentation import instrumented_handler
+
+
+@instrumented_handler
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler para la serie de tareas creadas/completadas
+    (GET /tasks/stats/timeseries?from=&to=&granularity=hour|day)
+    """
+    try:
+        # Obtener parámetros de consulta
+        query_params = get_query_parameters(event)
+        granularity = query_params.get('granularity', 'hour')
+        if granularity not in DEFAULT_TIMESERIES_RANGES:
+            return error_response(400, "granularity debe ser 'hour' o 'day'")
+        
+        try:
+            end = parse_datetime_param(query_params.get('to')) or datetime.utcnow()
+            start = parse_datetime_param(query_params.get('from')) or end - DEFAULT_TIMESERIES_RANGES[granularity]
+        except ValueError:
+            return error_response(400, 'from/to deben ser fechas ISO 8601')
+        
+        try:
+            series = StatsService().timeseries(start, end, granularity)
+        except ValueError as e:
+            return error_response(400, str(e))
+        
+        # Respuesta exitosa
+        return json_response(200, {
+            'message': f"Serie con {len(series)} buckets",
+            'granularity': granularity,
+            'series': series
+        })
+        
+    except Exception as e:
+        return error_response(
+            status_code=500,
+            message=f'Error al obtener la serie de tiempo: {str(e)}'
+        )
+
+
+# Para pruebas locales
+if __name__ == "__main__":
+    import json
+    
+    # Evento de prueba - últimos 7 días
+    test_event = {
+        'queryStringParameters': {
+            'granularity': 'day',
+            'from': (datetime.utcnow() - timedelta(days=7)).isoformat()
+        }
+    }
+    
+    result = lambda_handler(test_event, None)
+    print(json.dumps(result, indent=2))
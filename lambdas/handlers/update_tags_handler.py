@@ -0,0 +1,68 @@
+from typing import Dict, Any
+from models import TaskTagsUpdate
+from services.task_service import TaskService
+from utils.response_utils import success_response, error_response, parse_request_body, get_path_parameter, version_etag
+from utils.unit_of_work import with_unit_of_work
+from utils.instrumentation import instrumented_handler
+
+
+@instrumented_handler
+@with_unit_of_work
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler para agregar/quitar tags de una tarea (PATCH /tasks/{id}/tags)
+    """
+    try:
+        # Obtener ID de la tarea desde path parameters
+        task_id = get_path_parameter(event, 'id')
+        if not task_id:
+            return error_response(400, 'ID de tarea requerido')
+        
+        # Parsear y validar el body del request
+        tags_update = TaskTagsUpdate(**parse_request_body(event))
+        if not tags_update.add and not tags_update.remove:
+            return error_response(400, 'Se requiere al menos un tag en add o remove')
+        
+        # Actualizar tags usando el servicio
+        task_service = TaskService()
+        updated_task = task_service.update_tags(
+            task_id,
+            add=tags_update.add,
+            remove=tags_update.remove
+        )
+        
+        if not updated_task:
+            return error_response(404, 'Tarea no encontrada')
+        
+        # Respuesta exitosa
+        return success_response(
+            status_code=200,
+            message="Tags actualizados exitosamente",
+            task=updated_task,
+            headers=version_etag(updated_task)
+        )
+        
+    except Exception as e:
+        return error_response(
+            status_code=400,
+            message=f'Error al actualizar los tags: {str(e)}'
+        )
+
+
+# Para pruebas locales
+if __name__ == "__main__":
+    import json
+    
+    # Evento de prueba
+    test_event = {
+        'pathParameters': {
+            'id': 'test-task-id'  # Reemplazar con un ID real para pruebas
+        },
+        'body': json.dumps({
+            'add': ['urgente'],
+            'remove': ['backlog']
+        })
+    }
+    
+    result = lambda_handler(test_event, None)
+    print(json.dumps(result, indent=2))
@@ -1,9 +1,17 @@
 from typing import Dict, Any
 from models import TaskUpdate
+from repositories.task_repository import VersionConflictError
 from services.task_service import TaskService
-from utils.response_utils import success_response, error_response, parse_request_body, get_path_parameter
+from utils.response_utils import (
+    success_response, error_response, parse_request_body, get_path_parameter,
+    get_header, parse_if_match, version_etag
+)
+from utils.unit_of_work import with_unit_of_work
+from utils.instrumentation import instrumented_handler
 
 
+@instrumented_handler
+@with_unit_of_work
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler para actualizar una tarea existente
@@ -20,9 +28,12 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Validar datos de entrada
         task_update = TaskUpdate(**body)
         
+        # Versión esperada para concurrencia optimista (opcional)
+        expected_version = parse_if_match(get_header(event, 'If-Match'))
+        
         # Actualizar tarea usando el servicio
         task_service = TaskService()
-        updated_task = task_service.update_task(task_id, task_update)
+        updated_task = task_service.update_task(task_id, task_update, expected_version=expected_version)
         
         if not updated_task:
             return error_response(404, 'Tarea no encontrada')
@@ -31,9 +42,13 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return success_response(
             status_code=200,
             message="Tarea actualizada exitosamente",
-            task=updated_task
+            task=updated_task,
+            headers=version_etag(updated_task)
         )
         
+    except VersionConflictError:
+        return error_response(412, 'La tarea fue modificada por otro cliente (If-Match no coincide)')
+        
     except Exception as e:
         return error_response(
             status_code=400,
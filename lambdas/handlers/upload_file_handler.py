@@ -4,8 +4,12 @@ from models import FileUploadResponse
 from services.task_service import TaskService
 from services.file_service import FileService
 from utils.response_utils import success_response, error_response, parse_request_body, get_path_parameter
+from utils.unit_of_work import with_unit_of_work
+from utils.instrumentation import instrumented_handler
 
 
+@instrumented_handler
+@with_unit_of_work
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler para subir archivos a S3 y vincularlos a una tarea
@@ -42,8 +46,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             task_id=task_id
         )
         
-        # Actualizar la tarea con la referencia del archivo
-        task_service.add_file_to_task(task_id, s3_key)
+        # Actualizar la tarea con la referencia del archivo (escritura condicional)
+        if not task_service.add_file_to_task(task_id, s3_key):
+            file_service.delete_files([s3_key])
+            return error_response(404, 'Tarea no encontrada')
         
         # Generar URL del archivo
         file_url = file_service.generate_file_url(s3_key)
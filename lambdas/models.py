@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -18,6 +18,17 @@ class TaskPriority(str, Enum):
     CRITICAL = "critical"
 
 
+def validate_tags(tags: Optional[List[str]]) -> Optional[List[str]]:
+    """Rechazar tags vacíos o repetidos (se guardan como String Set y en el índice TAG#)"""
+    if tags is None:
+        return tags
+    if any(not tag.strip() for tag in tags):
+        raise ValueError('Los tags no pueden estar vacíos')
+    if len(set(tags)) != len(tags):
+        raise ValueError('Los tags no pueden repetirse')
+    return tags
+
+
 class TaskCreate(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
     description: Optional[str] = Field(None, max_length=1000)
@@ -25,6 +36,8 @@ class TaskCreate(BaseModel):
     priority: TaskPriority = TaskPriority.MEDIUM
     due_date: Optional[datetime] = None
     tags: List[str] = Field(default_factory=list)
+    
+    _validate_tags = validator('tags', allow_reuse=True)(validate_tags)
 
 
 class TaskUpdate(BaseModel):
@@ -34,6 +47,15 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = None
     due_date: Optional[datetime] = None
     tags: Optional[List[str]] = None
+    
+    _validate_tags = validator('tags', allow_reuse=True)(validate_tags)
+
+
+class TaskTagsUpdate(BaseModel):
+    add: List[str] = Field(default_factory=list)
+    remove: List[str] = Field(default_factory=list)
+    
+    _validate_tags = validator('add', 'remove', allow_reuse=True)(validate_tags)
 
 
 class Task(BaseModel):
@@ -47,6 +69,7 @@ class Task(BaseModel):
     created_at: datetime
     updated_at: datetime
     files: List[str] = Field(default_factory=list)  # S3 keys de archivos adjuntos
+    version: int = 1  # Control de concurrencia optimista (ETag / If-Match)
 
 
 class TaskResponse(BaseModel):
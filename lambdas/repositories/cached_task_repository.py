@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from models import Task
+from repositories.task_repository import TaskRepository
+from utils.cache import CacheBackend, InMemorySharedCache, LRUCache
+
+
+def cache_ttl_seconds() -> float:
+    """TTL del cache de tareas (TASK_CACHE_TTL_SECONDS)
+    
+    Cada proceso tiene su propio cache y solo invalida sus escrituras, así
+    que otro proceso serviría la versión anterior (y su ETag) hasta el TTL.
+    Por eso el valor por defecto es 0 (desactivado) en Lambda y con varios
+    procesos (gunicorn o WEB_CONCURRENCY > 1), y 5s solo en el servidor
+    local de un proceso.
+    """
+    default = '0' if _multi_process() else '5'
+    return float(os.getenv('TASK_CACHE_TTL_SECONDS', default))
+
+
+def _multi_process() -> bool:
+    """¿Hay otros procesos sirviendo la misma tabla con su propio cache?"""
+    # gunicorn define SERVER_SOFTWARE en el master antes de precargar la app
+    return (bool(os.getenv('AWS_LAMBDA_FUNCTION_NAME'))
+            or os.getenv('SERVER_SOFTWARE', '').startswith('gunicorn')
+            or int(os.getenv('WEB_CONCURRENCY', '1')) > 1)
+
+
+class CacheStats:
+    """Contadores de aciertos y latencia del cache (compartidos en el proceso)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def record(self, outcome: str, seconds: float) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+            self.seconds[outcome] += seconds
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Hit ratio y latencia media (ms) por resultado"""
+        with self._lock:
+            lookups = sum(self.counts.values())
+            hits = self.counts['local_hit'] + self.counts['shared_hit']
+            return {
+                'lookups': lookups,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+                'counts': dict(self.counts),
+                'avg_latency_ms': {
+                    outcome: round(self.seconds[outcome] / count * 1000, 3)
+                    for outcome, count in self.counts.items() if count
+                }
+            }
+    
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = {'local_hit': 0, 'shared_hit': 0, 'miss': 0}
+            self.seconds = {'local_hit': 0.0, 'shared_hit': 0.0, 'miss': 0.0}
+
+
+class CachedTaskRepository(TaskRepository):
+    """TaskRepository con cache read-through en las lecturas por ID
+    
+    - Nivel 1: LRU con TTL en memoria del proceso (Lambda caliente)
+    - Nivel 2 (opcional): cache compartido detrás de CacheBackend
+    
+    Toda escritura invalida la tarea en ambos niveles. El TTL acota cuánto
+    puede ver otro contenedor una versión anterior de la tarea.
+    """
+    
+    # Compartidos entre instancias e invocaciones del mismo contenedor
+    _local_cache = LRUCache(
+        max_size=int(os.getenv('TASK_CACHE_MAX_ITEMS', '1000')),
+        ttl_seconds=cache_ttl_seconds()
+    )
+    stats = CacheStats()
+    
+    def __init__(self, shared_cache: Optional[CacheBackend] = None):
+        super().__init__()
+        self.shared_cache = shared_cache
+        self.ttl_seconds = self._local_cache.ttl_seconds
+    
+    def _fetch_by_id(self, task_id: str) -> Optional[Task]:
+        """Leer la tarea pasando por el cache"""
+        started = time.perf_counter()
+        
+        task = self._lookup(task_id, started)
+        if task is not None:
+            return task
+        
+        task = super()._fetch_by_id(task_id)
+        if task is not None:
+            self._store(task)
+        
+        self.stats.record('miss', time.perf_counter() - started)
+        return task
+    
+    def _fetch_by_ids(self, task_ids: List[str]) -> Dict[str, Task]:
+        """Leer varias tareas: las cacheadas en memoria, el resto con BatchGetItem"""
+        found = {}
+        missing = []
+        for task_id in task_ids:
+            task = self._lookup(task_id, time.perf_counter())
+            if task is not None:
+                found[task_id] = task
+            else:
+                missing.append(task_id)
+        
+        if missing:
+            started = time.perf_counter()
+            fetched = super()._fetch_by_ids(missing)
+            for task in fetched.values():
+                self._store(task)
+            found.update(fetched)
+            
+            # La latencia del batch se reparte entre las claves leídas
+            per_key = (time.perf_counter() - started) / len(missing)
+            for _ in missing:
+                self.stats.record('miss', per_key)
+        
+        return found
+    
+    def _lookup(self, task_id: str, started: float) -> Optional[Task]:
+        """Buscar en el nivel local y luego en el compartido, registrando el acierto"""
+        task = self._local_cache.get(task_id)
+        if task is not None:
+            self.stats.record('local_hit', time.perf_counter() - started)
+            return task
+        
+        if self.shared_cache is not None:
+            cached = self.shared_cache.get(self._shared_key(task_id))
+            if cached is not None:
+                task = Task(**json.loads(cached))
+                self._local_cache.set(task_id, task)
+                self.stats.record('shared_hit', time.perf_counter() - started)
+                return task
+        
+        return None
+    
+    def _store(self, task: Task) -> None:
+        self._local_cache.set(task.id, task)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(task.id), task.json(), self.ttl_seconds)
+    
+    def save(self, task: Task, idempotency_put: Optional[Dict[str, Any]] = None) -> None:
+        super().save(task, idempotency_put=idempotency_put)
+        self.invalidate(task.id)
+    
+    def update(self,
+               task_id: str,
+               updates: Dict[str, Any],
+               expected_version: Optional[int] = None,
+               return_previous: bool = False):
+        # Invalidar también si la escritura falla por conflicto: el cache quedó viejo
+        try:
+            return super().update(task_id, updates, expected_version=expected_version, return_previous=return_previous)
+        finally:
+            self.invalidate(task_id)
+    
+    def update_tags(self,
+                    task_id: str,
+                    add: Optional[List[str]] = None,
+                    remove: Optional[List[str]] = None) -> Optional[Task]:
+        try:
+            return super().update_tags(task_id, add=add, remove=remove)
+        finally:
+            self.invalidate(task_id)
+    
+    def delete(self, task_id: str) -> None:
+        super().delete(task_id)
+        self.invalidate(task_id)
+    
+    def add_file_to_task(self, task_id: str, file_key: str) -> Optional[Task]:
+        task = super().add_file_to_task(task_id, file_key)
+        self.invalidate(task_id)
+        return task
+    
+    def invalidate(self, task_id: str) -> None:
+        """Eliminar una tarea de ambos niveles del cache"""
+        self._local_cache.delete(task_id)
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.delete(self._shared_key(task_id))
+            except Exception as e:
+                print(f"Error invalidando cache compartido de {task_id}: {str(e)}")
+    
+    @staticmethod
+    def _shared_key(task_id: str) -> str:
+        return f'task:{task_id}'
+
+
+def get_task_repository() -> TaskRepository:
+    """Repositorio de tareas según configuración de cache
+    
+    TASK_CACHE_TTL_SECONDS=0 (por defecto en Lambda) desactiva el cache; TASK_CACHE_SHARED_BACKEND=memory
+    agrega el nivel compartido con el sustituto en memoria.
+    """
+    if cache_ttl_seconds() <= 0:
+        return TaskRepository()
+    
+    shared_cache = None
+    if os.getenv('TASK_CACHE_SHARED_BACKEND') == 'memory':
+        shared_cache = InMemorySharedCache()
+    
+    return CachedTaskRepository(shared_cache=shared_cache)
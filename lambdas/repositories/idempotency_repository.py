@@ -0,0 +1,138 @@
+import time
+from typing import Any, Dict, List, Optional
+from utils.aws_config import aws_config, get_index_table_name
+
+
+IDEMPOTENCY_PREFIX = 'IDEMPOTENCY#'
+IDEMPOTENCY_SK = 'KEY'
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+# Un claim en curso caduca tras el lease: si el consumidor muere a mitad del
+# batch, la reentrega puede volver a reservar la clave
+DEFAULT_LEASE_SECONDS = 5 * 60
+
+# BatchWriteItem acepta hasta 25 escrituras por llamada
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_WRITE_MAX_ATTEMPTS = 5
+
+# Resultado de claim
+CLAIMED = 'claimed'
+IN_PROGRESS = 'in_progress'
+COMPLETED = 'completed'
+
+
+class IdempotencyKeyInUseError(Exception):
+    """La clave de idempotencia ya fue registrada por otra escritura"""
+
+
+class IdempotencyRepository:
+    """Claves de idempotencia en la tabla de índices, con expiración por TTL
+    
+    Un claim es un put condicional en estado in_progress con un lease corto:
+    solo el primero que escribe la clave (o quien la encuentra expirada)
+    ejecuta el efecto secundario, y la marca completed al terminar con el
+    TTL largo. Solo las claves completed son duplicados.
+    Usa el cliente (seguro entre hilos) para poder reservar claves en paralelo.
+    """
+    
+    def __init__(self):
+        self.dynamodb = aws_config.get_dynamodb_resource()
+        self.client = self.dynamodb.meta.client
+        self.table_name = get_index_table_name()
+    
+    def claim(self, key: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> str:
+        """Reservar una clave en curso por lease_seconds
+        
+        Returns:
+            CLAIMED si el efecto debe ejecutarse, COMPLETED si ya se ejecutó
+            o IN_PROGRESS si otro consumidor tiene el lease vigente
+        """
+        now = int(time.time())
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    'pk': f'{IDEMPOTENCY_PREFIX}{key}',
+                    'sk': IDEMPOTENCY_SK,
+                    'status': IN_PROGRESS,
+                    'expires_at': now + lease_seconds
+                },
+                # El TTL de DynamoDB puede tardar en borrar items expirados
+                ConditionExpression='attribute_not_exists(pk) OR expires_at < :now',
+                ExpressionAttributeValues={':now': now},
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+            return CLAIMED
+        except self.client.exceptions.ConditionalCheckFailedException as e:
+            # El item viene sin deserializar ({'S': ...}); sin él, se lee
+            item = e.response.get('Item')
+            if item is not None:
+                status = item.get('status', {}).get('S')
+            else:
+                current = self.get(key)
+                status = current.get('status') if current else IN_PROGRESS
+            # Las claves sin estado (claims anteriores al lease) cuentan como hechas
+            return IN_PROGRESS if status == IN_PROGRESS else COMPLETED
+    
+    def complete_many(self, keys: List[str], ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+        """Marcar claves como ejecutadas; desde aquí las reentregas son duplicados
+        
+        Los puts son incondicionales, así que van en BatchWriteItem de 25
+        claves (una ida y vuelta por bloque), reintentando UnprocessedItems.
+        """
+        expires_at = int(time.time()) + ttl_seconds
+        for i in range(0, len(keys), BATCH_WRITE_MAX_ITEMS):
+            request = {self.table_name: [
+                {'PutRequest': {'Item': {
+                    'pk': f'{IDEMPOTENCY_PREFIX}{key}',
+                    'sk': IDEMPOTENCY_SK,
+                    'status': COMPLETED,
+                    'expires_at': expires_at
+                }}}
+                for key in keys[i:i + BATCH_WRITE_MAX_ITEMS]
+            ]}
+            self._batch_write(request)
+    
+    def _batch_write(self, request: Dict[str, Any]) -> None:
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            request = self.client.batch_write_item(RequestItems=request).get('UnprocessedItems')
+            if not request:
+                return
+            time.sleep(min(0.05 * 2 ** attempt, 1.0))
+        raise RuntimeError(f"BatchWriteItem no procesó {len(request[self.table_name])} claves")
+    
+    def release(self, key: str) -> None:
+        """Liberar una clave para permitir reintentos (el efecto falló)"""
+        self.client.delete_item(
+            TableName=self.table_name,
+            Key={'pk': f'{IDEMPOTENCY_PREFIX}{key}', 'sk': IDEMPOTENCY_SK}
+        )
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Registro vigente de una clave (None si no existe o expiró)"""
+        response = self.client.get_item(
+            TableName=self.table_name,
+            Key={'pk': f'{IDEMPOTENCY_PREFIX}{key}', 'sk': IDEMPOTENCY_SK},
+            ConsistentRead=True
+        )
+        item = response.get('Item')
+        if not item or int(item.get('expires_at', 0)) < int(time.time()):
+            return None
+        return item
+    
+    def transact_put(self, key: str, ttl_seconds: int = DEFAULT_TTL_SECONDS, **attributes) -> Dict[str, Any]:
+        """Put condicional de una clave para incluir en un TransactWriteItems"""
+        now = int(time.time())
+        return {
+            'Put': {
+                'TableName': self.table_name,
+                'Item': dict(
+                    attributes,
+                    pk=f'{IDEMPOTENCY_PREFIX}{key}',
+                    sk=IDEMPOTENCY_SK,
+                    expires_at=now + ttl_seconds
+                ),
+                'ConditionExpression': 'attribute_not_exists(pk) OR expires_at < :now',
+                'ExpressionAttributeValues': {':now': now}
+            }
+        }
\ No newline at end of file
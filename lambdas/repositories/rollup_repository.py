@@ -0,0 +1,78 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+from boto3.dynamodb.conditions import Key
+from utils.aws_config import aws_config, get_index_table_name
+
+
+ROLLUP_PREFIX = 'ROLLUP#'
+ROLLUP_METRICS = ('created', 'completed')
+
+# Formato de la sort key por granularidad: ordena cronológicamente como string
+BUCKET_FORMATS = {
+    'hour': '%Y-%m-%dT%H',
+    'day': '%Y-%m-%d'
+}
+
+# Los buckets por hora expiran (TTL); los diarios se conservan
+HOURLY_RETENTION_SECONDS = 90 * 24 * 60 * 60
+
+
+class RollupRepository:
+    """Contadores de throughput por hora y por día en la tabla de índices
+    
+    - pk=ROLLUP#hour, sk=YYYY-MM-DDTHH
+    - pk=ROLLUP#day,  sk=YYYY-MM-DD
+    
+    Cada evento incrementa ambos buckets con ADD atómico, así que no hace
+    falta leer antes de escribir. Un rango de tiempo se lee con un solo Query.
+    """
+    
+    def __init__(self):
+        self.dynamodb = aws_config.get_dynamodb_resource()
+        self.table = self.dynamodb.Table(get_index_table_name())
+    
+    def increment(self, metric: str, at: datetime, count: int = 1) -> None:
+        """Sumar `count` al contador `metric` de los buckets que contienen `at`"""
+        if metric not in ROLLUP_METRICS:
+            raise ValueError(f"Métrica de rollup desconocida: {metric}")
+        
+        for granularity in BUCKET_FORMATS:
+            update_expression = 'ADD #metric :count'
+            values = {':count': count}
+            if granularity == 'hour':
+                update_expression += ' SET expires_at = if_not_exists(expires_at, :expires_at)'
+                values[':expires_at'] = int(time.time()) + HOURLY_RETENTION_SECONDS
+            
+            self.table.update_item(
+                Key={'pk': f'{ROLLUP_PREFIX}{granularity}', 'sk': bucket_key(at, granularity)},
+                UpdateExpression=update_expression,
+                ExpressionAttributeNames={'#metric': metric},
+                ExpressionAttributeValues=values
+            )
+    
+    def find_buckets(self, start: datetime, end: datetime, granularity: str) -> List[Dict[str, Any]]:
+        """Buckets existentes en [start, end] (Query paginado sobre una partición)"""
+        params = {
+            'KeyConditionExpression': Key('pk').eq(f'{ROLLUP_PREFIX}{granularity}') & Key('sk').between(
+                bucket_key(start, granularity), bucket_key(end, granularity)
+            )
+        }
+        
+        buckets = []
+        while True:
+            response = self.table.query(**params)
+            for item in response.get('Items', []):
+                buckets.append({
+                    'bucket': item['sk'],
+                    **{metric: int(item.get(metric, 0)) for metric in ROLLUP_METRICS}
+                })
+            
+            if 'LastEvaluatedKey' not in response:
+                return buckets
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def bucket_key(at: datetime, granularity: str) -> str:
+    """Sort key del bucket que contiene `at`"""
+    return at.strftime(BUCKET_FORMATS[granularity])
@@ -0,0 +1,179 @@
+import os
+from typing import Any, Dict, List, Optional
+from boto3.dynamodb.conditions import Key
+from utils.aws_config import aws_config, get_index_table_name
+from utils.cache import LRUCache
+from utils.text_search import term_frequencies
+
+
+TERMS_PREFIX = 'TERMS#'
+STATS_KEY = {'pk': 'SEARCH', 'sk': 'STATS'}
+
+# Los postings se agrupan por los dos primeros caracteres del término para
+# poder resolver búsquedas por prefijo con begins_with sobre la sort key
+TERM_SHARD_LENGTH = 2
+
+
+def document_text(item: Dict[str, Any]) -> str:
+    """Texto indexable de una tarea (título + descripción)"""
+    return ' '.join(filter(None, [item.get('title'), item.get('description')]))
+
+
+class SearchIndexRepository:
+    """Índice invertido de texto completo en la tabla de índices
+    
+    - pk=TERMS#<2 chars>, sk=<term>#<task_id>: posting con tf y largo del documento
+    - pk=SEARCH, sk=STATS: número de documentos y largo total (para BM25)
+    
+    Las consultas se cachean en un LRU con TTL en memoria del proceso para
+    reutilizarlas entre invocaciones de un Lambda caliente; cada prefijo
+    guarda los postings de un shard, así que el número de entradas se acota
+    con SEARCH_CACHE_MAX_ITEMS.
+    """
+    
+    # Compartido por todas las instancias del proceso
+    _cache = LRUCache(
+        max_size=int(os.getenv('SEARCH_CACHE_MAX_ITEMS', '256')),
+        ttl_seconds=float(os.getenv('SEARCH_CACHE_TTL_SECONDS', '30'))
+    )
+    
+    def __init__(self):
+        self.dynamodb = aws_config.get_dynamodb_resource()
+        self.table = self.dynamodb.Table(get_index_table_name())
+    
+    def update_document(self, task_id: str, old_text: str, new_text: str) -> None:
+        """Reindexar una tarea a partir de su texto anterior y nuevo"""
+        if old_text == new_text:
+            return
+        
+        old_terms = term_frequencies(old_text)
+        new_terms = term_frequencies(new_text)
+        new_len = sum(new_terms.values())
+        
+        with self.table.batch_writer() as batch:
+            for term in old_terms:
+                if term not in new_terms:
+                    batch.delete_item(Key=self._posting_key(term, task_id))
+            # El largo del documento cambia el puntaje de todos sus postings
+            for term, tf in new_terms.items():
+                batch.put_item(Item=dict(self._posting_key(term, task_id), task_id=task_id, tf=tf, doc_len=new_len))
+        
+        doc_delta = int(bool(new_terms)) - int(bool(old_terms))
+        self.table.update_item(
+            Key=STATS_KEY,
+            UpdateExpression='ADD doc_count :docs, total_length :length',
+            ExpressionAttributeValues={':docs': doc_delta, ':length': new_len - sum(old_terms.values())}
+        )
+        self._cache.clear()
+    
+    def find_postings(self, prefix: str) -> List[Dict[str, Any]]:
+        """Postings de todos los términos que empiezan por prefix"""
+        if len(prefix) < TERM_SHARD_LENGTH:
+            return []
+        
+        cached = self._cache_get(f'postings:{prefix}')
+        if cached is not None:
+            return cached
+        
+        params = {
+            'KeyConditionExpression': (
+                Key('pk').eq(f'{TERMS_PREFIX}{prefix[:TERM_SHARD_LENGTH]}') & Key('sk').begins_with(prefix)
+            )
+        }
+        
+        postings = []
+        while True:
+            response = self.table.query(**params)
+            for item in response.get('Items', []):
+                postings.append({
+                    'term': item['sk'].rsplit('#', 1)[0],
+                    'task_id': item['task_id'],
+                    'tf': int(item['tf']),
+                    'doc_len': int(item['doc_len'])
+                })
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        self._cache_set(f'postings:{prefix}', postings)
+        return postings
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Número de documentos indexados y largo total"""
+        cached = self._cache_get('stats')
+        if cached is not None:
+            return cached
+        
+        item = self.table.get_item(Key=STATS_KEY).get('Item') or {}
+        stats = {
+            'doc_count': int(item.get('doc_count', 0)),
+            'total_length': int(item.get('total_length', 0))
+        }
+        
+        self._cache_set('stats', stats)
+        return stats
+    
+    def _cache_get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+    
+    def _cache_set(self, key: str, value: Any) -> None:
+        # Un TTL de 0 desactiva el cache (LRUCache lo trataría como sin expiración)
+        if self._cache.ttl_seconds:
+            self._cache.set(key, value)
+    
+    @staticmethod
+    def _posting_key(term: str, task_id: str) -> Dict[str, str]:
+        return {'pk': f'{TERMS_PREFIX}{term[:TERM_SHARD_LENGTH]}', 'sk': f'{term}#{task_id}'}
+
+
+class InMemorySearchIndexRepository:
+    """Mismo índice en memoria del proceso, para modo local sin AWS"""
+    
+    _postings: Dict[str, Dict[str, Dict[str, int]]] = {}
+    _stats: Dict[str, int] = {'doc_count': 0, 'total_length': 0}
+    
+    def update_document(self, task_id: str, old_text: str, new_text: str) -> None:
+        """Reindexar una tarea a partir de su texto anterior y nuevo"""
+        if old_text == new_text:
+            return
+        
+        old_terms = term_frequencies(old_text)
+        new_terms = term_frequencies(new_text)
+        new_len = sum(new_terms.values())
+        
+        for term in old_terms:
+            self._postings.get(term, {}).pop(task_id, None)
+        for term, tf in new_terms.items():
+            self._postings.setdefault(term, {})[task_id] = {'tf': tf, 'doc_len': new_len}
+        
+        self._stats['doc_count'] += int(bool(new_terms)) - int(bool(old_terms))
+        self._stats['total_length'] += new_len - sum(old_terms.values())
+    
+    def find_postings(self, prefix: str) -> List[Dict[str, Any]]:
+        """Postings de todos los términos que empiezan por prefix"""
+        if len(prefix) < TERM_SHARD_LENGTH:
+            return []
+        
+        return [
+            dict(posting, term=term, task_id=task_id)
+            for term, postings in self._postings.items() if term.startswith(prefix)
+            for task_id, posting in postings.items()
+        ]
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Número de documentos indexados y largo total"""
+        return dict(self._stats)
+    
+    @classmethod
+    def reset(cls) -> None:
+        """Vaciar el índice (pruebas)"""
+        cls._postings.clear()
+        cls._stats.update(doc_count=0, total_length=0)
+
+
+def get_search_index_repository():
+    """Backend del índice según SEARCH_INDEX_BACKEND (dynamodb | memory)"""
+    if os.getenv('SEARCH_INDEX_BACKEND', 'dynamodb') == 'memory':
+        return InMemorySearchIndexRepository()
+    return SearchIndexRepository()
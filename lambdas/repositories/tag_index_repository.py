@@ -0,0 +1,207 @@
+import heapq
+from typing import List, Dict, Any, Iterable, Optional
+from boto3.dynamodb.conditions import Key
+from utils.aws_config import aws_config, get_index_table_name
+from utils.unit_of_work import current_unit_of_work
+
+
+TAG_PREFIX = 'TAG#'
+TAG_COUNTS_PK = 'TAGS'
+KEY_NAMES = ['pk', 'sk']
+
+
+class TagIndexRepository:
+    """Índice invertido de tags en la tabla de índices (pk/sk)
+    
+    - pk=TAG#<tag>, sk=<created_at>#<task_id>: una colección por tag,
+      ordenada por fecha de creación
+    - pk=TAGS, sk=<tag>: contador de tareas por tag (autocompletado)
+    """
+    
+    def __init__(self):
+        self.dynamodb = aws_config.get_dynamodb_resource()
+        self.table = self.dynamodb.Table(get_index_table_name())
+    
+    def add(self, task_id: str, created_at: str, tags: Iterable[str]) -> None:
+        """Indexar una tarea bajo cada tag"""
+        tags = list(tags)
+        if not tags:
+            return
+        
+        items = [{
+            'pk': f'{TAG_PREFIX}{tag}',
+            'sk': self._sort_key(created_at, task_id),
+            'task_id': task_id
+        } for tag in tags]
+        
+        # Dentro de una unidad de trabajo se envían junto al resto al final
+        uow = current_unit_of_work()
+        if uow is not None:
+            for item in items:
+                uow.queue_put(self.table, KEY_NAMES, item)
+        else:
+            with self.table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+        
+        self._add_to_counts(tags, 1)
+    
+    def remove(self, task_id: str, created_at: str, tags: Iterable[str]) -> None:
+        """Quitar una tarea de la colección de cada tag"""
+        tags = list(tags)
+        if not tags:
+            return
+        
+        keys = [{
+            'pk': f'{TAG_PREFIX}{tag}',
+            'sk': self._sort_key(created_at, task_id)
+        } for tag in tags]
+        
+        uow = current_unit_of_work()
+        if uow is not None:
+            for key in keys:
+                uow.queue_delete(self.table, KEY_NAMES, key)
+        else:
+            with self.table.batch_writer() as batch:
+                for key in keys:
+                    batch.delete_item(Key=key)
+        
+        self._add_to_counts(tags, -1)
+    
+    def index_existing(self, tasks: Iterable[Dict[str, Any]]) -> None:
+        """Escribir las entradas TAG# de tareas ya guardadas, sin tocar contadores
+        
+        Cada tarea es {'id', 'created_at', 'tags'}. Los puts son idempotentes:
+        se puede repetir sobre tareas ya indexadas.
+        """
+        with self.table.batch_writer(overwrite_by_pkeys=KEY_NAMES) as batch:
+            for task in tasks:
+                for tag in task.get('tags') or ():
+                    batch.put_item(Item={
+                        'pk': f'{TAG_PREFIX}{tag}',
+                        'sk': self._sort_key(task['created_at'], task['id']),
+                        'task_id': task['id']
+                    })
+    
+    def reset_counts(self, counts: Dict[str, int]) -> None:
+        """Fijar los contadores por tag (los que no están en counts quedan en 0)"""
+        stale = {entry['tag'] for entry in self.tag_counts(limit=None)} - set(counts)
+        for tag, count in list(counts.items()) + [(tag, 0) for tag in stale]:
+            self.table.update_item(
+                Key={'pk': TAG_COUNTS_PK, 'sk': tag},
+                UpdateExpression='SET task_count = :count',
+                ExpressionAttributeValues={':count': count}
+            )
+    
+    def find_task_ids(self, tags: List[str], match_all: bool = True, limit: Optional[int] = None) -> List[str]:
+        """IDs de tareas con todos (AND) o alguno (OR) de los tags, más recientes primero"""
+        if not tags:
+            return []
+        
+        # Con un solo tag el Limit se puede delegar a DynamoDB
+        if len(tags) == 1:
+            return [self._task_id(sk) for sk in self._query_sort_keys(tags[0], limit)]
+        
+        sorted_lists = [self._query_sort_keys(tag) for tag in tags]
+        if match_all:
+            sort_keys = _intersect_sorted(sorted_lists)
+        else:
+            sort_keys = _union_sorted(sorted_lists)
+        
+        task_ids = [self._task_id(sk) for sk in sort_keys]
+        return task_ids[:limit] if limit else task_ids
+    
+    def tag_counts(self, prefix: str = '', limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Tags con su número de tareas, filtrados por prefijo (autocompletado)"""
+        key_condition = Key('pk').eq(TAG_COUNTS_PK)
+        if prefix:
+            key_condition = key_condition & Key('sk').begins_with(prefix)
+        
+        params = {'KeyConditionExpression': key_condition}
+        counts = []
+        
+        while True:
+            response = self.table.query(**params)
+            for item in response.get('Items', []):
+                count = int(item.get('task_count', 0))
+                if count > 0:
+                    counts.append({'tag': item['sk'], 'count': count})
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        counts.sort(key=lambda x: (-x['count'], x['tag']))
+        return counts[:limit]
+    
+    def _query_sort_keys(self, tag: str, limit: Optional[int] = None) -> List[str]:
+        """Sort keys de la colección de un tag en orden descendente (Query paginado)"""
+        params = {
+            'KeyConditionExpression': Key('pk').eq(f'{TAG_PREFIX}{tag}'),
+            'ProjectionExpression': 'sk',
+            'ScanIndexForward': False
+        }
+        if limit:
+            params['Limit'] = limit
+        
+        sort_keys = []
+        while True:
+            response = self.table.query(**params)
+            sort_keys.extend(item['sk'] for item in response.get('Items', []))
+            
+            if 'LastEvaluatedKey' not in response or (limit and len(sort_keys) >= limit):
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        return sort_keys[:limit] if limit else sort_keys
+    
+    def _add_to_counts(self, tags: List[str], delta: int) -> None:
+        """Actualizar contadores por tag con ADD atómico"""
+        for tag in tags:
+            self.table.update_item(
+                Key={'pk': TAG_COUNTS_PK, 'sk': tag},
+                UpdateExpression='ADD task_count :delta',
+                ExpressionAttributeValues={':delta': delta}
+            )
+    
+    @staticmethod
+    def _sort_key(created_at: str, task_id: str) -> str:
+        return f'{created_at}#{task_id}'
+    
+    @staticmethod
+    def _task_id(sort_key: str) -> str:
+        return sort_key.rsplit('#', 1)[-1]
+
+
+def _intersect_sorted(sorted_lists: List[List[str]]) -> List[str]:
+    """Intersección de listas ordenadas descendentemente (merge de dos punteros)"""
+    # Empezar por la lista más corta acota el trabajo de cada paso
+    sorted_lists = sorted(sorted_lists, key=len)
+    result = sorted_lists[0]
+    
+    for other in sorted_lists[1:]:
+        merged = []
+        i = j = 0
+        while i < len(result) and j < len(other):
+            if result[i] == other[j]:
+                merged.append(result[i])
+                i += 1
+                j += 1
+            elif result[i] > other[j]:
+                i += 1
+            else:
+                j += 1
+        result = merged
+        if not result:
+            break
+    
+    return result
+
+
+def _union_sorted(sorted_lists: List[List[str]]) -> List[str]:
+    """Unión sin duplicados de listas ordenadas descendentemente"""
+    result = []
+    for sort_key in heapq.merge(*sorted_lists, reverse=True):
+        if not result or result[-1] != sort_key:
+            result.append(sort_key)
+    return result
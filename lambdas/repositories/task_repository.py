@@ -1,7 +1,68 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import heapq
+import os
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Iterator
+from datetime import datetime, timezone
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
 from models import Task, TaskStatus, TaskPriority
+from repositories.idempotency_repository import IdempotencyKeyInUseError
+from repositories.tag_index_repository import TagIndexRepository
+from repositories.search_index_repository import get_search_index_repository, document_text
 from utils.aws_config import aws_config, get_table_name
+from utils.instrumentation import bind_trace
+from utils.unit_of_work import current_unit_of_work, NOT_LOADED
+
+
+class VersionConflictError(Exception):
+    """La versión almacenada de la tarea no coincide con la esperada"""
+
+    def __init__(self, task_id: str, expected_version: int):
+        super().__init__(f"Conflicto de versión en tarea {task_id} (esperada {expected_version})")
+        self.task_id = task_id
+        self.expected_version = expected_version
+
+
+# GSI disperso: solo las tareas abiertas tienen due_shard, así el índice
+# contiene únicamente tareas pendientes con fecha de vencimiento. La clave
+# se reparte en varios shards para no concentrar escrituras en una partición.
+DUE_DATE_INDEX_NAME = 'due-date-index'
+DUE_DATE_INDEX_SHARDS = 4
+OPEN_STATUSES = (TaskStatus.PENDING.value, TaskStatus.IN_PROGRESS.value)
+
+# BatchGetItem acepta hasta 100 claves por llamada
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = 5
+
+
+def to_utc_iso(value: Any) -> Optional[str]:
+    """Fecha como ISO 8601 en UTC sin zona, el formato de las claves guardadas
+    
+    due_date es clave de orden del GSI: con offsets distintos el orden
+    lexicográfico no sería cronológico. Acepta datetime o string.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        # Sin offset después de los segundos ya está normalizada
+        tail = value[19:]
+        if not ('Z' in tail or '+' in tail or '-' in tail):
+            return value
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+# ValidationException de DynamoDB al aplicar ADD/DELETE de String Set sobre una List
+OPERAND_TYPE_MISMATCH = 'An operand in the update expression has an incorrect data type'
+
+
+class LegacyTagListError(Exception):
+    """La tarea guarda tags como List (formato antiguo) y no admite ADD/DELETE de String Set"""
 
 
 class TaskRepository:
@@ -10,16 +71,59 @@ class TaskRepository:
     def __init__(self):
         self.dynamodb = aws_config.get_dynamodb_resource()
         self.table = self.dynamodb.Table(get_table_name())
+        self.tag_index = TagIndexRepository()
+        self.search_index = get_search_index_repository()
     
-    def save(self, task: Task) -> None:
-        """Guardar tarea en DynamoDB"""
+    def save(self, task: Task, idempotency_put: Optional[Dict[str, Any]] = None) -> None:
+        """Guardar tarea en DynamoDB
+        
+        Con idempotency_put (ver IdempotencyRepository.transact_put) la tarea
+        y la clave se escriben en la misma transacción; si la clave ya
+        existe no se escribe nada y se lanza IdempotencyKeyInUseError.
+        """
         item = self._task_to_dynamodb_item(task)
-        # Remover campos None
-        item = {k: v for k, v in item.items() if v is not None}
-        self.table.put_item(Item=item)
+        # Remover campos None (DynamoDB tampoco admite String Sets vacíos)
+        item = {k: v for k, v in item.items() if v is not None and v != set()}
+        
+        if idempotency_put is None:
+            self.table.put_item(Item=item)
+        else:
+            client = self.dynamodb.meta.client
+            try:
+                client.transact_write_items(TransactItems=[
+                    {
+                        'Put': {
+                            'TableName': self.table.name,
+                            'Item': item,
+                            'ConditionExpression': 'attribute_not_exists(id)'
+                        }
+                    },
+                    idempotency_put
+                ])
+            except client.exceptions.TransactionCanceledException as e:
+                reasons = e.response.get('CancellationReasons', [])
+                if len(reasons) > 1 and reasons[1].get('Code') == 'ConditionalCheckFailed':
+                    raise IdempotencyKeyInUseError(str(e))
+                raise
+        
+        self._sync_indexes({}, item)
+        self._remember(task.id, task)
     
     def find_by_id(self, task_id: str) -> Optional[Task]:
-        """Buscar tarea por ID"""
+        """Buscar tarea por ID (una sola lectura por unidad de trabajo)"""
+        uow = current_unit_of_work()
+        if uow is not None:
+            task = uow.get(task_id)
+            if task is not NOT_LOADED:
+                return task
+        
+        task = self._fetch_by_id(task_id)
+        if uow is not None:
+            uow.register(task_id, task)
+        return task
+    
+    def _fetch_by_id(self, task_id: str) -> Optional[Task]:
+        """Leer la tarea de DynamoDB"""
         try:
             response = self.table.get_item(Key={'id': task_id})
             item = response.get('Item')
@@ -33,12 +137,81 @@ class TaskRepository:
             print(f"Error obteniendo tarea {task_id}: {str(e)}")
             return None
     
+    def find_by_ids(self, task_ids: List[str]) -> List[Task]:
+        """Buscar varias tareas por ID con BatchGetItem
+        
+        Retorna las tareas existentes en el orden de task_ids (sin repetidos).
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        uow = current_unit_of_work()
+        
+        found: Dict[str, Optional[Task]] = {}
+        pending = []
+        for task_id in task_ids:
+            task = uow.get(task_id) if uow is not None else NOT_LOADED
+            if task is NOT_LOADED:
+                pending.append(task_id)
+            else:
+                found[task_id] = task
+        
+        if pending:
+            fetched = self._fetch_by_ids(pending)
+            for task_id in pending:
+                found[task_id] = fetched.get(task_id)
+                if uow is not None:
+                    uow.register(task_id, found[task_id])
+        
+        return [found[task_id] for task_id in task_ids if found[task_id] is not None]
+    
+    def _fetch_by_ids(self, task_ids: List[str]) -> Dict[str, Task]:
+        """Leer tareas en bloques de 100 claves, enviados en paralelo"""
+        chunks = [task_ids[i:i + BATCH_GET_MAX_KEYS] for i in range(0, len(task_ids), BATCH_GET_MAX_KEYS)]
+        
+        if len(chunks) == 1:
+            items = self._batch_get_chunk(chunks[0])
+        else:
+            workers = min(len(chunks), int(os.getenv('DYNAMODB_BATCH_GET_CONCURRENCY', '4')))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                items = [item for chunk_items in executor.map(bind_trace(self._batch_get_chunk), chunks) for item in chunk_items]
+        
+        return {item['id']: self._dynamodb_item_to_task(item) for item in items}
+    
+    def _batch_get_chunk(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """BatchGetItem de un bloque, reintentando UnprocessedKeys con backoff"""
+        # El cliente (a diferencia del Table) es seguro entre hilos
+        client = self.dynamodb.meta.client
+        request = {self.table.name: {'Keys': [{'id': task_id} for task_id in task_ids]}}
+        items = []
+        
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            response = client.batch_get_item(RequestItems=request)
+            items.extend(response.get('Responses', {}).get(self.table.name, []))
+            
+            request = response.get('UnprocessedKeys')
+            if not request:
+                return items
+            time.sleep(min(0.05 * 2 ** attempt, 1.0))
+        
+        raise RuntimeError(f"BatchGetItem no procesó {len(request[self.table.name]['Keys'])} claves")
+    
     def find_all(self, 
                  status_filter: Optional[str] = None,
                  priority_filter: Optional[str] = None,
                  tag_filter: Optional[str] = None,
-                 limit: int = 50) -> List[Task]:
-        """Buscar tareas con filtros opcionales"""
+                 limit: int = 50,
+                 tag_match_all: bool = True) -> List[Task]:
+        """Buscar tareas con filtros opcionales
+        
+        tag_filter admite varios tags separados por coma (AND por defecto,
+        OR con tag_match_all=False) y se resuelve con el índice invertido.
+        """
+        
+        if tag_filter:
+            tags = [tag.strip() for tag in tag_filter.split(',') if tag.strip()]
+            try:
+                return self._find_by_tags(tags, tag_match_all, status_filter, priority_filter, limit)
+            except Exception as e:
+                print(f"Error consultando índice de tags, usando scan: {str(e)}")
         
         # Construir parámetros de scan
         scan_params = {'Limit': limit}
@@ -58,8 +231,12 @@ class TaskRepository:
             expression_attribute_values[':priority'] = priority_filter
         
         if tag_filter:
-            filter_expressions.append('contains(tags, :tag)')
-            expression_attribute_values[':tag'] = tag_filter
+            tag_expressions = []
+            for i, tag in enumerate(tag.strip() for tag in tag_filter.split(',') if tag.strip()):
+                tag_expressions.append(f'contains(tags, :tag{i})')
+                expression_attribute_values[f':tag{i}'] = tag
+            joiner = ' AND ' if tag_match_all else ' OR '
+            filter_expressions.append('(' + joiner.join(tag_expressions) + ')')
         
         # Agregar filtros a los parámetros si existen
         if filter_expressions:
@@ -88,11 +265,240 @@ class TaskRepository:
         
         return tasks
     
-    def update(self, task_id: str, updates: Dict[str, Any]) -> Optional[Task]:
-        """Actualizar tarea en DynamoDB"""
+    def _find_by_tags(self,
+                      tags: List[str],
+                      match_all: bool,
+                      status_filter: Optional[str],
+                      priority_filter: Optional[str],
+                      limit: int) -> List[Task]:
+        """Resolver filtros de tags con Query sobre el índice invertido"""
+        
+        # Con filtros adicionales no se sabe cuántos IDs hacen falta
+        has_filters = status_filter or priority_filter
+        task_ids = self.tag_index.find_task_ids(tags, match_all=match_all, limit=None if has_filters else limit)
+        
+        tasks = []
+        for start in range(0, len(task_ids), BATCH_GET_MAX_KEYS):
+            for task in self.find_by_ids(task_ids[start:start + BATCH_GET_MAX_KEYS]):
+                if status_filter and task.status.value != status_filter:
+                    continue
+                if priority_filter and task.priority.value != priority_filter:
+                    continue
+                
+                tasks.append(task)
+                if len(tasks) >= limit:
+                    return tasks
+        
+        return tasks
+    
+    def find_due_between(self,
+                         due_after: Optional[str] = None,
+                         due_before: Optional[str] = None,
+                         limit: int = 50) -> List[Task]:
+        """Tareas abiertas con due_date en [due_after, due_before), por vencimiento
+        
+        Query sobre el GSI disperso: el costo depende de las tareas que
+        coinciden, no del tamaño de la tabla.
+        """
+        
+        per_shard = [
+            self._query_due_shard(shard, due_after, due_before, limit)
+            for shard in self._due_shards()
+        ]
+        
+        tasks = []
+        for item in heapq.merge(*per_shard, key=lambda item: item['due_date']):
+            tasks.append(self._dynamodb_item_to_task(item))
+            if len(tasks) >= limit:
+                break
+        
+        return tasks
+    
+    def iter_due_between(self, due_after: Optional[str] = None, due_before: Optional[str] = None):
+        """Recorrer todas las tareas abiertas del rango, página a página (sin orden global)"""
+        for shard in self._due_shards():
+            params = self._due_query_params(shard, due_after, due_before)
+            while True:
+                response = self.table.query(**params)
+                for item in response.get('Items', []):
+                    yield self._dynamodb_item_to_task(item)
+                
+                if 'LastEvaluatedKey' not in response:
+                    break
+                params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def iter_scan_pages(self,
+                        attributes: List[str],
+                        segment: int = 0,
+                        total_segments: int = 1) -> Iterator[List[Dict[str, Any]]]:
+        """Recorrer un segmento de la tabla página a página, leyendo solo `attributes`
+        
+        Usa el cliente (seguro entre hilos) para poder escanear segmentos en paralelo.
+        """
+        client = self.dynamodb.meta.client
+        names = {f'#a{i}': attribute for i, attribute in enumerate(attributes)}
+        params = {
+            'TableName': self.table.name,
+            'ProjectionExpression': ', '.join(names),
+            'ExpressionAttributeNames': names
+        }
+        if total_segments > 1:
+            params['Segment'] = segment
+            params['TotalSegments'] = total_segments
+        
+        while True:
+            response = client.scan(**params)
+            yield response.get('Items', [])
+            
+            if 'LastEvaluatedKey' not in response:
+                return
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def count_due_between(self, due_after: Optional[str] = None, due_before: Optional[str] = None) -> int:
+        """Contar tareas abiertas con due_date en el rango (Select=COUNT, sin leer items)"""
+        total = 0
+        
+        for shard in self._due_shards():
+            params = self._due_query_params(shard, due_after, due_before)
+            params['Select'] = 'COUNT'
+            while True:
+                response = self.table.query(**params)
+                total += response.get('Count', 0)
+                
+                if 'LastEvaluatedKey' not in response:
+                    break
+                params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        return total
+    
+    def backfill_due_date_index(self) -> int:
+        """Preparar para el GSI las tareas escritas antes de él
+        
+        Agrega due_shard a las tareas abiertas y reescribe en UTC sin zona
+        los due_date guardados con offset. Retorna cuántas tareas cambió.
+        """
+        params = {
+            'ProjectionExpression': 'id, #status, due_shard, due_date',
+            'ExpressionAttributeNames': {'#status': 'status'}
+        }
+        updated = 0
+        
+        while True:
+            response = self.table.scan(**params)
+            for item in response.get('Items', []):
+                assignments, values = [], {}
+                if item.get('status') in OPEN_STATUSES and 'due_shard' not in item:
+                    assignments.append('due_shard = :due_shard')
+                    values[':due_shard'] = self._due_shard(item['id'])
+                if item.get('due_date') and to_utc_iso(item['due_date']) != item['due_date']:
+                    assignments.append('due_date = :due_date')
+                    values[':due_date'] = to_utc_iso(item['due_date'])
+                if assignments:
+                    self.table.update_item(
+                        Key={'id': item['id']},
+                        UpdateExpression='SET ' + ', '.join(assignments),
+                        ExpressionAttributeValues=values
+                    )
+                    updated += 1
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        return updated
+    
+    def backfill_tag_index(self) -> int:
+        """Indexar por tag las tareas escritas antes del índice invertido
+        
+        Reescribe las entradas TAG# de todas las tareas con tags y recalcula
+        los contadores desde la tabla, así que es idempotente. Conviene
+        correrlo sin escrituras en curso: un cambio de tags concurrente
+        puede dejar su contador desfasado hasta la próxima ejecución.
+        Retorna cuántas tareas con tags indexó.
+        """
+        params = {'ProjectionExpression': 'id, created_at, tags'}
+        counts: Counter = Counter()
+        indexed = 0
+        
+        while True:
+            response = self.table.scan(**params)
+            tasks = [item for item in response.get('Items', []) if item.get('tags')]
+            self.tag_index.index_existing(tasks)
+            for task in tasks:
+                counts.update(set(task['tags']))
+            indexed += len(tasks)
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        self.tag_index.reset_counts(dict(counts))
+        return indexed
+    
+    def _query_due_shard(self,
+                         shard: str,
+                         due_after: Optional[str],
+                         due_before: Optional[str],
+                         limit: int) -> List[Dict[str, Any]]:
+        """Items de un shard del GSI en orden ascendente de due_date"""
+        params = self._due_query_params(shard, due_after, due_before)
+        params['Limit'] = limit
+        
+        items = []
+        while True:
+            response = self.table.query(**params)
+            items.extend(response.get('Items', []))
+            
+            if 'LastEvaluatedKey' not in response or len(items) >= limit:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        return items[:limit]
+    
+    def _due_query_params(self, shard: str, due_after: Optional[str], due_before: Optional[str]) -> Dict[str, Any]:
+        """Parámetros de Query sobre el GSI de vencimientos para un shard"""
+        key_condition = Key('due_shard').eq(shard)
+        if due_after and due_before:
+            # between es inclusivo; el límite superior se excluye filtrando abajo
+            key_condition = key_condition & Key('due_date').between(due_after, due_before)
+        elif due_after:
+            key_condition = key_condition & Key('due_date').gte(due_after)
+        elif due_before:
+            key_condition = key_condition & Key('due_date').lt(due_before)
+        
+        params = {
+            'IndexName': DUE_DATE_INDEX_NAME,
+            'KeyConditionExpression': key_condition
+        }
+        if due_after and due_before:
+            params['FilterExpression'] = Attr('due_date').lt(due_before)
+        
+        return params
+    
+    @staticmethod
+    def _due_shards() -> List[str]:
+        return [f'OPEN#{n}' for n in range(DUE_DATE_INDEX_SHARDS)]
+    
+    @staticmethod
+    def _due_shard(task_id: str) -> str:
+        return f'OPEN#{zlib.crc32(task_id.encode()) % DUE_DATE_INDEX_SHARDS}'
+    
+    def update(self,
+               task_id: str,
+               updates: Dict[str, Any],
+               expected_version: Optional[int] = None,
+               return_previous: bool = False):
+        """Actualizar tarea en DynamoDB
+
+        Si se indica expected_version la escritura es condicional
+        (version = :expected_version) y lanza VersionConflictError si otro
+        cliente modificó la tarea antes. Con return_previous retorna la
+        tupla (anterior, actualizada), leída del mismo ALL_OLD.
+        """
         
         # Construir expresión de actualización
         update_expressions = []
+        remove_expressions = []
         expression_attribute_values = {}
         expression_attribute_names = {}
         
@@ -101,6 +507,11 @@ class TaskRepository:
         expression_attribute_names['#updated_at'] = 'updated_at'
         expression_attribute_values[':updated_at'] = datetime.utcnow().isoformat()
         
+        # Cada escritura incrementa la versión (items antiguos sin versión cuentan como 1)
+        update_expressions.append('#version = if_not_exists(#version, :one) + :one')
+        expression_attribute_names['#version'] = 'version'
+        expression_attribute_values[':one'] = 1
+        
         # Actualizar campos proporcionados
         for field, value in updates.items():
             if value is not None:
@@ -108,13 +519,26 @@ class TaskRepository:
                     update_expressions.append('#status = :status')
                     expression_attribute_names['#status'] = 'status'
                     expression_attribute_values[':status'] = value.value if hasattr(value, 'value') else value
+                    # Mantener el GSI disperso de vencimientos
+                    if expression_attribute_values[':status'] in OPEN_STATUSES:
+                        update_expressions.append('due_shard = :due_shard')
+                        expression_attribute_values[':due_shard'] = self._due_shard(task_id)
+                    else:
+                        remove_expressions.append('due_shard')
                 elif field == 'title':
                     update_expressions.append('#title = :title')
                     expression_attribute_names['#title'] = 'title'
                     expression_attribute_values[':title'] = value
                 elif field == 'due_date':
                     update_expressions.append('due_date = :due_date')
-                    expression_attribute_values[':due_date'] = value.isoformat() if hasattr(value, 'isoformat') else value
+                    expression_attribute_values[':due_date'] = to_utc_iso(value)
+                elif field == 'tags':
+                    # Los tags se guardan como String Set; un set vacío no es válido
+                    if value:
+                        update_expressions.append('tags = :tags')
+                        expression_attribute_values[':tags'] = set(value)
+                    else:
+                        remove_expressions.append('tags')
                 else:
                     update_expressions.append(f'{field} = :{field}')
                     if hasattr(value, 'value'):  # Enum
@@ -124,33 +548,189 @@ class TaskRepository:
         
         # Ejecutar actualización
         update_expression = 'SET ' + ', '.join(update_expressions)
+        if remove_expressions:
+            update_expression += ' REMOVE ' + ', '.join(remove_expressions)
+        
+        # ALL_OLD permite mantener el índice de tags sin una lectura extra;
+        # el estado nuevo se reconstruye aplicando los valores escritos
+        update_params = {
+            'Key': {'id': task_id},
+            'UpdateExpression': update_expression,
+            'ConditionExpression': 'attribute_exists(id)',
+            'ExpressionAttributeValues': expression_attribute_values,
+            'ExpressionAttributeNames': expression_attribute_names,
+            'ReturnValues': 'ALL_OLD'
+        }
+        
+        # Concurrencia optimista: solo escribir si la versión no cambió
+        if expected_version is not None:
+            expression_attribute_values[':expected_version'] = expected_version
+            version_condition = '#version = :expected_version'
+            if expected_version == 1:
+                version_condition = f'(attribute_not_exists(#version) OR {version_condition})'
+            update_params['ConditionExpression'] = f'attribute_exists(id) AND {version_condition}'
+        
+        try:
+            response = self.table.update_item(**update_params)
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            self._forget(task_id)
+            if expected_version is not None:
+                raise VersionConflictError(task_id, expected_version)
+            return (None, None) if return_previous else None
+        
+        # Reconstruir el item actualizado a partir del anterior
+        old_item = response['Attributes']
+        new_item = dict(old_item)
+        for placeholder, value in expression_attribute_values.items():
+            if placeholder not in (':one', ':expected_version'):
+                new_item[placeholder[1:]] = value
+        for attribute in remove_expressions:
+            new_item.pop(attribute, None)
+        new_item['version'] = int(old_item.get('version', 1)) + 1
         
-        response = self.table.update_item(
-            Key={'id': task_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_attribute_values,
-            ExpressionAttributeNames=expression_attribute_names,
-            ReturnValues='ALL_NEW'
-        )
+        self._sync_indexes(old_item, new_item)
         
         # Convertir respuesta a modelo Task
-        updated_item = response['Attributes']
-        return self._dynamodb_item_to_task(updated_item)
+        updated_task = self._remember(task_id, self._dynamodb_item_to_task(new_item))
+        if return_previous:
+            return self._dynamodb_item_to_task(old_item), updated_task
+        return updated_task
+    
+    def update_tags(self,
+                    task_id: str,
+                    add: Optional[List[str]] = None,
+                    remove: Optional[List[str]] = None) -> Optional[Task]:
+        """Agregar/quitar tags con ADD/DELETE sobre el String Set, sin lectura previa
+        
+        Retorna None si la tarea no existe. Lanza LegacyTagListError si la
+        tarea todavía guarda los tags como List.
+        """
+        task = None
+        
+        # DynamoDB no permite ADD y DELETE sobre el mismo atributo en una
+        # sola expresión: cada acción es una escritura atómica independiente
+        for action, tags in (('ADD', add), ('DELETE', remove)):
+            if not tags:
+                continue
+            task = self._apply_tag_action(task_id, action, tags)
+            if task is None:
+                return None
+        
+        return task if task is not None else self.find_by_id(task_id)
+    
+    def _apply_tag_action(self, task_id: str, action: str, tags: List[str]) -> Optional[Task]:
+        """Ejecutar ADD o DELETE sobre los tags de una tarea"""
+        updated_at = datetime.utcnow().isoformat()
+        try:
+            response = self.table.update_item(
+                Key={'id': task_id},
+                UpdateExpression=(
+                    f'{action} tags :tags '
+                    'SET #updated_at = :updated_at, #version = if_not_exists(#version, :one) + :one'
+                ),
+                ConditionExpression='attribute_exists(id)',
+                ExpressionAttributeNames={'#updated_at': 'updated_at', '#version': 'version'},
+                ExpressionAttributeValues={
+                    ':tags': set(tags),
+                    ':updated_at': updated_at,
+                    ':one': 1
+                },
+                ReturnValues='ALL_OLD'
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            self._remember(task_id, None)
+            return None
+        except ClientError as e:
+            # Solo el tipo del operando indica tags en formato List: cualquier
+            # otra ValidationException es un error de entrada y se propaga
+            error = e.response['Error']
+            if error['Code'] == 'ValidationException' and OPERAND_TYPE_MISMATCH in error.get('Message', ''):
+                raise LegacyTagListError(str(e))
+            raise
+        
+        # Aplicar el ADD/DELETE sobre el estado anterior (sin releer)
+        old_item = response['Attributes']
+        old_tags = set(old_item.get('tags') or [])
+        new_tags = old_tags | set(tags) if action == 'ADD' else old_tags - set(tags)
+        
+        new_item = dict(old_item, updated_at=updated_at, version=int(old_item.get('version', 1)) + 1)
+        if new_tags:
+            new_item['tags'] = new_tags
+        else:
+            new_item.pop('tags', None)
+        
+        self._sync_indexes(old_item, new_item)
+        return self._remember(task_id, self._dynamodb_item_to_task(new_item))
     
     def delete(self, task_id: str) -> None:
         """Eliminar tarea de DynamoDB"""
-        self.table.delete_item(Key={'id': task_id})
-    
-    def add_file_to_task(self, task_id: str, file_key: str) -> None:
-        """Agregar archivo a la lista de archivos de la tarea"""
-        self.table.update_item(
-            Key={'id': task_id},
-            UpdateExpression='SET files = list_append(if_not_exists(files, :empty_list), :new_file)',
-            ExpressionAttributeValues={
-                ':new_file': [file_key],
-                ':empty_list': []
-            }
-        )
+        response = self.table.delete_item(Key={'id': task_id}, ReturnValues='ALL_OLD')
+        
+        self._remember(task_id, None)
+        
+        old_item = response.get('Attributes')
+        if old_item:
+            self._sync_indexes(old_item, {})
+    
+    def add_file_to_task(self, task_id: str, file_key: str) -> Optional[Task]:
+        """Agregar archivo a la lista de archivos de la tarea
+        
+        Una sola escritura condicional que retorna la tarea actualizada,
+        o None si la tarea no existe.
+        """
+        try:
+            response = self.table.update_item(
+                Key={'id': task_id},
+                UpdateExpression=(
+                    'SET files = list_append(if_not_exists(files, :empty_list), :new_file), '
+                    '#updated_at = :updated_at, #version = if_not_exists(#version, :one) + :one'
+                ),
+                ConditionExpression='attribute_exists(id)',
+                ExpressionAttributeNames={'#updated_at': 'updated_at', '#version': 'version'},
+                ExpressionAttributeValues={
+                    ':new_file': [file_key],
+                    ':empty_list': [],
+                    ':updated_at': datetime.utcnow().isoformat(),
+                    ':one': 1
+                },
+                ReturnValues='ALL_NEW'
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return self._remember(task_id, None)
+        
+        return self._remember(task_id, self._dynamodb_item_to_task(response['Attributes']))
+    
+    def _remember(self, task_id: str, task: Optional[Task]) -> Optional[Task]:
+        """Registrar el estado tras una escritura en la unidad de trabajo"""
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.register(task_id, task)
+        return task
+    
+    def _forget(self, task_id: str) -> None:
+        """Descartar el estado conocido (p. ej. tras un conflicto de versión)"""
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.evict(task_id)
+    
+    def _sync_indexes(self, old_item: Dict[str, Any], new_item: Dict[str, Any]) -> None:
+        """Mantener los índices invertidos (tags y texto) con el diff entre dos estados"""
+        item = new_item or old_item
+        
+        # No falla la escritura de la tarea si hay problemas con los índices
+        old_tags = set(old_item.get('tags') or [])
+        new_tags = set(new_item.get('tags') or [])
+        if old_tags != new_tags:
+            try:
+                self.tag_index.add(item['id'], item['created_at'], sorted(new_tags - old_tags))
+                self.tag_index.remove(item['id'], item['created_at'], sorted(old_tags - new_tags))
+            except Exception as e:
+                print(f"Error actualizando índice de tags de {item['id']}: {str(e)}")
+        
+        try:
+            self.search_index.update_document(item['id'], document_text(old_item), document_text(new_item))
+        except Exception as e:
+            print(f"Error actualizando índice de búsqueda de {item['id']}: {str(e)}")
     
     def _task_to_dynamodb_item(self, task: Task) -> Dict[str, Any]:
         """Convertir modelo Task a item de DynamoDB"""
@@ -160,11 +740,13 @@ class TaskRepository:
             'description': task.description,
             'status': task.status.value,
             'priority': task.priority.value,
-            'due_date': task.due_date.isoformat() if task.due_date else None,
-            'tags': task.tags,
+            'due_date': to_utc_iso(task.due_date),
+            'tags': set(task.tags),
             'created_at': task.created_at.isoformat(),
             'updated_at': task.updated_at.isoformat(),
-            'files': task.files
+            'files': task.files,
+            'version': task.version,
+            'due_shard': self._due_shard(task.id) if task.status.value in OPEN_STATUSES else None
         }
     
     def _dynamodb_item_to_task(self, item: Dict[str, Any]) -> Task:
@@ -175,7 +757,8 @@ class TaskRepository:
             """Parsear fecha ISO compatible con Python 3.6"""
             if not date_str:
                 return None
-            # Eliminar timezone info si está presente para simplificar
+            # Offsets de items anteriores a la normalización → UTC
+            date_str = to_utc_iso(date_str)
             if date_str.endswith('+00:00'):
                 date_str = date_str[:-6]
             elif 'T' in date_str and '+' in date_str:
@@ -205,8 +788,9 @@ class TaskRepository:
             status=TaskStatus(item['status']),
             priority=TaskPriority(item['priority']),
             due_date=due_date,
-            tags=item.get('tags', []),
+            tags=sorted(item['tags']) if isinstance(item.get('tags'), set) else item.get('tags', []),
             created_at=created_at,
             updated_at=updated_at,
-            files=item.get('files', [])
+            files=item.get('files', []),
+            version=int(item.get('version', 1))
         )
\ No newline at end of file
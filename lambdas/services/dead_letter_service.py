@@ -0,0 +1,213 @@
+import json
+import os
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from utils.aws_config import aws_config
+from utils.message_codec import decode_message
+from utils.queue_topology import DLQ_SUFFIX
+
+
+# Recepciones a partir de las cuales un mensaje que vuelve a fallar es
+# venenoso (debe ser menor que MAX_RECEIVE_COUNT de la redrive policy)
+DEFAULT_POISON_RECEIVE_COUNT = 3
+
+# Atributos que la cuarentena agrega al mensaje (SQS admite 10 por mensaje)
+ERROR_ATTRIBUTE = 'QuarantineError'
+CONTEXT_ATTRIBUTE = 'QuarantineContext'
+MAX_ERROR_LENGTH = 1000
+
+# Límite de SQS para receive/send/delete por lotes
+MAX_BATCH_SIZE = 10
+
+
+def receive_count(record: Dict[str, Any]) -> int:
+    """ApproximateReceiveCount de un record del evento SQS de Lambda"""
+    return int(record.get('attributes', {}).get('ApproximateReceiveCount', 1))
+
+
+class DeadLetterService:
+    """Cuarentena de mensajes venenosos y redrive desde las DLQ
+    
+    Un mensaje que falla y ya se recibió POISON_RECEIVE_COUNT veces se
+    copia a la DLQ de su cola con el error y el contexto como atributos,
+    y el procesador lo da por consumido: deja de reintentarse y de
+    ocupar lugar en los lotes. Lo que no alcanza a ponerse en cuarentena
+    (timeouts, caídas) lo mueve la redrive policy sin contexto.
+    """
+    
+    # DLQ por ARN de la cola de origen, reutilizado entre invocaciones
+    _dlq_urls: Dict[str, str] = {}
+    
+    def __init__(self, sqs=None):
+        self.sqs = sqs or aws_config.get_sqs_client()
+        self.poison_receive_count = int(os.getenv('POISON_RECEIVE_COUNT', str(DEFAULT_POISON_RECEIVE_COUNT)))
+    
+    def is_poison(self, record: Dict[str, Any]) -> bool:
+        """True si el mensaje ya agotó sus reintentos útiles"""
+        return receive_count(record) >= self.poison_receive_count
+    
+    def quarantine(self, record: Dict[str, Any], error: str) -> str:
+        """Copiar un record a la DLQ de su cola con el contexto del error"""
+        source_arn = record.get('eventSourceARN', '')
+        dlq_url = self.dlq_url_for(source_arn)
+        
+        context = {
+            'source_queue': source_arn.rsplit(':', 1)[-1],
+            'message_id': record.get('messageId'),
+            'receive_count': receive_count(record),
+            'first_received_at': record.get('attributes', {}).get('ApproximateFirstReceiveTimestamp'),
+            'quarantined_at': datetime.utcnow().isoformat()
+        }
+        attributes = lambda_to_sqs_attributes(record.get('messageAttributes', {}))
+        attributes[ERROR_ATTRIBUTE] = {'DataType': 'String', 'StringValue': (error or 'unknown')[:MAX_ERROR_LENGTH]}
+        attributes[CONTEXT_ATTRIBUTE] = {'DataType': 'String', 'StringValue': json.dumps(context, default=str)}
+        
+        self.sqs.send_message(QueueUrl=dlq_url, MessageBody=record.get('body', ''), MessageAttributes=attributes)
+        print(f"Mensaje {record.get('messageId')} en cuarentena: {dlq_url}")
+        return dlq_url
+    
+    def dlq_url_for(self, source_arn: str) -> str:
+        """URL de la DLQ (<cola>-dlq) de la cola con ese ARN"""
+        if source_arn not in self._dlq_urls:
+            parts = source_arn.split(':')
+            if len(parts) != 6:
+                raise ValueError(f"eventSourceARN inválido: {source_arn!r}")
+            self._dlq_urls[source_arn] = self.sqs.get_queue_url(
+                QueueName=parts[5] + DLQ_SUFFIX,
+                QueueOwnerAWSAccountId=parts[4]
+            )['QueueUrl']
+        return self._dlq_urls[source_arn]
+    
+    def source_url_for(self, dlq_url: str) -> str:
+        """URL de la cola de origen de una DLQ"""
+        dlq_name = dlq_url.rsplit('/', 1)[-1]
+        if not dlq_name.endswith(DLQ_SUFFIX):
+            raise ValueError(f"{dlq_name} no es una DLQ (sufijo {DLQ_SUFFIX})")
+        return self.sqs.get_queue_url(QueueName=dlq_name[:-len(DLQ_SUFFIX)])['QueueUrl']
+    
+    def inspect(self, dlq_url: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Leer hasta `limit` mensajes de la DLQ sin consumirlos
+        
+        Los mensajes quedan invisibles mientras se leen y al final se
+        devuelven a la cola (visibilidad 0).
+        """
+        messages = self._receive(dlq_url, limit)
+        self._release(dlq_url, messages)
+        return [describe_message(message) for message in messages]
+    
+    def redrive(self, dlq_url: str, target_url: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, int]:
+        """Devolver mensajes de la DLQ a su cola (o a target_url) por lotes de 10
+        
+        Se quitan los atributos de cuarentena; un mensaje solo se borra de
+        la DLQ si el envío a la cola destino fue exitoso.
+        """
+        target_url = target_url or self.source_url_for(dlq_url)
+        moved = failed = 0
+        
+        while limit is None or moved + failed < limit:
+            size = MAX_BATCH_SIZE if limit is None else min(MAX_BATCH_SIZE, limit - moved - failed)
+            messages = self.sqs.receive_message(
+                QueueUrl=dlq_url,
+                MaxNumberOfMessages=size,
+                MessageAttributeNames=['All'],
+                VisibilityTimeout=60,
+                WaitTimeSeconds=0
+            ).get('Messages', [])
+            if not messages:
+                break
+            
+            entries = []
+            for i, message in enumerate(messages):
+                entry = {'Id': str(i), 'MessageBody': message['Body']}
+                attributes = {
+                    name: value for name, value in message.get('MessageAttributes', {}).items()
+                    if name not in (ERROR_ATTRIBUTE, CONTEXT_ATTRIBUTE)
+                }
+                if attributes:
+                    entry['MessageAttributes'] = attributes
+                entries.append(entry)
+            
+            response = self.sqs.send_message_batch(QueueUrl=target_url, Entries=entries)
+            sent_ids = {success['Id'] for success in response.get('Successful', [])}
+            
+            if sent_ids:
+                self.sqs.delete_message_batch(QueueUrl=dlq_url, Entries=[
+                    {'Id': str(i), 'ReceiptHandle': message['ReceiptHandle']}
+                    for i, message in enumerate(messages) if str(i) in sent_ids
+                ])
+            unsent = [message for i, message in enumerate(messages) if str(i) not in sent_ids]
+            self._release(dlq_url, unsent)
+            
+            moved += len(sent_ids)
+            failed += len(unsent)
+            if unsent:
+                # No insistir en la misma página si el destino rechaza mensajes
+                break
+        
+        print(f"Redrive {dlq_url} -> {target_url}: {moved} movidos, {failed} fallidos")
+        return {'moved': moved, 'failed': failed}
+    
+    def _receive(self, queue_url: str, limit: int) -> List[Dict[str, Any]]:
+        messages: Dict[str, Dict[str, Any]] = {}
+        while len(messages) < limit:
+            page = self.sqs.receive_message(
+                QueueUrl=queue_url,
+                MaxNumberOfMessages=min(MAX_BATCH_SIZE, limit - len(messages)),
+                AttributeNames=['All'],
+                MessageAttributeNames=['All'],
+                VisibilityTimeout=30,
+                WaitTimeSeconds=0
+            ).get('Messages', [])
+            if not page:
+                break
+            for message in page:
+                messages.setdefault(message['MessageId'], message)
+        return list(messages.values())
+    
+    def _release(self, queue_url: str, messages: List[Dict[str, Any]]) -> None:
+        for i in range(0, len(messages), MAX_BATCH_SIZE):
+            self.sqs.change_message_visibility_batch(QueueUrl=queue_url, Entries=[
+                {'Id': str(j), 'ReceiptHandle': message['ReceiptHandle'], 'VisibilityTimeout': 0}
+                for j, message in enumerate(messages[i:i + MAX_BATCH_SIZE])
+            ])
+
+
+def describe_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumen de un mensaje de DLQ: acción, error y contexto de la cuarentena"""
+    attributes = message.get('MessageAttributes', {})
+    error = attributes.get(ERROR_ATTRIBUTE, {}).get('StringValue')
+    context = json.loads(attributes[CONTEXT_ATTRIBUTE]['StringValue']) if CONTEXT_ATTRIBUTE in attributes else {}
+    
+    # Con un sobre del codec se leen solo los headers (sin bajar de S3)
+    try:
+        body = decode_message(message['Body'])
+    except ValueError:
+        body = None
+    if isinstance(body, Mapping):
+        action = body.get('action') or body.get('type') or ('sns' if body.get('Type') == 'Notification' else 'unknown')
+    else:
+        action = 'invalid_json'
+    
+    return {
+        'message_id': message['MessageId'],
+        'action': action,
+        'task_id': body.get('task_id') if isinstance(body, Mapping) else None,
+        # Sin atributos de cuarentena lo movió la redrive policy
+        'quarantined': error is not None,
+        'error': error,
+        'context': context,
+        'receive_count': int(message.get('Attributes', {}).get('ApproximateReceiveCount', 0)),
+        'body': message['Body'][:200]
+    }
+
+
+def lambda_to_sqs_attributes(attributes: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """messageAttributes del evento de Lambda -> formato de send_message"""
+    converted = {}
+    for name, value in attributes.items():
+        data_type = value.get('dataType', 'String')
+        if data_type.startswith('Binary'):
+            continue
+        converted[name] = {'DataType': data_type, 'StringValue': value.get('stringValue', '')}
+    return converted
@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from repositories.idempotency_repository import (
+    CLAIMED, COMPLETED, DEFAULT_LEASE_SECONDS, DEFAULT_TTL_SECONDS, IdempotencyRepository
+)
+from utils.cache import LRUCache
+from utils.instrumentation import bind_trace
+
+
+class IdempotencyService:
+    """Deduplicación de efectos secundarios (SQS es at-least-once)
+    
+    Dos niveles:
+    - LRU en memoria del proceso con las claves ya completadas: reentregas
+      al mismo contenedor caliente se descartan sin ir a DynamoDB
+    - put condicional en DynamoDB: fuente de verdad entre contenedores
+    
+    Una clave se reserva in_progress con un lease corto y pasa a completed
+    (TTL largo) solo después del efecto. Si el contenedor muere a mitad del
+    batch, el lease caduca y la reentrega se procesa en lugar de perderse.
+    Las claves de un batch se reservan en paralelo y se completan con un
+    BatchWriteItem por cada 25: el caso común (sin duplicados) añade una
+    sola llamada por batch al claim de cada mensaje.
+    """
+    
+    # Compartido entre invocaciones del mismo contenedor
+    _recent_keys = LRUCache(max_size=int(os.getenv('IDEMPOTENCY_LRU_SIZE', '10000')))
+    
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS, lease_seconds: int = DEFAULT_LEASE_SECONDS):
+        self.repository = IdempotencyRepository()
+        self.ttl_seconds = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', str(ttl_seconds)))
+        self.lease_seconds = int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', str(lease_seconds)))
+        self.reset_stats()
+    
+    def claim_many(self, keys: List[str]) -> List[str]:
+        """Reservar varias claves; por posición, CLAIMED, COMPLETED o IN_PROGRESS
+        
+        Solo CLAIMED ejecuta el efecto. Una clave repetida dentro del batch
+        es COMPLETED: la ejecuta (o la reintenta) su primera aparición.
+        """
+        results = [COMPLETED] * len(keys)
+        remote_positions: Dict[str, int] = {}
+        
+        for position, key in enumerate(keys):
+            if key in remote_positions or key in self._recent_keys:
+                self.stats['local_hits'] += 1
+            else:
+                remote_positions[key] = position
+        
+        if remote_positions:
+            remote_keys = list(remote_positions)
+            with ThreadPoolExecutor(max_workers=min(len(remote_keys), 10)) as executor:
+                states = list(executor.map(bind_trace(self._claim_remote), remote_keys))
+            
+            for key, state in zip(remote_keys, states):
+                results[remote_positions[key]] = state
+                if state == COMPLETED:
+                    self._recent_keys.set(key, True)
+                    self.stats['remote_hits'] += 1
+                else:
+                    self.stats['claimed' if state == CLAIMED else 'in_progress'] += 1
+        
+        return results
+    
+    def claim(self, key: str) -> str:
+        """Reservar una clave; CLAIMED si es nueva"""
+        return self.claim_many([key])[0]
+    
+    def complete_many(self, keys: List[str]) -> None:
+        """Marcar como completadas las claves cuyo efecto terminó
+        
+        Si falla, la clave queda in_progress hasta que caduca el lease: una
+        reentrega posterior repite el efecto (at-least-once), no lo pierde.
+        """
+        for key in keys:
+            self._recent_keys.set(key, True)
+        if not keys:
+            return
+        try:
+            self.repository.complete_many(list(dict.fromkeys(keys)), ttl_seconds=self.ttl_seconds)
+        except Exception as e:
+            print(f"Error completando claves de idempotencia: {str(e)}")
+    
+    def release(self, key: str) -> None:
+        """Liberar una clave cuyo efecto falló, para que la reentrega lo reintente"""
+        self._recent_keys.delete(key)
+        try:
+            self.repository.release(key)
+        except Exception as e:
+            print(f"Error liberando clave de idempotencia {key}: {str(e)}")
+    
+    def reset_stats(self) -> None:
+        """Reiniciar contadores (uno por batch)"""
+        self.stats = {'local_hits': 0, 'remote_hits': 0, 'claimed': 0, 'in_progress': 0}
+    
+    def _claim_remote(self, key: str) -> str:
+        try:
+            return self.repository.claim(key, lease_seconds=self.lease_seconds)
+        except Exception as e:
+            # Sin store disponible se procesa igual: at-least-once como antes
+            print(f"Error reservando clave de idempotencia {key}: {str(e)}")
+            return CLAIMED
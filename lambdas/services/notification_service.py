@@ -1,10 +1,23 @@
-import json
+from typing import Any, Dict, List
 from models import Task
 from utils.aws_config import aws_config, get_topic_arn
+from utils.message_codec import encode_message
+from utils.notification_attributes import (
+    TASK_CREATED, TASK_DELETED, TASK_REMINDER, TASK_UPDATED, message_attributes
+)
+
+
+# Máximo de entradas por llamada a publish_batch
+MAX_PUBLISH_BATCH_SIZE = 10
 
 
 class NotificationService:
-    """Servicio para envío de notificaciones"""
+    """Servicio para envío de notificaciones
+    
+    Cada publicación lleva MessageAttributes (event_type, priority, status)
+    para que las filter policies de las suscripciones descarten en SNS lo
+    que el suscriptor no necesita (ver utils/notification_attributes.py).
+    """
     
     def __init__(self):
         self.sns = aws_config.get_sns_client()
@@ -19,6 +32,7 @@ class NotificationService:
         
         try:
             message = {
+                'notification_type': TASK_CREATED,
                 'task_id': task.id,
                 'title': task.title,
                 'status': task.status.value,
@@ -28,8 +42,9 @@ class NotificationService:
             
             self.sns.publish(
                 TopicArn=self.topic_arn,
-                Message=json.dumps(message),
-                Subject=f'Nueva tarea creada: {task.title}'
+                Message=encode_message(message),
+                Subject=f'Nueva tarea creada: {task.title}',
+                MessageAttributes=message_attributes(TASK_CREATED, task.priority.value, task.status.value)
             )
             
             print(f"Notificación SNS enviada para tarea {task.id}")
@@ -47,6 +62,7 @@ class NotificationService:
         
         try:
             message = {
+                'notification_type': TASK_UPDATED,
                 'task_id': task.id,
                 'title': task.title,
                 'old_status': old_status,
@@ -57,8 +73,9 @@ class NotificationService:
             
             self.sns.publish(
                 TopicArn=self.topic_arn,
-                Message=json.dumps(message),
-                Subject=f'Tarea actualizada: {task.title}'
+                Message=encode_message(message),
+                Subject=f'Tarea actualizada: {task.title}',
+                MessageAttributes=message_attributes(TASK_UPDATED, task.priority.value, task.status.value)
             )
             
             print(f"Notificación de actualización SNS enviada para tarea {task.id}")
@@ -76,6 +93,7 @@ class NotificationService:
         
         try:
             message = {
+                'notification_type': TASK_DELETED,
                 'task_id': task.id,
                 'title': task.title,
                 'status': task.status.value,
@@ -84,12 +102,52 @@ class NotificationService:
             
             self.sns.publish(
                 TopicArn=self.topic_arn,
-                Message=json.dumps(message),
-                Subject=f'Tarea eliminada: {task.title}'
+                Message=encode_message(message),
+                Subject=f'Tarea eliminada: {task.title}',
+                MessageAttributes=message_attributes(TASK_DELETED, task.priority.value, task.status.value)
             )
             
             print(f"Notificación de eliminación SNS enviada para tarea {task.id}")
             
         except Exception as e:
             print(f"Error enviando notificación de eliminación SNS: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def send_task_reminders(self, reminders: List[Dict[str, Any]]) -> List[str]:
+        """Publicar recordatorios en lotes de 10 (publish_batch)
+        
+        Retorna los task_id cuyos recordatorios no se pudieron publicar.
+        """
+        
+        if not self.topic_arn:
+            print("No se configuró SNS topic ARN")
+            return []
+        
+        failed_task_ids = []
+        for start in range(0, len(reminders), MAX_PUBLISH_BATCH_SIZE):
+            batch = reminders[start:start + MAX_PUBLISH_BATCH_SIZE]
+            entries = [
+                {
+                    'Id': str(i),
+                    'Message': encode_message({
+                        'notification_type': TASK_REMINDER,
+                        'task_id': reminder['task_id'],
+                        'title': reminder.get('title'),
+                        'priority': reminder.get('priority'),
+                        'due_date': reminder.get('due_date')
+                    }),
+                    'Subject': f"Recordatorio: {reminder.get('title') or reminder['task_id']}"[:100],
+                    'MessageAttributes': message_attributes(TASK_REMINDER, reminder.get('priority'))
+                }
+                for i, reminder in enumerate(batch)
+            ]
+            
+            try:
+                response = self.sns.publish_batch(TopicArn=self.topic_arn, PublishBatchRequestEntries=entries)
+                failed_task_ids.extend(batch[int(failure['Id'])]['task_id'] for failure in response.get('Failed', []))
+            except Exception as e:
+                print(f"Error publicando lote de recordatorios SNS: {str(e)}")
+                failed_task_ids.extend(reminder['task_id'] for reminder in batch)
+        
+        print(f"Recordatorios SNS enviados: {len(reminders) - len(failed_task_ids)}/{len(reminders)}")
+        return failed_task_ids
\ No newline at end of file
@@ -1,19 +1,41 @@
-import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 from models import Task
 from utils.aws_config import aws_config, get_queue_url
+from utils.instrumentation import bind_trace
+from utils.message_codec import encode_message
+from utils.queue_topology import QUEUE_TOPOLOGY, queue_class_for
+
+
+# Límites de SQS
+MAX_BATCH_SIZE = 10
+MAX_DELAY_SECONDS = 900
 
 
 class QueueService:
-    """Servicio para manejo de colas SQS"""
+    """Servicio para manejo de colas SQS
+    
+    Cada mensaje va a la cola de su prioridad o, si es trabajo masivo
+    (reportes, limpieza), a la cola bulk (ver utils/queue_topology.py).
+    Así las tareas críticas no esperan detrás de un backlog de reportes.
+    """
     
     def __init__(self):
         self.sqs = aws_config.get_sqs_client()
         self.queue_url = get_queue_url()
+        self.queue_urls = {queue_class: get_queue_url(queue_class) for queue_class in QUEUE_TOPOLOGY}
+    
+    def queue_url_for(self, action: str, priority: Optional[str] = None) -> str:
+        """URL de la cola que corresponde a la acción y la prioridad"""
+        return self.queue_urls[queue_class_for(action, priority)]
     
     def enqueue_task_processing(self, task: Task) -> None:
         """Encolar tarea para procesamiento en background"""
         
-        if not self.queue_url:
+        queue_url = self.queue_url_for('process_new_task', task.priority.value)
+        if not queue_url:
             print("No se configuró SQS queue URL")
             return
         
@@ -25,8 +47,8 @@ class QueueService:
             }
             
             self.sqs.send_message(
-                QueueUrl=self.queue_url,
-                MessageBody=json.dumps(message, default=str)
+                QueueUrl=queue_url,
+                MessageBody=encode_message(message)
             )
             
             print(f"Mensaje enviado a SQS para tarea {task.id}")
@@ -35,22 +57,29 @@ class QueueService:
             print(f"Error enviando mensaje a SQS: {str(e)}")
             raise
     
-    def enqueue_task_reminder(self, task_id: str) -> None:
+    def enqueue_task_reminder(self,
+                              task_id: str,
+                              delay_seconds: int = 0,
+                              idempotency_key: Optional[str] = None,
+                              priority: Optional[str] = None) -> None:
         """Encolar recordatorio de tarea"""
         
-        if not self.queue_url:
+        queue_url = self.queue_url_for('send_reminder', priority)
+        if not queue_url:
             print("No se configuró SQS queue URL")
             return
         
         try:
             message = {
                 'action': 'send_reminder',
-                'task_id': task_id
+                'task_id': task_id,
+                'idempotency_key': idempotency_key or f'reminder#{task_id}'
             }
             
             self.sqs.send_message(
-                QueueUrl=self.queue_url,
-                MessageBody=json.dumps(message, default=str)
+                QueueUrl=queue_url,
+                MessageBody=encode_message(message),
+                DelaySeconds=max(0, min(int(delay_seconds), MAX_DELAY_SECONDS))
             )
             
             print(f"Recordatorio encolado para tarea {task_id}")
@@ -59,10 +88,63 @@ class QueueService:
             print(f"Error encolando recordatorio: {str(e)}")
             raise
     
+    def enqueue_task_reminders(self, reminders: List[Dict[str, Any]]) -> int:
+        """Encolar recordatorios en lotes de 10 (send_message_batch) en paralelo
+        
+        Cada recordatorio es el cuerpo del mensaje más 'delay_seconds'; su
+        'priority' decide la cola. Retorna cuántos mensajes se encolaron.
+        """
+        
+        by_queue = defaultdict(list)
+        for reminder in reminders:
+            by_queue[self.queue_url_for('send_reminder', reminder.get('priority'))].append(reminder)
+        
+        if not all(by_queue):
+            print("No se configuró SQS queue URL")
+            return 0
+        
+        # Los lotes de send_message_batch son por cola
+        queue_urls, batches = [], []
+        for queue_url, queued in by_queue.items():
+            for i in range(0, len(queued), MAX_BATCH_SIZE):
+                queue_urls.append(queue_url)
+                batches.append(queued[i:i + MAX_BATCH_SIZE])
+        concurrency = int(os.getenv('SQS_SEND_CONCURRENCY', '8'))
+        
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            sent = sum(executor.map(bind_trace(self._send_reminder_batch), queue_urls, batches))
+        
+        print(f"{sent}/{len(reminders)} recordatorios encolados")
+        return sent
+    
+    def _send_reminder_batch(self, queue_url: str, reminders: List[Dict[str, Any]]) -> int:
+        """Enviar un lote de hasta 10 recordatorios, reintentando una vez los fallidos"""
+        entries = []
+        for i, reminder in enumerate(reminders):
+            body = {key: value for key, value in reminder.items() if key != 'delay_seconds'}
+            body['action'] = 'send_reminder'
+            entries.append({
+                'Id': str(i),
+                'MessageBody': encode_message(body),
+                'DelaySeconds': max(0, min(int(reminder.get('delay_seconds', 0)), MAX_DELAY_SECONDS))
+            })
+        
+        for attempt in range(2):
+            response = self.sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+            failed_ids = {failure['Id'] for failure in response.get('Failed', [])}
+            if not failed_ids:
+                break
+            entries = [entry for entry in entries if entry['Id'] in failed_ids]
+        
+        if failed_ids:
+            print(f"Error encolando {len(failed_ids)} recordatorios: {sorted(failed_ids)}")
+        return len(reminders) - len(failed_ids)
+    
     def enqueue_cleanup_tasks(self, days_old: int = 30) -> None:
         """Encolar limpieza de tareas completadas"""
         
-        if not self.queue_url:
+        queue_url = self.queue_url_for('cleanup_completed_tasks')
+        if not queue_url:
             print("No se configuró SQS queue URL")
             return
         
@@ -73,8 +155,8 @@ class QueueService:
             }
             
             self.sqs.send_message(
-                QueueUrl=self.queue_url,
-                MessageBody=json.dumps(message, default=str)
+                QueueUrl=queue_url,
+                MessageBody=encode_message(message)
             )
             
             print(f"Limpieza de tareas encolada (>{days_old} días)")
@@ -86,7 +168,8 @@ class QueueService:
     def enqueue_generate_report(self, report_type: str = 'summary') -> None:
         """Encolar generación de reporte"""
         
-        if not self.queue_url:
+        queue_url = self.queue_url_for('generate_task_report')
+        if not queue_url:
             print("No se configuró SQS queue URL")
             return
         
@@ -97,8 +180,8 @@ class QueueService:
             }
             
             self.sqs.send_message(
-                QueueUrl=self.queue_url,
-                MessageBody=json.dumps(message, default=str)
+                QueueUrl=queue_url,
+                MessageBody=encode_message(message)
             )
             
             print(f"Generación de reporte {report_type} encolada")
@@ -0,0 +1,54 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from repositories.task_repository import TaskRepository
+from services.queue_service import QueueService, MAX_DELAY_SECONDS
+
+
+class ReminderService:
+    """Programación de recordatorios de tareas por vencer
+    
+    Se ejecuta periódicamente (cada REMINDER_WINDOW_MINUTES). Cada corrida
+    busca en el GSI de vencimientos las tareas cuyo recordatorio cae en la
+    ventana siguiente y las encola con DelaySeconds por el resto (máximo 15
+    minutos de SQS). La clave de idempotencia permite al consumidor
+    descartar duplicados si una corrida se reintenta.
+    """
+    
+    def __init__(self):
+        self.task_repository = TaskRepository()
+        self.queue_service = QueueService()
+        self.lead_minutes = int(os.getenv('REMINDER_LEAD_MINUTES', '60'))
+        self.window_minutes = min(int(os.getenv('REMINDER_WINDOW_MINUTES', '15')), MAX_DELAY_SECONDS // 60)
+    
+    def schedule_upcoming(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Encolar los recordatorios que vencen en la próxima ventana"""
+        now = now or datetime.utcnow()
+        window = timedelta(minutes=self.window_minutes)
+        lead = timedelta(minutes=self.lead_minutes)
+        
+        # Recordatorio en due_date - lead: buscar due_date en [now + lead, now + lead + window)
+        due_after = now + lead
+        due_before = due_after + window
+        
+        reminders = []
+        for task in self.task_repository.iter_due_between(due_after.isoformat(), due_before.isoformat()):
+            remind_at = task.due_date - lead
+            reminders.append({
+                'task_id': task.id,
+                'title': task.title,
+                'priority': task.priority.value,
+                'due_date': task.due_date.isoformat(),
+                # Una clave por tarea y fecha: cambiar el due_date genera un nuevo recordatorio
+                'idempotency_key': f'reminder#{task.id}#{task.due_date.isoformat()}',
+                'delay_seconds': int((remind_at - now).total_seconds())
+            })
+        
+        enqueued = self.queue_service.enqueue_task_reminders(reminders) if reminders else 0
+        
+        return {
+            'window_start': due_after.isoformat(),
+            'window_end': due_before.isoformat(),
+            'found': len(reminders),
+            'enqueued': enqueued
+        }
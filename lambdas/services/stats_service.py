@@ -0,0 +1,185 @@
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from repositories.rollup_repository import RollupRepository, BUCKET_FORMATS, ROLLUP_METRICS, bucket_key
+from repositories.task_repository import TaskRepository, OPEN_STATUSES, to_utc_iso
+from utils.instrumentation import bind_trace
+
+# NumPy es opcional: con él cada página se agrega con operaciones
+# vectorizadas; sin él se usa un recorrido en Python con el mismo resultado
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+
+# Solo los atributos que necesita el resumen (menos RCU y menos parseo)
+STATS_ATTRIBUTES = ['status', 'priority', 'due_date', 'files']
+
+# Los due_date se comparan en UTC con precisión de segundos
+# (YYYY-MM-DDTHH:MM:SS); los que traen offset se convierten antes de truncar
+DATETIME_PREFIX_LENGTH = 19
+
+# Series de tiempo: paso por granularidad y máximo de buckets por consulta
+BUCKET_STEPS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1)
+}
+MAX_TIMESERIES_BUCKETS = 1000
+
+# Rango por defecto de la serie cuando no se indica el inicio
+DEFAULT_TIMESERIES_RANGES = {
+    'hour': timedelta(hours=24),
+    'day': timedelta(days=30)
+}
+
+
+class PageAggregate:
+    """Acumulado parcial de un segmento del Scan"""
+    
+    def __init__(self):
+        self.total = 0
+        self.by_status = Counter()
+        self.by_priority = Counter()
+        self.with_files = 0
+        self.overdue = 0
+    
+    def merge(self, other: 'PageAggregate') -> 'PageAggregate':
+        self.total += other.total
+        self.by_status.update(other.by_status)
+        self.by_priority.update(other.by_priority)
+        self.with_files += other.with_files
+        self.overdue += other.overdue
+        return self
+
+
+class StatsService:
+    """Resumen de tareas sobre la tabla completa
+    
+    Recorre la tabla con Scans segmentados en paralelo (STATS_SCAN_SEGMENTS)
+    proyectando solo los atributos necesarios, y agrega cada página sin
+    materializar modelos Task.
+    """
+    
+    def __init__(self):
+        self.task_repository = TaskRepository()
+        self.rollup_repository = RollupRepository()
+        self.segments = max(1, int(os.getenv('STATS_SCAN_SEGMENTS', '4')))
+    
+    def summary(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Totales por estado y prioridad, tareas con archivos y vencidas"""
+        now_iso = (now or datetime.utcnow()).isoformat()[:DATETIME_PREFIX_LENGTH]
+        
+        with ThreadPoolExecutor(max_workers=self.segments) as executor:
+            partials = list(executor.map(
+                bind_trace(lambda segment: self._aggregate_segment(segment, now_iso)),
+                range(self.segments)
+            ))
+        
+        total = PageAggregate()
+        for partial in partials:
+            total.merge(partial)
+        
+        return {
+            'total_tasks': total.total,
+            'by_status': dict(total.by_status),
+            'by_priority': dict(total.by_priority),
+            'with_files': total.with_files,
+            'overdue': total.overdue
+        }
+    
+    def timeseries(self, start: datetime, end: datetime, granularity: str = 'hour') -> List[Dict[str, Any]]:
+        """Tareas creadas/completadas por bucket en [start, end], con ceros donde no hubo eventos"""
+        if granularity not in BUCKET_FORMATS:
+            raise ValueError(f"granularity debe ser una de: {', '.join(BUCKET_FORMATS)}")
+        if start > end:
+            raise ValueError('from debe ser anterior a to')
+        
+        step = BUCKET_STEPS[granularity]
+        bucket_start = datetime.strptime(bucket_key(start, granularity), BUCKET_FORMATS[granularity])
+        if (end - bucket_start) // step + 1 > MAX_TIMESERIES_BUCKETS:
+            raise ValueError(f'El rango supera {MAX_TIMESERIES_BUCKETS} buckets')
+        
+        stored = {bucket['bucket']: bucket for bucket in self.rollup_repository.find_buckets(start, end, granularity)}
+        
+        series = []
+        current = bucket_start
+        while current <= end:
+            key = bucket_key(current, granularity)
+            series.append(stored.get(key) or dict({'bucket': key}, **{metric: 0 for metric in ROLLUP_METRICS}))
+            current += step
+        
+        return series
+    
+    def _aggregate_segment(self, segment: int, now_iso: str) -> PageAggregate:
+        aggregate = PageAggregate()
+        pages = self.task_repository.iter_scan_pages(STATS_ATTRIBUTES, segment, self.segments)
+        for items in pages:
+            if items:
+                aggregate.merge(aggregate_page(items, now_iso))
+        return aggregate
+
+
+def aggregate_page(items: List[Dict[str, Any]], now_iso: str) -> PageAggregate:
+    """Agregar una página de items (vectorizado si NumPy está disponible)"""
+    if np is not None:
+        return _aggregate_page_numpy(items, now_iso)
+    return _aggregate_page_python(items, now_iso)
+
+
+def _aggregate_page_numpy(items: List[Dict[str, Any]], now_iso: str) -> PageAggregate:
+    aggregate = PageAggregate()
+    aggregate.total = len(items)
+    
+    # Códigos categóricos: np.unique agrupa y cuenta en una sola pasada
+    statuses = np.array([item.get('status', '') for item in items])
+    priorities = np.array([item.get('priority', '') for item in items])
+    for values, counter in ((statuses, aggregate.by_status), (priorities, aggregate.by_priority)):
+        categories, counts = np.unique(values, return_counts=True)
+        counter.update(dict(zip(categories.tolist(), counts.tolist())))
+    
+    aggregate.with_files = int(np.count_nonzero([bool(item.get('files')) for item in items]))
+    
+    # Vencidas: abiertas con due_date < ahora (NaT nunca es menor)
+    try:
+        due_dates = np.array(
+            [(_due_date_key(item) or 'NaT')[:DATETIME_PREFIX_LENGTH] for item in items],
+            dtype='datetime64[s]'
+        )
+    except ValueError:
+        # Un due_date guardado que NumPy no entiende no debe tumbar el resumen:
+        # la página se agrega sin vectorizar (misma semántica)
+        return _aggregate_page_python(items, now_iso)
+    is_open = np.isin(statuses, OPEN_STATUSES)
+    aggregate.overdue = int(np.count_nonzero(is_open & (due_dates < np.datetime64(now_iso, 's'))))
+    
+    return aggregate
+
+
+def _aggregate_page_python(items: List[Dict[str, Any]], now_iso: str) -> PageAggregate:
+    aggregate = PageAggregate()
+    aggregate.total = len(items)
+    
+    for item in items:
+        status = item.get('status', '')
+        aggregate.by_status[status] += 1
+        aggregate.by_priority[item.get('priority', '')] += 1
+        if item.get('files'):
+            aggregate.with_files += 1
+        
+        # Mismo formato ISO truncado: la comparación de strings es cronológica
+        due_date = _due_date_key(item)
+        if due_date and status in OPEN_STATUSES and due_date[:DATETIME_PREFIX_LENGTH] < now_iso:
+            aggregate.overdue += 1
+    
+    return aggregate
+
+
+def _due_date_key(item: Dict[str, Any]) -> Optional[str]:
+    """due_date en UTC sin zona, o None si falta o no es una fecha"""
+    try:
+        return to_utc_iso(item.get('due_date'))
+    except ValueError:
+        return None
@@ -1,29 +1,105 @@
+import hashlib
+import json
 import uuid
+from concurrent.futures import Executor
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from models import Task, TaskCreate, TaskUpdate
-from repositories.task_repository import TaskRepository
-from services.notification_service import NotificationService
-from services.queue_service import QueueService
+from repositories.idempotency_repository import IdempotencyRepository, IdempotencyKeyInUseError
+from repositories.cached_task_repository import get_task_repository
+from repositories.task_repository import VersionConflictError, LegacyTagListError
+from utils.text_search import tokenize, bm25
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """La Idempotency-Key ya se usó con un request distinto"""
 
 
 class TaskService:
     """Servicio para lógica de negocio de tareas"""
     
-    def __init__(self):
-        self.task_repository = TaskRepository()
-        self.notification_service = NotificationService()
-        self.queue_service = QueueService()
+    def __init__(self, side_effect_executor: Optional[Executor] = None):
+        self.task_repository = get_task_repository()
+        # Los clientes SNS/SQS se crean al primer uso: las lecturas
+        # (list, search, tags) no los necesitan y no pagan su init
+        self._notification_service = None
+        self._queue_service = None
+        # En el runtime de contenedores los efectos secundarios (SNS/SQS)
+        # corren en segundo plano; en Lambda se ejecutan antes de responder
+        self.side_effect_executor = side_effect_executor
+    
+    @property
+    def notification_service(self):
+        """NotificationService (SNS), creado al primer uso"""
+        if self._notification_service is None:
+            from services.notification_service import NotificationService
+            self._notification_service = NotificationService()
+        return self._notification_service
+    
+    @property
+    def queue_service(self):
+        """QueueService (SQS), creado al primer uso"""
+        if self._queue_service is None:
+            from services.queue_service import QueueService
+            self._queue_service = QueueService()
+        return self._queue_service
     
     def create_task(self, task_create: TaskCreate) -> Task:
         """Crear una nueva tarea"""
         
+        task = self._new_task(task_create)
+        
+        # Guardar en repositorio
+        self.task_repository.save(task)
+        
+        self._run_create_side_effects(task)
+        return task
+    
+    def create_task_idempotent(self, task_create: TaskCreate, idempotency_key: str) -> Tuple[Task, bool]:
+        """Crear una tarea una sola vez por Idempotency-Key
+        
+        La clave se escribe en la misma transacción que la tarea. Si ya
+        existe, se devuelve la tarea guardada sin repetir notificaciones ni
+        mensajes SQS. Retorna (tarea, replayed).
+        """
+        
+        scoped_key = f'create_task#{idempotency_key}'
+        fingerprint = hashlib.sha256(
+            json.dumps(task_create.dict(), sort_keys=True, default=str).encode()
+        ).hexdigest()
+        
+        task = self._new_task(task_create)
+        idempotency_repository = IdempotencyRepository()
+        
+        try:
+            self.task_repository.save(
+                task,
+                idempotency_put=idempotency_repository.transact_put(
+                    scoped_key,
+                    fingerprint=fingerprint,
+                    task=task.json()
+                )
+            )
+        except IdempotencyKeyInUseError:
+            stored = idempotency_repository.get(scoped_key)
+            if not stored:
+                raise
+            if stored.get('fingerprint') != fingerprint:
+                raise IdempotencyKeyReusedError('Idempotency-Key ya usada con un request distinto')
+            return Task(**json.loads(stored['task'])), True
+        
+        self._run_create_side_effects(task)
+        return task, False
+    
+    def _new_task(self, task_create: TaskCreate) -> Task:
+        """Construir una Task nueva con ID único y timestamps"""
+        
         # Generar ID único y timestamps
         task_id = str(uuid.uuid4())
         current_time = datetime.utcnow()
         
         # Crear objeto Task
-        task = Task(
+        return Task(
             id=task_id,
             title=task_create.title,
             description=task_create.description,
@@ -35,67 +111,222 @@ class TaskService:
             updated_at=current_time,
             files=[]
         )
+    
+    def _run_create_side_effects(self, task: Task) -> None:
+        """Notificación SNS y mensaje SQS de una tarea recién creada"""
+        self._run_side_effect(self.notification_service.send_task_created_notification, task)
+        self._run_side_effect(self.queue_service.enqueue_task_processing, task)
+    
+    def _run_side_effect(self, publish: Callable, *args) -> None:
+        """Ejecutar una publicación SNS/SQS sin que sus errores fallen la escritura
         
-        # Guardar en repositorio
-        self.task_repository.save(task)
-        
+        Con side_effect_executor se le entrega la publicación tal cual: el
+        error queda en el Future y el executor lo registra y lo cuenta.
+        """
+        if self.side_effect_executor is not None:
+            self.side_effect_executor.submit(publish, *args)
+        else:
+            self._publish_safely(publish, *args)
+    
+    @staticmethod
+    def _publish_safely(publish: Callable, *args) -> None:
         # Procesos asíncronos (no bloquean la respuesta)
         try:
-            self.notification_service.send_task_created_notification(task)
-            self.queue_service.enqueue_task_processing(task)
+            publish(*args)
         except Exception as e:
             print(f"Error en procesos asíncronos: {str(e)}")
-            # No falla la creación si hay problemas con notificaciones
-        
-        return task
+            # No falla la escritura si hay problemas con notificaciones
     
     def get_task_by_id(self, task_id: str) -> Optional[Task]:
         """Obtener tarea por ID"""
         return self.task_repository.find_by_id(task_id)
     
+    def get_tasks_by_ids(self, task_ids: List[str]) -> List[Task]:
+        """Obtener varias tareas por ID (las inexistentes se omiten)"""
+        return self.task_repository.find_by_ids(task_ids)
+    
     def list_tasks(self, 
                    status_filter: Optional[str] = None,
                    priority_filter: Optional[str] = None,
                    tag_filter: Optional[str] = None,
-                   limit: int = 50) -> List[Task]:
+                   limit: int = 50,
+                   tag_match_all: bool = True) -> List[Task]:
         """Listar tareas con filtros opcionales"""
         
         return self.task_repository.find_all(
             status_filter=status_filter,
             priority_filter=priority_filter,
             tag_filter=tag_filter,
-            limit=limit
+            limit=limit,
+            tag_match_all=tag_match_all
         )
     
-    def update_task(self, task_id: str, task_update: TaskUpdate) -> Optional[Task]:
-        """Actualizar una tarea existente"""
+    def list_tasks_due(self,
+                       due_after: Optional[datetime] = None,
+                       due_before: Optional[datetime] = None,
+                       status_filter: Optional[str] = None,
+                       priority_filter: Optional[str] = None,
+                       limit: int = 50) -> List[Task]:
+        """Listar tareas abiertas que vencen en un rango, por fecha de vencimiento"""
         
-        # Verificar que la tarea existe
-        existing_task = self.task_repository.find_by_id(task_id)
-        if not existing_task:
-            return None
+        # Los filtros adicionales se aplican sobre las tareas del rango
+        fetch_limit = limit if not (status_filter or priority_filter) else max(limit * 4, 200)
+        tasks = self.task_repository.find_due_between(
+            due_after=due_after.isoformat() if due_after else None,
+            due_before=due_before.isoformat() if due_before else None,
+            limit=fetch_limit
+        )
+        
+        if status_filter:
+            tasks = [task for task in tasks if task.status.value == status_filter]
+        if priority_filter:
+            tasks = [task for task in tasks if task.priority.value == priority_filter]
+        
+        return tasks[:limit]
+    
+    def count_overdue_tasks(self, now: Optional[datetime] = None) -> int:
+        """Número de tareas abiertas con due_date vencida"""
+        now = now or datetime.utcnow()
+        return self.task_repository.count_due_between(due_before=now.isoformat())
+    
+    def get_tag_counts(self, prefix: str = '', limit: int = 20) -> List[Dict[str, Any]]:
+        """Tags con su número de tareas (autocompletado)"""
+        return self.task_repository.tag_index.tag_counts(prefix=prefix, limit=limit)
+    
+    def search_tasks(self, query: str, limit: int = 20) -> List[Task]:
+        """Buscar tareas por palabras del título/descripción, ordenadas por BM25
+        
+        Cada palabra de la consulta se trata como prefijo ("docu" encuentra
+        "documentacion"); los términos completos puntúan por igual.
+        """
+        
+        terms = tokenize(query)
+        if not terms or limit < 1:
+            return []
+        
+        search_index = self.task_repository.search_index
+        stats = search_index.get_stats()
+        doc_count = stats['doc_count']
+        avg_doc_len = stats['total_length'] / doc_count if doc_count else 0
+        
+        scores: Dict[str, float] = {}
+        for term in terms:
+            postings = search_index.find_postings(term)
+            
+            # df por término expandido desde el prefijo
+            document_frequency: Dict[str, int] = {}
+            for posting in postings:
+                document_frequency[posting['term']] = document_frequency.get(posting['term'], 0) + 1
+            
+            for posting in postings:
+                score = bm25(
+                    tf=posting['tf'],
+                    df=document_frequency[posting['term']],
+                    doc_len=posting['doc_len'],
+                    avg_doc_len=avg_doc_len,
+                    doc_count=doc_count
+                )
+                scores[posting['task_id']] = scores.get(posting['task_id'], 0.0) + score
+        
+        ranked_ids = sorted(scores, key=lambda task_id: scores[task_id], reverse=True)
+        
+        # Hidratar por bloques; el índice puede tener tareas ya eliminadas
+        tasks = []
+        for start in range(0, len(ranked_ids), limit):
+            tasks.extend(self.task_repository.find_by_ids(ranked_ids[start:start + limit]))
+            if len(tasks) >= limit:
+                break
+        
+        return tasks[:limit]
+    
+    def update_task(self,
+                    task_id: str,
+                    task_update: TaskUpdate,
+                    expected_version: Optional[int] = None) -> Optional[Task]:
+        """Actualizar una tarea existente
+
+        Con expected_version (If-Match) la condición de versión en DynamoDB
+        reemplaza la lectura previa; solo se lee la tarea si la escritura
+        falla, para distinguir 404 de 412.
+        """
         
         # Preparar campos para actualizar
-        updates = {}
+        updates = self._build_updates(task_update)
         
-        if task_update.title is not None:
-            updates['title'] = task_update.title
-        if task_update.description is not None:
-            updates['description'] = task_update.description
-        if task_update.status is not None:
-            updates['status'] = task_update.status
-        if task_update.priority is not None:
-            updates['priority'] = task_update.priority
-        if task_update.due_date is not None:
-            updates['due_date'] = task_update.due_date
-        if task_update.tags is not None:
-            updates['tags'] = task_update.tags
+        # La condición attribute_exists(id) del repositorio ya distingue la
+        # tarea inexistente; ALL_OLD trae el estado anterior sin otra lectura
+        try:
+            previous_task, updated_task = self.task_repository.update(
+                task_id, updates, expected_version=expected_version, return_previous=True
+            )
+        except VersionConflictError:
+            if not self.task_repository.find_by_id(task_id):
+                return None
+            raise
         
-        # Actualizar en repositorio
-        updated_task = self.task_repository.update(task_id, updates)
+        if updated_task and previous_task.status != updated_task.status:
+            self._run_side_effect(
+                self.notification_service.send_task_updated_notification,
+                updated_task,
+                previous_task.status.value
+            )
         
         return updated_task
     
+    def update_with_retry(self,
+                          task_id: str,
+                          mutate: Callable[[Task], Dict[str, Any]],
+                          max_attempts: int = 3) -> Optional[Task]:
+        """Read/modify/write con reintentos ante conflictos de versión
+        
+        Solo para operaciones conmutativas (p. ej. agregar o quitar tags):
+        si otro cliente escribió primero, se vuelve a leer y se reaplica
+        el cambio en el servidor en lugar de devolver 412 al cliente.
+        """
+        
+        for attempt in range(max_attempts):
+            task = self.task_repository.find_by_id(task_id)
+            if not task:
+                return None
+            
+            updates = mutate(task)
+            if not updates:
+                return task
+            
+            try:
+                return self.task_repository.update(task_id, updates, expected_version=task.version)
+            except VersionConflictError:
+                print(f"Conflicto de versión en tarea {task_id}, reintento {attempt + 1}/{max_attempts}")
+        
+        raise VersionConflictError(task_id, task.version)
+    
+    def update_tags(self,
+                    task_id: str,
+                    add: Optional[List[str]] = None,
+                    remove: Optional[List[str]] = None) -> Optional[Task]:
+        """Agregar y quitar tags con escrituras atómicas (sin GET/PUT de la lista)"""
+        
+        try:
+            return self.task_repository.update_tags(task_id, add=add, remove=remove)
+        except LegacyTagListError:
+            # Tareas antiguas con tags en List: migrar a String Set con read/modify/write
+            add, remove = add or [], remove or []
+            
+            def mutate(task: Task) -> Dict[str, Any]:
+                tags = [tag for tag in task.tags if tag not in remove]
+                tags += [tag for tag in add if tag not in tags and tag not in remove]
+                return {'tags': tags}
+            
+            return self.update_with_retry(task_id, mutate)
+    
+    def add_tags(self, task_id: str, tags: List[str]) -> Optional[Task]:
+        """Agregar tags a una tarea sin reemplazar los existentes"""
+        return self.update_tags(task_id, add=tags)
+    
+    def remove_tags(self, task_id: str, tags: List[str]) -> Optional[Task]:
+        """Quitar tags de una tarea"""
+        return self.update_tags(task_id, remove=tags)
+    
     def delete_task(self, task_id: str) -> Optional[Task]:
         """Eliminar una tarea"""
         
@@ -120,15 +351,24 @@ class TaskService:
         return existing_task
     
     def add_file_to_task(self, task_id: str, file_key: str) -> Optional[Task]:
-        """Agregar archivo a una tarea"""
-        
-        # Verificar que la tarea exists
-        existing_task = self.task_repository.find_by_id(task_id)
-        if not existing_task:
-            return None
+        """Agregar archivo a una tarea (None si la tarea no existe)"""
+        return self.task_repository.add_file_to_task(task_id, file_key)
+    
+    def _build_updates(self, task_update: TaskUpdate) -> Dict[str, Any]:
+        """Extraer los campos informados en un TaskUpdate"""
+        updates = {}
         
-        # Agregar archivo a la tarea
-        self.task_repository.add_file_to_task(task_id, file_key)
+        if task_update.title is not None:
+            updates['title'] = task_update.title
+        if task_update.description is not None:
+            updates['description'] = task_update.description
+        if task_update.status is not None:
+            updates['status'] = task_update.status
+        if task_update.priority is not None:
+            updates['priority'] = task_update.priority
+        if task_update.due_date is not None:
+            updates['due_date'] = task_update.due_date
+        if task_update.tags is not None:
+            updates['tags'] = task_update.tags
         
-        # Retornar tarea actualizada
-        return self.task_repository.find_by_id(task_id)
\ No newline at end of file
+        return updates
\ No newline at end of file
@@ -1,16 +1,80 @@
 import boto3
 import os
-from typing import Optional
-from dotenv import load_dotenv
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+from botocore.config import Config
+from utils.instrumentation import instrument_client
+from utils.profiling import init_phase
+from utils.queue_topology import QUEUE_TOPOLOGY
 
-# Cargar variables de entorno
-load_dotenv()
+
+@dataclass(frozen=True)
+class Settings:
+    """Configuración de producción: solo variables de entorno
+    
+    En Lambda el entorno no cambia durante la vida del contenedor, así que
+    se lee una vez y queda congelada. El .env lo cargan los scripts de
+    local/ antes de importar este módulo (nada de buscar archivos en el
+    init de Lambda).
+    """
+    region: str
+    localstack_endpoint: Optional[str]
+    table_name: str
+    index_table_name: str
+    bucket_name: str
+    queue_url: str
+    queue_urls: Dict[str, str]
+    topic_arn: str
+    max_pool_connections: int
+    
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        return cls(
+            region=os.getenv('AWS_REGION', 'us-east-1'),
+            localstack_endpoint=os.getenv('LOCALSTACK_ENDPOINT'),
+            table_name=os.getenv('DYNAMODB_TABLE_NAME', 'tasks-table'),
+            index_table_name=os.getenv('DYNAMODB_INDEX_TABLE_NAME', 'tasks-index-table'),
+            bucket_name=os.getenv('S3_BUCKET_NAME', 'task-manager-files'),
+            queue_url=os.getenv('SQS_QUEUE_URL', ''),
+            queue_urls={
+                queue_class: os.getenv(queue.env_var, '')
+                for queue_class, queue in QUEUE_TOPOLOGY.items()
+            },
+            topic_arn=os.getenv('SNS_TOPIC_ARN', ''),
+            max_pool_connections=int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '32'))
+        )
+
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Configuración leída del entorno en el primer uso"""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings.from_env()
+    return _settings
+
+
+def reset_settings() -> None:
+    """Volver a leer el entorno en el próximo uso (pruebas)"""
+    global _settings
+    with _settings_lock:
+        _settings = None
 
 
 class AWSConfig:
     def __init__(self):
-        self.region = os.getenv('AWS_REGION', 'us-east-1')
-        self.localstack_endpoint = os.getenv('LOCALSTACK_ENDPOINT')
+        # La sesión por defecto de boto3 no es segura para crear clientes
+        # desde varios hilos a la vez (servidor local con threadpool)
+        self._lock = threading.Lock()
+        settings = get_settings()
+        self.region = settings.region
+        self.localstack_endpoint = settings.localstack_endpoint
         self.use_localstack = self.localstack_endpoint is not None
         
         # Configuración para LocalStack (desarrollo local)
@@ -26,39 +90,63 @@ class AWSConfig:
             self.aws_config = {
                 'region_name': self.region
             }
+        
+        # Conexiones HTTP persistentes: el pool por cliente debe cubrir las
+        # llamadas en paralelo (batch get, claims, envíos SQS en hilos)
+        self.aws_config['config'] = Config(
+            max_pool_connections=settings.max_pool_connections,
+            tcp_keepalive=True
+        )
+    
+    # Todos los clientes se crean instrumentados (utils/instrumentation.py):
+    # cada llamada emite latencia, reintentos, bytes y capacidad consumida
     
     def get_dynamodb_client(self):
-        return boto3.client('dynamodb', **self.aws_config)
+        with self._lock:
+            return instrument_client(boto3.client('dynamodb', **self.aws_config))
     
     def get_dynamodb_resource(self):
-        return boto3.resource('dynamodb', **self.aws_config)
+        with self._lock:
+            resource = boto3.resource('dynamodb', **self.aws_config)
+        instrument_client(resource.meta.client)
+        return resource
     
     def get_s3_client(self):
-        return boto3.client('s3', **self.aws_config)
+        with self._lock:
+            return instrument_client(boto3.client('s3', **self.aws_config))
     
     def get_sqs_client(self):
-        return boto3.client('sqs', **self.aws_config)
+        with self._lock:
+            return instrument_client(boto3.client('sqs', **self.aws_config))
     
     def get_sns_client(self):
-        return boto3.client('sns', **self.aws_config)
+        with self._lock:
+            return instrument_client(boto3.client('sns', **self.aws_config))
 
 
 # Instancia global
-aws_config = AWSConfig()
+with init_phase('aws_config'):
+    aws_config = AWSConfig()
 
 
 # Funciones de utilidad
 def get_table_name():
-    return os.getenv('DYNAMODB_TABLE_NAME', 'tasks-table')
+    return get_settings().table_name
+
+
+def get_index_table_name():
+    return get_settings().index_table_name
 
 
 def get_bucket_name():
-    return os.getenv('S3_BUCKET_NAME', 'task-manager-files')
+    return get_settings().bucket_name
 
 
-def get_queue_url():
-    return os.getenv('SQS_QUEUE_URL', '')
+def get_queue_url(queue_class=None):
+    # Sin URL propia la cola cae en SQS_QUEUE_URL (despliegue de una sola cola)
+    settings = get_settings()
+    return settings.queue_urls.get(queue_class) or settings.queue_url
 
 
 def get_topic_arn():
-    return os.getenv('SNS_TOPIC_ARN', '')
\ No newline at end of file
+    return get_settings().topic_arn
\ No newline at end of file
@@ -0,0 +1,108 @@
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Cache LRU en memoria del proceso con expiración opcional por TTL
+    
+    Vive mientras el contenedor Lambda esté caliente; es seguro entre hilos.
+    """
+    
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Valor de la clave (y la marca como usada) o default si no está o expiró"""
+        with self._lock:
+            entry = self._items.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._items[key]
+                return default
+            
+            self._items.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guardar un valor, descartando el menos usado si se supera max_size"""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def delete(self, key: Hashable) -> None:
+        """Eliminar una clave si existe"""
+        with self._lock:
+            self._items.pop(key, None)
+    
+    def clear(self) -> None:
+        """Vaciar el cache"""
+        with self._lock:
+            self._items.clear()
+    
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class CacheBackend(ABC):
+    """Interfaz de un cache compartido entre procesos (p. ej. Redis/ElastiCache)
+    
+    Los valores son strings; la serialización es responsabilidad del llamador.
+    Un backend incompleto falla al instanciarse, no en el primer uso.
+    """
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Valor vigente de la clave, o None"""
+    
+    @abstractmethod
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        """Guardar el valor por ttl_seconds"""
+    
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Invalidar la clave"""
+
+
+class InMemorySharedCache(CacheBackend):
+    """Sustituto local de un cache compartido: un dict global del proceso"""
+    
+    _store = LRUCache(max_size=100000)
+    
+    def get(self, key: str) -> Optional[str]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._store.delete(key)
+            return None
+        return value
+    
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        self._store.set(key, (time.monotonic() + ttl_seconds, value))
+    
+    def delete(self, key: str) -> None:
+        self._store.delete(key)
+    
+    @classmethod
+    def reset(cls) -> None:
+        """Vaciar el cache (pruebas)"""
+        cls._store.clear()
@@ -0,0 +1,328 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlencode
+from utils.profiling import profile_invocation, take_cold_start
+
+
+# Namespace de CloudWatch donde aterrizan las métricas EMF
+DEFAULT_NAMESPACE = 'TaskManager'
+
+# Clave en el contexto de botocore para correlacionar before-call y after-call
+_START_KEY = 'instrumentation_start'
+
+_CALL_METRICS = [
+    {'Name': 'Latency', 'Unit': 'Milliseconds'},
+    {'Name': 'Retries', 'Unit': 'Count'},
+    {'Name': 'RequestBytes', 'Unit': 'Bytes'},
+    {'Name': 'ResponseBytes', 'Unit': 'Bytes'},
+    {'Name': 'ConsumedCapacity', 'Unit': 'Count'}
+]
+
+_COLD_START_METRICS = [
+    {'Name': 'InitDuration', 'Unit': 'Milliseconds'},
+    {'Name': 'ImportTime', 'Unit': 'Milliseconds'}
+]
+
+_INVOCATION_METRICS = [
+    {'Name': 'Duration', 'Unit': 'Milliseconds'},
+    {'Name': 'AwsTime', 'Unit': 'Milliseconds'},
+    {'Name': 'AwsCalls', 'Unit': 'Count'},
+    {'Name': 'ConsumedCapacity', 'Unit': 'Count'}
+]
+
+
+class StdoutSink:
+    """Una línea JSON por registro: CloudWatch Logs extrae las métricas EMF"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+    
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock:
+            sys.stdout.write(line + '\n')
+            sys.stdout.flush()
+
+
+class MemorySink:
+    """Guarda los registros en memoria (pruebas y servidor local)"""
+    
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+    
+    def write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.records.append(record)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+
+class NullSink:
+    """Descarta los registros (METRICS_SINK=off)"""
+    
+    def write(self, record: Dict[str, Any]) -> None:
+        pass
+
+
+_SINKS = {
+    'stdout': StdoutSink,
+    'memory': MemorySink,
+    'off': NullSink
+}
+
+_sink = None
+
+
+def get_sink():
+    """Sink configurado con METRICS_SINK (stdout por defecto)"""
+    global _sink
+    if _sink is None:
+        _sink = _SINKS.get(os.getenv('METRICS_SINK', 'stdout'), StdoutSink)()
+    return _sink
+
+
+def set_sink(sink) -> None:
+    """Reemplazar el sink (None vuelve a leer METRICS_SINK)"""
+    global _sink
+    _sink = sink
+
+
+class InvocationTrace:
+    """Acumulado de las llamadas AWS de una invocación de handler
+    
+    Lo comparten los hilos que lanza la invocación (bind_trace), por eso
+    las sumas van bajo un lock.
+    """
+    
+    def __init__(self, handler: str, request_id: Optional[str] = None):
+        self.handler = handler
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.aws_time_ms = 0.0
+        self.aws_calls = 0
+        self.consumed_capacity = 0.0
+        self.by_operation = defaultdict(lambda: {'calls': 0, 'ms': 0.0})
+        self._lock = threading.Lock()
+    
+    def add_call(self, operation: str, latency_ms: float, capacity: float) -> None:
+        with self._lock:
+            self.aws_time_ms += latency_ms
+            self.aws_calls += 1
+            self.consumed_capacity += capacity
+            entry = self.by_operation[operation]
+            entry['calls'] += 1
+            entry['ms'] += latency_ms
+
+
+_current_trace: ContextVar[Optional[InvocationTrace]] = ContextVar('invocation_trace', default=None)
+
+
+def current_trace() -> Optional[InvocationTrace]:
+    """Traza de la invocación en curso, si el handler está instrumentado"""
+    return _current_trace.get()
+
+
+def bind_trace(fn: Callable) -> Callable:
+    """Propagar la traza actual a una función que correrá en otro hilo
+    
+    Los ContextVar no pasan a los hilos de un ThreadPoolExecutor; sin esto
+    las llamadas en paralelo (batch get, Scan segmentado) quedan sin handler.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return fn
+    
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _current_trace.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_trace.reset(token)
+    
+    return wrapper
+
+
+def instrument_client(client: Any) -> Any:
+    """Registrar los hooks de botocore que miden cada llamada del cliente
+    
+    - Latencia total (incluye reintentos y sus esperas)
+    - Reintentos (ResponseMetadata.RetryAttempts)
+    - Tamaño del request y de la respuesta
+    - Capacidad consumida: se pide ReturnConsumedCapacity=TOTAL en toda
+      operación que lo acepta
+    """
+    events = client.meta.events
+    events.register('provide-client-params.*.*', _request_consumed_capacity)
+    events.register('before-call.*.*', _start_call)
+    events.register('after-call.*.*', _finish_call)
+    events.register('after-call-error.*.*', _fail_call)
+    return client
+
+
+def _request_consumed_capacity(params: Dict[str, Any], model: Any, **kwargs) -> None:
+    input_shape = model.input_shape
+    if input_shape is not None and 'ReturnConsumedCapacity' in input_shape.members:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+
+def _start_call(params: Dict[str, Any], context: Dict[str, Any], **kwargs) -> None:
+    context[_START_KEY] = (time.perf_counter(), _body_size(params.get('body')))
+
+
+def _finish_call(http_response: Any, parsed: Dict[str, Any], model: Any, context: Dict[str, Any], **kwargs) -> None:
+    # Content-Length y no .content: leer el cuerpo consumiría los streams
+    # (get_object de S3 devolvería un Body vacío)
+    response_bytes = _content_length(getattr(http_response, 'headers', None))
+    retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+    # Los errores del servicio (4xx/5xx) también pasan por after-call
+    error = parsed.get('Error', {}).get('Code')
+    _record_call(model, context, retries, response_bytes, consumed_capacity(parsed), error)
+
+
+def _content_length(headers: Any) -> int:
+    try:
+        return int((headers or {}).get('content-length') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _fail_call(exception: Exception, model: Any, context: Dict[str, Any], **kwargs) -> None:
+    # Errores sin respuesta HTTP (timeouts, conexión)
+    _record_call(model, context, 0, 0, 0.0, error=type(exception).__name__)
+
+
+def _record_call(model: Any, context: Dict[str, Any], retries: int, response_bytes: int,
+                 capacity: float, error: Optional[str]) -> None:
+    started, request_bytes = context.pop(_START_KEY, (None, 0))
+    if started is None:
+        return
+    latency_ms = (time.perf_counter() - started) * 1000
+    service = model.service_model.service_name
+    operation = f'{service}.{model.name}'
+    
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_call(operation, latency_ms, capacity)
+    
+    record = emf_record(
+        [['Service', 'Operation']],
+        _CALL_METRICS,
+        {
+            'Service': service,
+            'Operation': model.name,
+            'Latency': round(latency_ms, 3),
+            'Retries': retries,
+            'RequestBytes': request_bytes,
+            'ResponseBytes': response_bytes,
+            'ConsumedCapacity': capacity
+        }
+    )
+    if trace is not None:
+        record['Handler'] = trace.handler
+        if trace.request_id:
+            record['RequestId'] = trace.request_id
+    if error:
+        record['Error'] = error
+    get_sink().write(record)
+
+
+def consumed_capacity(parsed: Dict[str, Any]) -> float:
+    """Unidades consumidas (lectura + escritura) reportadas en la respuesta"""
+    capacity = parsed.get('ConsumedCapacity')
+    if capacity is None:
+        return 0.0
+    # Las operaciones batch/transacción devuelven una lista (una por tabla)
+    entries = capacity if isinstance(capacity, list) else [capacity]
+    return float(sum(entry.get('CapacityUnits', 0) for entry in entries))
+
+
+def _body_size(body: Any) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    if isinstance(body, dict):
+        # Protocolo query (SNS): el body aún es un dict de parámetros
+        return len(urlencode(body))
+    return 0
+
+
+def emf_record(dimensions: List[List[str]], metrics: List[Dict[str, str]], values: Dict[str, Any]) -> Dict[str, Any]:
+    """Registro en CloudWatch Embedded Metric Format"""
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': os.getenv('METRICS_NAMESPACE', DEFAULT_NAMESPACE),
+                'Dimensions': dimensions,
+                'Metrics': metrics
+            }]
+        }
+    }
+    record.update(values)
+    return record
+
+
+def instrumented_handler(handler: Callable) -> Callable:
+    """Decorador para lambda_handler: traza de la invocación y resumen EMF
+    
+    Al terminar emite la duración total, el tiempo gastado en AWS y el
+    desglose por operación, con el handler (y si fue cold start) como
+    dimensión. La primera invocación del proceso emite además el reporte
+    del init: duración, fases y los imports más lentos. Con
+    PROFILE_SAMPLE_RATE=N se perfila 1 de cada N invocaciones.
+    """
+    name = handler.__module__.rsplit('.', 1)[-1]
+    
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        request_id = getattr(context, 'aws_request_id', None)
+        cold_start = take_cold_start()
+        if cold_start is not None:
+            record = emf_record([['Handler']], _COLD_START_METRICS, dict({'Handler': name}, **cold_start))
+            if request_id:
+                record['RequestId'] = request_id
+            get_sink().write(record)
+        
+        trace = InvocationTrace(name, request_id)
+        token = _current_trace.set(trace)
+        try:
+            with profile_invocation(name, request_id):
+                return handler(event, context)
+        finally:
+            _current_trace.reset(token)
+            duration_ms = (time.perf_counter() - trace.started) * 1000
+            record = emf_record(
+                [['Handler'], ['Handler', 'ColdStart']],
+                _INVOCATION_METRICS,
+                {
+                    'Handler': name,
+                    'ColdStart': 'true' if cold_start is not None else 'false',
+                    'Duration': round(duration_ms, 3),
+                    'AwsTime': round(trace.aws_time_ms, 3),
+                    'AwsCalls': trace.aws_calls,
+                    'ConsumedCapacity': trace.consumed_capacity,
+                    'Operations': {
+                        operation: {'calls': entry['calls'], 'ms': round(entry['ms'], 3)}
+                        for operation, entry in trace.by_operation.items()
+                    }
+                }
+            )
+            if trace.request_id:
+                record['RequestId'] = trace.request_id
+            get_sink().write(record)
+    
+    return wrapper
@@ -0,0 +1,135 @@
+import base64
+import gzip
+import json
+import os
+import threading
+import uuid
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+from utils.aws_config import aws_config, get_bucket_name
+
+
+# Marca del sobre: un cuerpo sin esta clave es el JSON original
+CODEC_KEY = '_codec'
+GZIP_CODEC = 'gzip+base64'
+S3_CODEC = 's3+gzip'
+
+# Campos que el sobre copia en claro: ruteo, deduplicación y logs sin
+# descomprimir ni ir a S3. Un campo de esta lista que no está en los
+# headers tampoco está en el mensaje ('Type' distingue los sobres de SNS)
+HEADER_FIELDS = ('Type', 'action', 'type', 'notification_type', 'task_id', 'idempotency_key', 'priority', 'status')
+
+# Por debajo de este tamaño el mensaje viaja como JSON plano
+DEFAULT_COMPRESS_THRESHOLD_BYTES = 8 * 1024
+
+# SQS y SNS aceptan 256 KB por mensaje contando los atributos
+DEFAULT_MAX_INLINE_BYTES = 240 * 1024
+
+# Prefijo de los cuerpos en S3 (la regla de ciclo de vida los expira)
+CLAIM_CHECK_PREFIX = 'messages/'
+
+_s3_client = None
+_s3_lock = threading.Lock()
+
+
+def _s3():
+    global _s3_client
+    if _s3_client is None:
+        with _s3_lock:
+            if _s3_client is None:
+                _s3_client = aws_config.get_s3_client()
+    return _s3_client
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Cuerpo para SQS/SNS: JSON plano, gzip en base64 o claim-check en S3
+    
+    - Menos de MESSAGE_COMPRESS_THRESHOLD_BYTES: el JSON tal cual
+    - Si no: sobre con el JSON comprimido
+    - Si el sobre comprimido supera MESSAGE_MAX_INLINE_BYTES: el cuerpo
+      comprimido va a S3 y el sobre lleva solo el bucket y la clave
+    """
+    body = json.dumps(message, default=str)
+    raw = body.encode('utf-8')
+    threshold = int(os.getenv('MESSAGE_COMPRESS_THRESHOLD_BYTES', str(DEFAULT_COMPRESS_THRESHOLD_BYTES)))
+    if len(raw) < threshold:
+        return body
+    
+    compressed = gzip.compress(raw)
+    headers = {field: message[field] for field in HEADER_FIELDS if field in message}
+    envelope = json.dumps({
+        CODEC_KEY: GZIP_CODEC,
+        'headers': headers,
+        'data': base64.b64encode(compressed).decode('ascii')
+    }, default=str)
+    max_inline = int(os.getenv('MESSAGE_MAX_INLINE_BYTES', str(DEFAULT_MAX_INLINE_BYTES)))
+    if len(envelope) <= max_inline:
+        return envelope
+    
+    bucket = get_bucket_name()
+    key = f"{CLAIM_CHECK_PREFIX}{datetime.utcnow().strftime('%Y/%m/%d')}/{uuid.uuid4()}.json.gz"
+    # Sin ContentEncoding: los clientes HTTP descomprimirían al leer
+    _s3().put_object(Bucket=bucket, Key=key, Body=compressed, ContentType='application/gzip')
+    return json.dumps({
+        CODEC_KEY: S3_CODEC,
+        'headers': headers,
+        'bucket': bucket,
+        'key': key,
+        'size': len(raw)
+    }, default=str)
+
+
+def decode_message(body: str) -> Dict[str, Any]:
+    """Inverso de encode_message; los sobres se rehidratan al primer acceso"""
+    message = json.loads(body)
+    if isinstance(message, dict) and message.get(CODEC_KEY) in (GZIP_CODEC, S3_CODEC):
+        return LazyMessage(message)
+    return message
+
+
+class LazyMessage(Mapping):
+    """Mensaje de un sobre que se descomprime (o se baja de S3) al usarlo
+    
+    Los HEADER_FIELDS se responden desde los headers sin rehidratar: el
+    procesador puede deduplicar y despachar un mensaje grande sin leerlo.
+    """
+    
+    def __init__(self, envelope: Dict[str, Any]):
+        self.envelope = envelope
+        self.headers = envelope.get('headers', {})
+        self._payload: Optional[Dict[str, Any]] = None
+    
+    @property
+    def loaded(self) -> bool:
+        return self._payload is not None
+    
+    def payload(self) -> Dict[str, Any]:
+        if self._payload is None:
+            if self.envelope[CODEC_KEY] == S3_CODEC:
+                compressed = _s3().get_object(Bucket=self.envelope['bucket'], Key=self.envelope['key'])['Body'].read()
+            else:
+                compressed = base64.b64decode(self.envelope['data'])
+            self._payload = json.loads(gzip.decompress(compressed))
+        return self._payload
+    
+    def __getitem__(self, key: str) -> Any:
+        if self._payload is None and key in HEADER_FIELDS:
+            return self.headers[key]
+        return self.payload()[key]
+    
+    def __contains__(self, key: object) -> bool:
+        if self._payload is None and key in HEADER_FIELDS:
+            return key in self.headers
+        return key in self.payload()
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.payload())
+    
+    def __len__(self) -> int:
+        return len(self.payload())
+    
+    def __repr__(self) -> str:
+        # Sin rehidratar: los logs no deben bajar el cuerpo de S3
+        state = 'cargado' if self.loaded else 'pendiente'
+        return f"LazyMessage({self.envelope[CODEC_KEY]}, headers={self.headers}, cuerpo {state})"
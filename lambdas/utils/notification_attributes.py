@@ -0,0 +1,54 @@
+from typing import Any, Dict, Optional
+
+
+# MessageAttributes de cada publicación en el tópico de notificaciones. Las
+# filter policies de las suscripciones y el SQS processor usan estos valores
+# sin leer el cuerpo del mensaje
+EVENT_TYPE_ATTRIBUTE = 'event_type'
+PRIORITY_ATTRIBUTE = 'priority'
+STATUS_ATTRIBUTE = 'status'
+
+TASK_CREATED = 'task_created'
+TASK_UPDATED = 'task_updated'
+TASK_DELETED = 'task_deleted'
+TASK_REMINDER = 'task_reminder'
+
+# Filter policy de la cola del SQS processor: solo los eventos que alimentan
+# los rollups. Los recordatorios y las eliminaciones no llegan a la cola
+PROCESSOR_FILTER_POLICY = {EVENT_TYPE_ATTRIBUTE: [TASK_CREATED, TASK_UPDATED]}
+
+# Filter policy sugerida para suscripciones de email: recordatorios y tareas
+# urgentes (nuevas o actualizadas con prioridad alta o crítica)
+ALERTS_FILTER_POLICY = {
+    '$or': [
+        {EVENT_TYPE_ATTRIBUTE: [TASK_REMINDER]},
+        {EVENT_TYPE_ATTRIBUTE: [TASK_CREATED, TASK_UPDATED], PRIORITY_ATTRIBUTE: ['critical', 'high']}
+    ]
+}
+
+
+def message_attributes(event_type: str,
+                       priority: Optional[str] = None,
+                       status: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+    """MessageAttributes de SNS para un evento (se omiten los valores vacíos)"""
+    values = {
+        EVENT_TYPE_ATTRIBUTE: event_type,
+        PRIORITY_ATTRIBUTE: priority,
+        STATUS_ATTRIBUTE: status
+    }
+    return {
+        name: {'DataType': 'String', 'StringValue': str(value)}
+        for name, value in values.items() if value
+    }
+
+
+def attribute_value(attributes: Dict[str, Any], name: str) -> Optional[str]:
+    """Valor de un atributo tal como llega al consumidor
+
+    Acepta el formato del sobre SNS entregado a SQS ({'Type', 'Value'}) y el
+    de los atributos de un record SQS ({'dataType', 'stringValue'}).
+    """
+    attribute = (attributes or {}).get(name)
+    if not isinstance(attribute, dict):
+        return None
+    return attribute.get('Value') or attribute.get('stringValue') or attribute.get('StringValue')
@@ -0,0 +1,228 @@
+import builtins
+import cProfile
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+# Inicio del init del proceso: handlers/__init__.py importa este módulo
+# antes que cualquier handler, servicio o dependencia pesada
+INIT_STARTED = time.perf_counter()
+
+# Cuántos imports se reportan en el cold start (los de mayor tiempo propio)
+DEFAULT_TOP_IMPORTS = 15
+
+# Intervalo del profiler por muestreo
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+
+DEFAULT_PROFILE_OUTPUT = '/tmp/profiles'
+
+
+class ImportTimer:
+    """Mide cada import del init reemplazando builtins.__import__
+    
+    Solo cuenta los módulos que aún no estaban cargados y solo en el hilo
+    que lo instaló. Se desinstala tras la primera invocación, así que las
+    invocaciones calientes no pagan nada.
+    """
+    
+    def __init__(self):
+        self.timings: List[Dict[str, Any]] = []
+        self._children: List[float] = []
+        self._original = None
+        self._thread = None
+        self._active = False
+    
+    def install(self) -> None:
+        if self._original is not None:
+            return
+        self._thread = threading.get_ident()
+        self._original = builtins.__import__
+        self._active = True
+        builtins.__import__ = self._timed_import
+    
+    def uninstall(self) -> None:
+        # Si otro hook se instaló encima no se puede restaurar: queda como
+        # un passthrough sin medición
+        self._active = False
+        if builtins.__import__ is self._timed_import:
+            builtins.__import__ = self._original
+    
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if not self._active or level or name in sys.modules or threading.get_ident() != self._thread:
+            return self._original(name, globals, locals, fromlist, level)
+        
+        depth = len(self._children)
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            inclusive_ms = (time.perf_counter() - started) * 1000
+            children_ms = self._children.pop()
+            if self._children:
+                self._children[-1] += inclusive_ms
+            self.timings.append({
+                'module': name,
+                'ms': round(inclusive_ms, 3),
+                'self_ms': round(inclusive_ms - children_ms, 3),
+                'depth': depth
+            })
+    
+    def total_ms(self) -> float:
+        """Tiempo de los imports de primer nivel (los anidados ya están incluidos)"""
+        return sum(timing['ms'] for timing in self.timings if timing['depth'] == 0)
+    
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        return sorted(self.timings, key=lambda timing: timing['self_ms'], reverse=True)[:limit]
+
+
+_import_timer = ImportTimer()
+_init_phases: Dict[str, float] = {}
+_cold_start_lock = threading.Lock()
+_cold_start_taken = False
+
+
+def start_import_timer() -> None:
+    """Empezar a medir los imports del init (idempotente)"""
+    _import_timer.install()
+
+
+@contextmanager
+def init_phase(name: str):
+    """Medir una fase del init (p. ej. la construcción de AWSConfig)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _init_phases[name] = round((time.perf_counter() - started) * 1000, 3)
+
+
+def take_cold_start() -> Optional[Dict[str, Any]]:
+    """Reporte del init para la primera invocación del proceso; None en las siguientes"""
+    global _cold_start_taken
+    with _cold_start_lock:
+        if _cold_start_taken:
+            return None
+        _cold_start_taken = True
+    
+    _import_timer.uninstall()
+    limit = int(os.getenv('PROFILE_TOP_IMPORTS', str(DEFAULT_TOP_IMPORTS)))
+    return {
+        'InitDuration': round((time.perf_counter() - INIT_STARTED) * 1000, 3),
+        'ImportTime': round(_import_timer.total_ms(), 3),
+        'Phases': dict(_init_phases),
+        'Imports': _import_timer.top(limit)
+    }
+
+
+class SamplingProfiler:
+    """Muestrea la pila de un hilo cada `interval` segundos
+    
+    El resultado son pilas colapsadas ("a;b;c N"), la entrada de
+    flamegraph.pl y speedscope.
+    """
+    
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+
+def collapsed_stacks(stacks: Counter) -> str:
+    """Formato de pilas colapsadas: una pila por línea con su número de muestras"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+def should_profile() -> bool:
+    """Perfilar 1 de cada PROFILE_SAMPLE_RATE invocaciones (0 o vacío: nunca)"""
+    rate = int(os.getenv('PROFILE_SAMPLE_RATE', '0') or 0)
+    return rate > 0 and random.randrange(rate) == 0
+
+
+@contextmanager
+def profile_invocation(handler: str, request_id: Optional[str] = None):
+    """Perfilar la invocación si le toca según PROFILE_SAMPLE_RATE
+    
+    - PROFILE_MODE=sampling (por defecto): pilas colapsadas (.folded)
+    - PROFILE_MODE=cprofile: estadísticas de cProfile (.prof, para pstats/snakeviz)
+    """
+    if not should_profile():
+        yield
+        return
+    
+    mode = os.getenv('PROFILE_MODE', 'sampling')
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.create_stats()
+            # Mismo formato que Profile.dump_stats
+            write_profile(handler, request_id, 'prof', marshal.dumps(profiler.stats))
+        return
+    
+    interval = float(os.getenv('PROFILE_INTERVAL_MS', str(DEFAULT_SAMPLE_INTERVAL_MS))) / 1000
+    sampler = SamplingProfiler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        yield
+    finally:
+        stacks = sampler.stop()
+        write_profile(handler, request_id, 'folded', collapsed_stacks(stacks).encode('utf-8'))
+
+
+def write_profile(handler: str, request_id: Optional[str], extension: str, data: bytes) -> Optional[str]:
+    """Guardar un perfil en PROFILE_OUTPUT (directorio local o s3://bucket/prefijo)"""
+    output = os.getenv('PROFILE_OUTPUT', DEFAULT_PROFILE_OUTPUT)
+    name = f"{handler}/{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{request_id or 'local'}.{extension}"
+    
+    try:
+        if output.startswith('s3://'):
+            # Import diferido: aws_config importa este módulo
+            from utils.aws_config import aws_config
+            bucket, _, prefix = output[len('s3://'):].partition('/')
+            key = f"{prefix.rstrip('/')}/{name}" if prefix else name
+            aws_config.get_s3_client().put_object(Bucket=bucket, Key=key, Body=data)
+            return f's3://{bucket}/{key}'
+        
+        path = os.path.join(output, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as profile_file:
+            profile_file.write(data)
+        return path
+    except Exception as e:
+        # El perfil es diagnóstico: nunca debe romper la invocación
+        print(f"Error guardando el perfil de {handler}: {str(e)}")
+        return None
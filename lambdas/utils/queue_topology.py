@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+# Cada cola tiene su DLQ (<nombre>-dlq). La redrive policy mueve ahí lo que
+# falla MAX_RECEIVE_COUNT veces; el procesador pone en cuarentena antes
+# (POISON_RECEIVE_COUNT) para guardar el error junto al mensaje
+DLQ_SUFFIX = '-dlq'
+MAX_RECEIVE_COUNT = 5
+
+
+@dataclass(frozen=True)
+class QueueClass:
+    """Una cola SQS de la topología y cómo la consume el procesador
+    
+    batch_size, batching_window_seconds y max_concurrency son los
+    parámetros del event source mapping de Lambda (y del worker local):
+    lotes chicos y sin ventana donde importa la latencia, lotes grandes
+    y poca concurrencia para la carga masiva.
+    """
+    name: str
+    env_var: str
+    batch_size: int
+    batching_window_seconds: int
+    max_concurrency: int
+    visibility_timeout: int
+    
+    @property
+    def dlq_name(self) -> str:
+        return self.name + DLQ_SUFFIX
+
+
+# Cola por nivel de prioridad más una cola para trabajo masivo. Si la
+# variable de una cola no está definida se usa SQS_QUEUE_URL (una sola cola)
+QUEUE_TOPOLOGY: Dict[str, QueueClass] = {
+    'critical': QueueClass('task-queue-critical', 'SQS_QUEUE_URL_CRITICAL', 1, 0, 50, 60),
+    'high': QueueClass('task-queue-high', 'SQS_QUEUE_URL_HIGH', 5, 0, 20, 120),
+    'standard': QueueClass('task-queue', 'SQS_QUEUE_URL_STANDARD', 10, 5, 10, 300),
+    'bulk': QueueClass('task-queue-bulk', 'SQS_QUEUE_URL_BULK', 10, 30, 2, 900)
+}
+
+DEFAULT_QUEUE_CLASS = 'standard'
+
+# Prioridad de la tarea (TaskPriority.value) -> cola
+PRIORITY_QUEUES = {
+    'critical': 'critical',
+    'high': 'high',
+    'medium': 'standard',
+    'low': 'standard'
+}
+
+# Acciones que no dependen de una tarea: siempre van a la cola masiva
+BULK_ACTIONS = frozenset({'cleanup_completed_tasks', 'generate_task_report'})
+
+
+def queue_class_for(action: str, priority: Optional[str] = None) -> str:
+    """Cola que corresponde a un mensaje según su acción y la prioridad de la tarea"""
+    if action in BULK_ACTIONS:
+        return 'bulk'
+    return PRIORITY_QUEUES.get(priority or '', DEFAULT_QUEUE_CLASS)
+
+
+def queue_class_for_arn(queue_arn: str) -> Optional[str]:
+    """Cola de la topología a la que pertenece un ARN (eventSourceARN de un record)"""
+    return queue_class_for_name(queue_arn.rsplit(':', 1)[-1])
+
+
+def queue_class_for_name(queue_name: str) -> Optional[str]:
+    """Cola de la topología por nombre (también acepta el nombre de su DLQ)"""
+    if queue_name.endswith(DLQ_SUFFIX):
+        queue_name = queue_name[:-len(DLQ_SUFFIX)]
+    for queue_class, queue in QUEUE_TOPOLOGY.items():
+        if queue.name == queue_name:
+            return queue_class
+    return None
+
+
+def event_source_mapping(queue_class: str) -> Dict[str, Any]:
+    """Parámetros de lambda.create_event_source_mapping para una cola"""
+    queue = QUEUE_TOPOLOGY[queue_class]
+    return {
+        'BatchSize': queue.batch_size,
+        'MaximumBatchingWindowInSeconds': queue.batching_window_seconds,
+        'ScalingConfig': {'MaximumConcurrency': queue.max_concurrency},
+        # El procesador devuelve batchItemFailures: solo se reintentan los fallidos
+        'FunctionResponseTypes': ['ReportBatchItemFailures']
+    }
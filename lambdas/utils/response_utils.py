@@ -1,10 +1,14 @@
 import json
 from typing import Dict, Any, Optional
 from models import TaskResponse, Task
-from datetime import datetime
+from datetime import datetime, timezone
 
 
-def success_response(status_code: int, message: str, task: Optional[Task] = None, tasks: Optional[list] = None) -> Dict[str, Any]:
+def success_response(status_code: int,
+                     message: str,
+                     task: Optional[Task] = None,
+                     tasks: Optional[list] = None,
+                     headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
     """Crear respuesta exitosa estándar"""
     response = TaskResponse(
         message=message,
@@ -12,13 +16,29 @@ def success_response(status_code: int, message: str, task: Optional[Task] = None
         tasks=tasks
     )
     
+    response_headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*'
+    }
+    if headers:
+        response_headers.update(headers)
+    
+    return {
+        'statusCode': status_code,
+        'headers': response_headers,
+        'body': json.dumps(response.dict(), default=str)
+    }
+
+
+def json_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Crear respuesta con un body JSON arbitrario"""
     return {
         'statusCode': status_code,
         'headers': {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*'
         },
-        'body': json.dumps(response.dict(), default=str)
+        'body': json.dumps(body, default=str)
     }
 
 
@@ -54,4 +74,45 @@ def get_path_parameter(event: Dict[str, Any], param_name: str) -> Optional[str]:
 
 def get_query_parameters(event: Dict[str, Any]) -> Dict[str, str]:
     """Obtener parámetros de query string"""
-    return event.get('queryStringParameters') or {}
\ No newline at end of file
+    return event.get('queryStringParameters') or {}
+
+
+def get_header(event: Dict[str, Any], header_name: str) -> Optional[str]:
+    """Obtener header HTTP (API Gateway no normaliza mayúsculas)"""
+    headers = event.get('headers') or {}
+    header_name = header_name.lower()
+    for name, value in headers.items():
+        if name.lower() == header_name:
+            return value
+    return None
+
+
+def version_etag(task: Task) -> Dict[str, str]:
+    """Header ETag con la versión de la tarea"""
+    return {'ETag': f'"{task.version}"'}
+
+
+def parse_if_match(value: Optional[str]) -> Optional[int]:
+    """Convertir un header If-Match ("3", W/"3") en la versión esperada"""
+    if not value or value.strip() == '*':
+        return None
+    
+    value = value.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise ValueError(f"If-Match inválido: {value}")
+
+
+def parse_datetime_param(value: Optional[str]) -> Optional[datetime]:
+    """Parsear un parámetro ISO 8601 a datetime UTC sin zona (formato guardado)"""
+    if not value:
+        return None
+    
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
\ No newline at end of file
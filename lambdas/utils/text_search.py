@@ -0,0 +1,49 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List
+
+
+# Palabras demasiado frecuentes para aportar al ranking
+STOPWORDS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'es', 'la', 'las', 'lo', 'los',
+    'para', 'por', 'que', 'se', 'su', 'un', 'una', 'y', 'o',
+    'an', 'and', 'for', 'in', 'is', 'of', 'on', 'or', 'the', 'to', 'with'
+}
+
+MIN_TOKEN_LENGTH = 2
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin acentos ("Revisión" -> "revision")"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Dividir texto en tokens normalizados para el índice"""
+    if not text:
+        return []
+    return [
+        token for token in _TOKEN_RE.findall(normalize(text))
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+
+def term_frequencies(text: str) -> Dict[str, int]:
+    """Frecuencia de cada token en un texto"""
+    return dict(Counter(tokenize(text)))
+
+
+def bm25(tf: int, df: int, doc_len: int, avg_doc_len: float, doc_count: int,
+         k1: float = 1.2, b: float = 0.75) -> float:
+    """Puntaje BM25 de un término en un documento"""
+    if tf <= 0 or doc_count <= 0:
+        return 0.0
+    
+    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+    length_norm = 1 - b + b * (doc_len / avg_doc_len if avg_doc_len else 1)
+    return idf * (tf * (k1 + 1)) / (tf + k1 * length_norm)
@@ -0,0 +1,120 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# Valor de get() para ids que todavía no se leyeron en la unidad de trabajo
+NOT_LOADED = object()
+
+_current_unit_of_work: ContextVar[Optional['UnitOfWork']] = ContextVar('unit_of_work', default=None)
+
+
+class UnitOfWork:
+    """Estado de una invocación compartido por servicios y repositorios
+    
+    - Identity map: cada tarea se lee de DynamoDB a lo sumo una vez por
+      invocación; las escrituras actualizan el mapa con el estado nuevo
+    - Escrituras encoladas: puts/deletes diferibles que se envían juntos
+      con batch_writer al terminar la invocación (best-effort)
+    """
+    
+    def __init__(self):
+        self._identity_map: Dict[str, Any] = {}
+        self._queued_writes: Dict[str, 'QueuedWrites'] = {}
+    
+    def get(self, key: str) -> Any:
+        """Entidad registrada (None si se sabe que no existe) o NOT_LOADED"""
+        return self._identity_map.get(key, NOT_LOADED)
+    
+    def register(self, key: str, entity: Any) -> None:
+        self._identity_map[key] = entity
+    
+    def evict(self, key: str) -> None:
+        self._identity_map.pop(key, None)
+    
+    def queue_put(self, table: Any, key_names: List[str], item: Dict[str, Any]) -> None:
+        self._queue(table, key_names, 'put', item)
+    
+    def queue_delete(self, table: Any, key_names: List[str], key: Dict[str, Any]) -> None:
+        self._queue(table, key_names, 'delete', key)
+    
+    def _queue(self, table: Any, key_names: List[str], action: str, payload: Dict[str, Any]) -> None:
+        queued = self._queued_writes.setdefault(table.name, QueuedWrites(table, key_names))
+        queued.writes.append((action, payload))
+    
+    def flush(self) -> None:
+        """Enviar las escrituras encoladas, un batch por tabla
+        
+        Los índices (tags, búsqueda) no son fatales, igual que en
+        _sync_indexes: la escritura de la tarea ya se hizo y fallar aquí
+        convertiría un request exitoso en un error (y un reintento en un
+        duplicado). Un error se registra y se sigue con las demás tablas.
+        """
+        queued_writes, self._queued_writes = self._queued_writes, {}
+        
+        for queued in queued_writes.values():
+            try:
+                # overwrite_by_pkeys deduplica put/delete sobre la misma clave
+                with queued.table.batch_writer(overwrite_by_pkeys=queued.key_names) as batch:
+                    for action, payload in queued.writes:
+                        if action == 'put':
+                            batch.put_item(Item=payload)
+                        else:
+                            batch.delete_item(Key=payload)
+            except Exception as e:
+                print(f"Error enviando escrituras de índice a {queued.table.name}: {str(e)}")
+
+
+class QueuedWrites:
+    """Escrituras pendientes de una tabla"""
+    
+    def __init__(self, table: Any, key_names: List[str]):
+        self.table = table
+        self.key_names = key_names
+        self.writes: List[Tuple[str, Dict[str, Any]]] = []
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Unidad de trabajo de la invocación en curso, si hay una abierta"""
+    return _current_unit_of_work.get()
+
+
+@contextmanager
+def unit_of_work():
+    """Abrir una unidad de trabajo; al salir se envían las escrituras encoladas
+    
+    Si ya hay una abierta se reutiliza (la externa es la que hace flush).
+    El flush también corre si el bloque lanzó (las escrituras ya hechas
+    conservan sus índices), pero nunca reemplaza esa excepción.
+    """
+    existing = _current_unit_of_work.get()
+    if existing is not None:
+        yield existing
+        return
+    
+    uow = UnitOfWork()
+    token = _current_unit_of_work.set(uow)
+    try:
+        yield uow
+    except BaseException:
+        _current_unit_of_work.reset(token)
+        try:
+            uow.flush()
+        except Exception as e:
+            print(f"Error enviando escrituras encoladas: {str(e)}")
+        raise
+    
+    _current_unit_of_work.reset(token)
+    uow.flush()
+
+
+def with_unit_of_work(handler: Callable) -> Callable:
+    """Decorador para lambda_handler: una unidad de trabajo por invocación"""
+    
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        with unit_of_work():
+            return handler(event, context)
+    
+    return wrapper
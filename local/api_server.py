@@ -1,21 +1,30 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, File, UploadFile, Header, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
-import json
+from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from datetime import datetime
+from typing import Optional
+import asyncio
 import base64
+import functools
 import sys
 import os
+from dotenv import load_dotenv
+
+# Cargar .env antes de importar el código de lambdas (que solo lee el entorno)
+load_dotenv()
 
 # Agregar el directorio lambdas al path para importar
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
 
-from models import TaskCreate, TaskUpdate, Task, TaskResponse
-from handlers import create_task_handler
-from handlers import list_tasks_handler
-from handlers import update_task_handler
-from handlers import delete_task_handler
-from handlers import upload_file_handler
-from services.task_service import TaskService
+from models import TaskCreate, TaskUpdate, TaskTagsUpdate, TaskResponse
+from services.task_service import IdempotencyKeyReusedError
+from repositories.task_repository import VersionConflictError
+from repositories.cached_task_repository import CachedTaskRepository
+from services.stats_service import DEFAULT_TIMESERIES_RANGES
+from utils.response_utils import parse_if_match, parse_datetime_param
+from runtime import Metrics, SideEffectTracker, WorkerPool
 
 app = FastAPI(
     title="Task Manager API",
@@ -23,6 +32,73 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Mismos límites que los handlers Lambda
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+MAX_IDS = 500
+MAX_SEARCH_LIMIT = 100
+
+# boto3 es bloqueante: los servicios corren en un pool acotado de hilos
+# (un TaskService por hilo) para no frenar el event loop. Las notificaciones
+# SNS/SQS de la creación se publican en segundo plano y se drenan al apagar.
+WORKER_THREADS = int(os.getenv('API_HANDLER_WORKERS', '16'))
+SHUTDOWN_GRACE_SECONDS = float(os.getenv('API_SHUTDOWN_GRACE_SECONDS', '20'))
+
+side_effects = SideEffectTracker(max_workers=int(os.getenv('API_SIDE_EFFECT_WORKERS', '4')))
+worker_pool = WorkerPool(max_workers=WORKER_THREADS, side_effects=side_effects)
+metrics = Metrics()
+
+
+async def call_service(fn):
+    """Ejecutar fn(task_service) en el pool de trabajo"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(worker_pool.executor, functools.partial(worker_pool.run_with_service, fn))
+
+
+def error(status_code: int, message: str) -> HTTPException:
+    """Error de una ruta; lambda_error_handler lo responde como error_response"""
+    return HTTPException(status_code=status_code, detail=message)
+
+
+@app.exception_handler(StarletteHTTPException)
+async def lambda_error_handler(request: Request, exc: StarletteHTTPException) -> JSONResponse:
+    """Cuerpo {"message": ...} como error_response de los handlers Lambda
+    
+    Cubre también los errores propios de FastAPI (404 de ruta, 405).
+    """
+    return JSONResponse(status_code=exc.status_code, content={'message': str(exc.detail)}, headers=exc.headers)
+
+
+@app.exception_handler(RequestValidationError)
+async def lambda_validation_error_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
+    """Parámetros inválidos: mismo cuerpo, con el primer error de validación"""
+    first = exc.errors()[0] if exc.errors() else {}
+    location = '.'.join(str(part) for part in first.get('loc', ()))
+    return JSONResponse(status_code=422, content={'message': f"{location}: {first.get('msg', 'inválido')}"})
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    started = metrics.start_request()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Ruta como plantilla (/tasks/{task_id}) para no crear una serie por ID
+        route = request.scope.get('route')
+        metrics.end_request(request.method, route.path if route else 'unmatched', status_code, started)
+
+
+@app.on_event("shutdown")
+def drain_side_effects():
+    """Apagado ordenado: esperar las notificaciones pendientes antes de salir"""
+    pending = side_effects.drain(timeout=SHUTDOWN_GRACE_SECONDS)
+    if pending:
+        print(f"⚠️ {pending} efectos secundarios sin terminar al apagar")
+    worker_pool.shutdown()
+
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -40,26 +116,50 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "environment": "local"}
+    return {
+        "status": "healthy",
+        "environment": "local",
+        "task_cache": CachedTaskRepository.stats.snapshot()
+    }
 
 
-@app.post("/tasks", response_model=TaskResponse)
-async def create_task_endpoint(task: TaskCreate):
-    """Crear una nueva tarea"""
-    event = {
-        'body': task.json(),
-        'httpMethod': 'POST'
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Métricas en formato de exposición Prometheus"""
+    cache_stats = CachedTaskRepository.stats.snapshot()
+    counters = {
+        'side_effects_completed_total': side_effects.completed,
+        'side_effects_failed_total': side_effects.failed
     }
+    counters.update({
+        f'task_cache_{outcome}_total': count for outcome, count in cache_stats['counts'].items()
+    })
+    gauges = {
+        'side_effects_in_flight': side_effects.in_flight,
+        'worker_threads': worker_pool.max_workers,
+        'task_cache_hit_ratio': cache_stats['hit_ratio']
+    }
+    return Response(content=metrics.render(counters, gauges), media_type='text/plain; version=0.0.4')
+
+
+@app.post("/tasks", response_model=TaskResponse, status_code=201)
+async def create_task_endpoint(task: TaskCreate, response: Response, idempotency_key: Optional[str] = Header(None)):
+    """Crear una nueva tarea"""
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise error(400, 'Idempotency-Key inválida')
     
-    response = create_task_handler.lambda_handler(event, None)
-    
-    if response['statusCode'] != 201:
-        raise HTTPException(
-            status_code=response['statusCode'],
-            detail=json.loads(response['body'])
-        )
+    try:
+        if idempotency_key:
+            created, replayed = await call_service(lambda service: service.create_task_idempotent(task, idempotency_key))
+            response.headers['Idempotent-Replayed'] = 'true' if replayed else 'false'
+        else:
+            created = await call_service(lambda service: service.create_task(task))
+    except IdempotencyKeyReusedError as e:
+        raise error(422, str(e))
+    except Exception as e:
+        raise error(400, f'Error al crear la tarea: {str(e)}')
     
-    return json.loads(response['body'])
+    return TaskResponse(message="Tarea creada exitosamente", task=created)
 
 
 @app.get("/tasks", response_model=TaskResponse)
@@ -67,88 +167,148 @@ async def list_tasks_endpoint(
     status: Optional[str] = None,
     priority: Optional[str] = None,
     tag: Optional[str] = None,
+    tag_mode: str = 'and',
+    due_before: Optional[str] = None,
+    due_after: Optional[str] = None,
+    ids: Optional[str] = None,
     limit: int = 50
 ):
     """Listar tareas con filtros opcionales"""
-    query_params = {}
-    if status:
-        query_params['status'] = status
-    if priority:
-        query_params['priority'] = priority
-    if tag:
-        query_params['tag'] = tag
-    if limit:
-        query_params['limit'] = str(limit)
+    if tag_mode not in ('and', 'or'):
+        raise error(400, "tag_mode debe ser 'and' u 'or'")
     
-    event = {
-        'queryStringParameters': query_params,
-        'httpMethod': 'GET'
-    }
+    try:
+        due_after_dt = parse_datetime_param(due_after)
+        due_before_dt = parse_datetime_param(due_before)
+    except ValueError:
+        raise error(400, 'due_after/due_before deben ser fechas ISO 8601')
     
-    response = list_tasks_handler.lambda_handler(event, None)
+    task_ids = [task_id.strip() for task_id in (ids or '').split(',') if task_id.strip()]
+    if len(task_ids) > MAX_IDS:
+        raise error(400, f'Máximo {MAX_IDS} ids por request')
     
-    if response['statusCode'] != 200:
-        raise HTTPException(
-            status_code=response['statusCode'],
-            detail=json.loads(response['body'])
+    def list_tasks(service):
+        if ids is not None:
+            return service.get_tasks_by_ids(task_ids) if task_ids else []
+        if due_after_dt or due_before_dt:
+            return service.list_tasks_due(
+                due_after=due_after_dt,
+                due_before=due_before_dt,
+                status_filter=status,
+                priority_filter=priority,
+                limit=limit
+            )
+        return service.list_tasks(
+            status_filter=status,
+            priority_filter=priority,
+            tag_filter=tag,
+            limit=limit,
+            tag_match_all=tag_mode == 'and'
         )
     
-    return json.loads(response['body'])
+    try:
+        tasks = await call_service(list_tasks)
+    except Exception as e:
+        raise error(500, f'Error al obtener las tareas: {str(e)}')
+    
+    return TaskResponse(message=f"Se encontraron {len(tasks)} tareas", tasks=tasks)
+
+
+@app.get("/tasks/tags")
+async def list_tags_endpoint(prefix: str = '', limit: int = 20):
+    """Listar tags con su número de tareas (autocompletado)"""
+    try:
+        tags = await call_service(lambda service: service.get_tag_counts(prefix=prefix, limit=limit))
+    except Exception as e:
+        raise error(500, f'Error al obtener los tags: {str(e)}')
+    
+    return {'message': f"Se encontraron {len(tags)} tags", 'tags': tags}
+
+
+@app.get("/tasks/search", response_model=TaskResponse)
+async def search_tasks_endpoint(q: str, limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT)):
+    """Buscar tareas por palabras del título o descripción"""
+    query = q.strip()
+    if not query:
+        raise error(400, 'Parámetro q requerido')
+    
+    try:
+        tasks = await call_service(lambda service: service.search_tasks(query, limit=limit))
+    except Exception as e:
+        raise error(500, f'Error al buscar tareas: {str(e)}')
+    
+    return TaskResponse(message=f"Se encontraron {len(tasks)} tareas", tasks=tasks)
 
 
 @app.get("/tasks/{task_id}", response_model=TaskResponse)
 async def get_task_endpoint(task_id: str):
     """Obtener una tarea específica"""
-    # Usar el servicio para obtener la tarea
-    task_service = TaskService()
-    task = task_service.get_task_by_id(task_id)
+    task = await call_service(lambda service: service.get_task_by_id(task_id))
     
     if not task:
-        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+        raise error(404, 'Tarea no encontrada')
     
     return TaskResponse(message="Tarea encontrada", task=task)
 
 
 @app.put("/tasks/{task_id}", response_model=TaskResponse)
-async def update_task_endpoint(task_id: str, task_update: TaskUpdate):
+async def update_task_endpoint(task_id: str,
+                               task_update: TaskUpdate,
+                               response: Response,
+                               if_match: Optional[str] = Header(None)):
     """Actualizar una tarea existente"""
-    event = {
-        'pathParameters': {'id': task_id},
-        'body': task_update.json(exclude_unset=True),
-        'httpMethod': 'PUT'
-    }
+    try:
+        expected_version = parse_if_match(if_match)
+        updated = await call_service(
+            lambda service: service.update_task(task_id, task_update, expected_version=expected_version)
+        )
+    except VersionConflictError:
+        raise error(412, 'La tarea fue modificada por otro cliente (If-Match no coincide)')
+    except Exception as e:
+        raise error(400, f'Error al actualizar la tarea: {str(e)}')
     
-    response = update_task_handler.lambda_handler(event, None)
+    if not updated:
+        raise error(404, 'Tarea no encontrada')
     
-    if response['statusCode'] != 200:
-        raise HTTPException(
-            status_code=response['statusCode'],
-            detail=json.loads(response['body'])
+    response.headers['ETag'] = f'"{updated.version}"'
+    return TaskResponse(message="Tarea actualizada exitosamente", task=updated)
+
+
+@app.patch("/tasks/{task_id}/tags", response_model=TaskResponse)
+async def update_tags_endpoint(task_id: str, tags_update: TaskTagsUpdate, response: Response):
+    """Agregar/quitar tags de una tarea"""
+    if not tags_update.add and not tags_update.remove:
+        raise error(400, 'Se requiere al menos un tag en add o remove')
+    
+    try:
+        updated = await call_service(
+            lambda service: service.update_tags(task_id, add=tags_update.add, remove=tags_update.remove)
         )
+    except Exception as e:
+        raise error(400, f'Error al actualizar los tags: {str(e)}')
+    
+    if not updated:
+        raise error(404, 'Tarea no encontrada')
     
-    return json.loads(response['body'])
+    response.headers['ETag'] = f'"{updated.version}"'
+    return TaskResponse(message="Tags actualizados exitosamente", task=updated)
 
 
 @app.delete("/tasks/{task_id}", response_model=TaskResponse)
 async def delete_task_endpoint(task_id: str):
     """Eliminar una tarea"""
-    event = {
-        'pathParameters': {'id': task_id},
-        'httpMethod': 'DELETE'
-    }
-    
-    response = delete_task_handler.lambda_handler(event, None)
+    try:
+        deleted = await call_service(lambda service: service.delete_task(task_id))
+    except Exception as e:
+        raise error(400, f'Error al eliminar la tarea: {str(e)}')
     
-    if response['statusCode'] != 200:
-        raise HTTPException(
-            status_code=response['statusCode'],
-            detail=json.loads(response['body'])
-        )
+    if not deleted:
+        raise error(404, 'Tarea no encontrada')
     
-    return json.loads(response['body'])
+    return TaskResponse(message=f"Tarea '{deleted.title}' eliminada exitosamente")
 
 
-@app.post("/tasks/{task_id}/upload")
+@app.post("/tasks/{task_id}/upload", status_code=201)
 async def upload_file_endpoint(task_id: str, file: UploadFile = File(...)):
     """Subir archivo a una tarea"""
     
@@ -156,103 +316,80 @@ async def upload_file_endpoint(task_id: str, file: UploadFile = File(...)):
     file_content = await file.read()
     file_content_b64 = base64.b64encode(file_content).decode('utf-8')
     
-    event = {
-        'pathParameters': {'id': task_id},
-        'body': json.dumps({
-            'file_content': file_content_b64,
-            'file_name': file.filename,
-            'content_type': file.content_type or 'application/octet-stream'
-        }),
-        'httpMethod': 'POST'
-    }
+    def upload(service):
+        if not service.get_task_by_id(task_id):
+            return None
+        
+        file_service = worker_pool.file_service()
+        s3_key = file_service.upload_file(
+            file_content=file_content_b64,
+            file_name=file.filename,
+            content_type=file.content_type or 'application/octet-stream',
+            task_id=task_id
+        )
+        
+        # Escritura condicional: si la tarea desapareció, no dejar el archivo huérfano
+        if not service.add_file_to_task(task_id, s3_key):
+            file_service.delete_files([s3_key])
+            return None
+        
+        return s3_key, file_service.generate_file_url(s3_key)
     
-    response = upload_file_handler.lambda_handler(event, None)
+    try:
+        uploaded = await call_service(upload)
+    except Exception as e:
+        raise error(400, f'Error al subir el archivo: {str(e)}')
     
-    if response['statusCode'] != 201:
-        raise HTTPException(
-            status_code=response['statusCode'],
-            detail=json.loads(response['body'])
-        )
+    if not uploaded:
+        raise error(404, 'Tarea no encontrada')
     
-    return json.loads(response['body'])
+    s3_key, file_url = uploaded
+    return {
+        'message': 'Archivo subido exitosamente',
+        'file_url': file_url,
+        'task_id': task_id,
+        's3_key': s3_key
+    }
 
 
 @app.get("/tasks/stats/summary")
 async def get_task_stats():
-    """Obtener estadísticas de tareas"""
+    """Obtener estadísticas de tareas (tabla completa, Scan segmentado en paralelo)"""
     try:
-        # Obtener todas las tareas
-        event = {'queryStringParameters': {'limit': '1000'}}
-        response = list_tasks_handler.lambda_handler(event, None)
-        
-        if response['statusCode'] != 200:
-            raise HTTPException(status_code=500, detail="Error obteniendo tareas")
-        
-        data = json.loads(response['body'])
-        tasks = data.get('tasks', [])
-        
-        # Calcular estadísticas
-        stats = {
-            'total_tasks': len(tasks),
-            'by_status': {},
-            'by_priority': {},
-            'with_files': 0,
-            'overdue': 0
-        }
-        
-        from datetime import datetime
-        now = datetime.utcnow()
-        
-        for task in tasks:
-            # Status
-            status = task['status']
-            stats['by_status'][status] = stats['by_status'].get(status, 0) + 1
-            
-            # Priority
-            priority = task['priority']
-            stats['by_priority'][priority] = stats['by_priority'].get(priority, 0) + 1
-            
-            # Files
-            if task.get('files'):
-                stats['with_files'] += 1
-            
-            # Overdue
-            if task.get('due_date'):
-                try:
-                    # Parsear fecha compatible con Python 3.6
-                    due_date_str = task['due_date']
-                    # Limpiar formato de fecha
-                    if due_date_str.endswith('Z'):
-                        due_date_str = due_date_str[:-1]
-                    elif due_date_str.endswith('+00:00'):
-                        due_date_str = due_date_str[:-6]
-                    elif '+' in due_date_str:
-                        due_date_str = due_date_str.split('+')[0]
-                    
-                    # Intentar diferentes formatos
-                    try:
-                        due_date = datetime.strptime(due_date_str, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        try:
-                            due_date = datetime.strptime(due_date_str, '%Y-%m-%d %H:%M:%S')
-                        except ValueError:
-                            try:
-                                due_date = datetime.strptime(due_date_str, '%Y-%m-%dT%H:%M:%S.%f')
-                            except ValueError:
-                                due_date = datetime.strptime(due_date_str, '%Y-%m-%dT%H:%M:%S')
-                    
-                    if due_date < now and task['status'] != 'completed':
-                        stats['overdue'] += 1
-                except Exception:
-                    # Si no se puede parsear la fecha, continuar sin contar como vencida
-                    pass
-        
+        stats = await call_service(lambda service: worker_pool.stats_service().summary())
         return {"message": "Estadísticas generadas", "stats": stats}
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generando estadísticas: {str(e)}")
+        raise error(500, f'Error generando estadísticas: {str(e)}')
+
+
+@app.get("/tasks/stats/timeseries")
+async def get_task_timeseries(
+    start: Optional[str] = Query(None, alias='from'),
+    end: Optional[str] = Query(None, alias='to'),
+    granularity: str = 'hour'
+):
+    """Tareas creadas/completadas por hora o día (rollups, un solo Query)"""
+    if granularity not in DEFAULT_TIMESERIES_RANGES:
+        raise error(400, "granularity debe ser 'hour' o 'day'")
+    
+    try:
+        end_dt = parse_datetime_param(end) or datetime.utcnow()
+        start_dt = parse_datetime_param(start) or end_dt - DEFAULT_TIMESERIES_RANGES[granularity]
+    except ValueError:
+        raise error(400, 'from/to deben ser fechas ISO 8601')
+    
+    try:
+        series = await call_service(lambda service: worker_pool.stats_service().timeseries(start_dt, end_dt, granularity))
+    except ValueError as e:
+        raise error(400, str(e))
+    
+    return {'message': f"Serie con {len(series)} buckets", 'granularity': granularity, 'series': series}
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    
+    # Varios workers: usar gunicorn con local/gunicorn.conf.py (preload + drenado)
+    uvicorn.run("api_server:app", host="0.0.0.0", port=8000, reload=True,
+                app_dir=os.path.dirname(os.path.abspath(__file__)))
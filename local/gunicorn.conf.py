@@ -0,0 +1,23 @@
+"""
+Configuración de gunicorn para el runtime HTTP en contenedores
+
+Uso:
+    gunicorn -c local/gunicorn.conf.py api_server:app
+"""
+
+import multiprocessing
+import os
+
+# Importar la app una sola vez en el master y compartirla entre workers
+# (copy-on-write). Los clientes boto3 se crean después del fork, en cada hilo.
+preload_app = True
+pythonpath = os.path.dirname(os.path.abspath(__file__))
+worker_class = 'uvicorn.workers.UvicornWorker'
+
+bind = os.getenv('API_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Tiempo para que cada worker drene requests y efectos secundarios en curso
+# (debe superar API_SHUTDOWN_GRACE_SECONDS)
+graceful_timeout = int(os.getenv('API_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
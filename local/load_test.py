@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del servidor local: latencia p50/p99 a concurrencia creciente
+
+Uso:
+    python local/api_server.py            # en otra terminal
+    python local/load_test.py --levels 1,4,16,64 --requests 400
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def seed_tasks(base_url, count):
+    """Crear tareas para que las lecturas tengan datos reales"""
+    task_ids = []
+    for n in range(count):
+        response = requests.post(f'{base_url}/tasks', json={
+            'title': f'Carga {n}',
+            'description': 'Tarea creada por la prueba de carga',
+            'tags': ['carga']
+        })
+        response.raise_for_status()
+        task_ids.append(response.json()['task']['id'])
+    return task_ids
+
+
+def run_level(base_url, task_ids, concurrency, total_requests):
+    """Lanzar total_requests lecturas con `concurrency` clientes en paralelo"""
+    session_pool = [requests.Session() for _ in range(concurrency)]
+    
+    def one_request(n):
+        session = session_pool[n % concurrency]
+        # Mezcla de lecturas: por ID, listado por tag y búsqueda
+        if n % 4 == 0:
+            url = f'{base_url}/tasks?tag=carga&limit=20'
+        elif n % 4 == 1:
+            url = f'{base_url}/tasks/search?q=carga&limit=10'
+        else:
+            url = f'{base_url}/tasks/{task_ids[n % len(task_ids)]}'
+        
+        started = time.perf_counter()
+        try:
+            ok = session.get(url, timeout=30).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_request, range(total_requests)))
+    elapsed = time.perf_counter() - started
+    
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    return {
+        'concurrency': concurrency,
+        'requests': total_requests,
+        'errors': sum(1 for _, ok in results if not ok),
+        'rps': total_requests / elapsed,
+        'p50_ms': percentile(latencies, 0.50),
+        'p99_ms': percentile(latencies, 0.99),
+        'mean_ms': statistics.mean(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga del API local')
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--levels', default='1,4,16,64', help='Niveles de concurrencia separados por coma')
+    parser.add_argument('--requests', type=int, default=400, help='Requests por nivel')
+    parser.add_argument('--seed', type=int, default=50, help='Tareas a crear antes de medir')
+    args = parser.parse_args()
+    
+    print(f"🌱 Creando {args.seed} tareas en {args.url}...")
+    task_ids = seed_tasks(args.url, args.seed)
+    
+    print(f"\n{'conc':>6} {'req':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for level in (int(level) for level in args.levels.split(',')):
+        result = run_level(args.url, task_ids, level, args.requests)
+        print(f"{result['concurrency']:>6} {result['requests']:>6} {result['errors']:>5} "
+              f"{result['rps']:>9.1f} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['mean_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Piezas del runtime HTTP en contenedores: pool de trabajo, efectos
+secundarios en segundo plano con drenado y métricas Prometheus
+"""
+
+import bisect
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.file_service import FileService
+from services.stats_service import StatsService
+from services.task_service import TaskService
+from utils.unit_of_work import unit_of_work
+
+
+# Límites de los buckets del histograma de latencia (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class SideEffectTracker:
+    """Ejecuta efectos secundarios (SNS/SQS) fuera del request y permite drenarlos
+    
+    Implementa submit() como un Executor para pasarse a TaskService, que le
+    entrega las publicaciones sin envolver: los errores se registran y se
+    cuentan aquí (side_effects_failed_total). Una vez iniciado el apagado,
+    lo nuevo se ejecuta en línea para no perderlo.
+    """
+    
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='side-effect')
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._draining = False
+        self.completed = 0
+        self.failed = 0
+    
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            draining = self._draining
+        
+        if draining:
+            future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            self._record(future)
+            return future
+        
+        future = self._executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._in_flight.add(future)
+        future.add_done_callback(self._on_done)
+        return future
+    
+    def _on_done(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight.discard(future)
+        self._record(future)
+    
+    def _record(self, future: Future) -> None:
+        error = future.exception()
+        if error is not None:
+            print(f"Error en efecto secundario: {str(error)}")
+        with self._lock:
+            if error is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+    
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+    
+    def drain(self, timeout: float) -> int:
+        """Esperar los efectos pendientes hasta timeout; retorna los que quedaron sin terminar"""
+        with self._lock:
+            self._draining = True
+            pending = list(self._in_flight)
+        
+        _, not_done = wait(pending, timeout=timeout)
+        self._executor.shutdown(wait=False)
+        return len(not_done)
+
+
+class WorkerPool:
+    """Pool acotado de hilos para código bloqueante, con un TaskService por hilo
+    
+    Cada hilo conserva su TaskService (y con él sus clientes boto3 y su pool
+    de conexiones HTTP) entre requests.
+    """
+    
+    def __init__(self, max_workers: int, side_effects: Optional[SideEffectTracker] = None):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api-worker')
+        self.side_effects = side_effects
+        self._state = threading.local()
+    
+    def task_service(self) -> TaskService:
+        """TaskService del hilo actual"""
+        return self._per_thread('task_service', lambda: TaskService(side_effect_executor=self.side_effects))
+    
+    def file_service(self) -> FileService:
+        """FileService del hilo actual"""
+        return self._per_thread('file_service', FileService)
+    
+    def stats_service(self) -> StatsService:
+        """StatsService del hilo actual"""
+        return self._per_thread('stats_service', StatsService)
+    
+    def _per_thread(self, name: str, factory: Callable[[], object]):
+        instance = getattr(self._state, name, None)
+        if instance is None:
+            instance = factory()
+            setattr(self._state, name, instance)
+        return instance
+    
+    def run_with_service(self, fn: Callable[[TaskService], object]) -> object:
+        """Ejecutar fn(task_service) dentro de una unidad de trabajo (en el hilo del pool)"""
+        with unit_of_work():
+            return fn(self.task_service())
+    
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+class Metrics:
+    """Contadores e histogramas de requests en formato de exposición Prometheus"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._latency: Dict[Tuple[str, str], List] = {}
+        self.in_flight = 0
+    
+    def start_request(self) -> float:
+        with self._lock:
+            self.in_flight += 1
+        return time.perf_counter()
+    
+    def end_request(self, method: str, route: str, status: int, started: float) -> None:
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            
+            # [conteo por bucket, suma, total]
+            histogram = self._latency.setdefault((method, route), [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0])
+            histogram[0][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+    
+    def render(self, counters: Dict[str, float], gauges: Dict[str, float]) -> str:
+        """Texto para /metrics (los contadores y gauges externos se agregan al final)"""
+        lines = ['# TYPE http_requests_total counter']
+        with self._lock:
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+            
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for (method, route), (buckets, total_seconds, count) in sorted(self._latency.items()):
+                labels = f'method="{method}",route="{route}"'
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += bucket_count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {total_seconds:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+            
+            gauges = dict(gauges, http_requests_in_flight=self.in_flight)
+        
+        for metric_type, values in (('counter', counters), ('gauge', gauges)):
+            for name, value in values.items():
+                lines.append(f'# TYPE {name} {metric_type}')
+                lines.append(f'{name} {value}')
+        
+        return '\n'.join(lines) + '\n'
@@ -7,8 +7,14 @@ import boto3
 import json
 import time
 import os
+import sys
 from dotenv import load_dotenv
 
+# Topología de colas compartida con QueueService
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
+from utils.notification_attributes import ALERTS_FILTER_POLICY, PROCESSOR_FILTER_POLICY
+from utils.queue_topology import DEFAULT_QUEUE_CLASS, MAX_RECEIVE_COUNT, QUEUE_TOPOLOGY
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -34,6 +40,35 @@ def get_resource(service_name):
         region_name=AWS_REGION
     )
 
+# GSI disperso de vencimientos (ver TaskRepository.find_due_between)
+DUE_DATE_INDEX = {
+    'IndexName': 'due-date-index',
+    'KeySchema': [
+        {
+            'AttributeName': 'due_shard',
+            'KeyType': 'HASH'
+        },
+        {
+            'AttributeName': 'due_date',
+            'KeyType': 'RANGE'
+        }
+    ],
+    'Projection': {
+        'ProjectionType': 'ALL'
+    }
+}
+
+DUE_DATE_INDEX_ATTRIBUTES = [
+    {
+        'AttributeName': 'due_shard',
+        'AttributeType': 'S'
+    },
+    {
+        'AttributeName': 'due_date',
+        'AttributeType': 'S'
+    }
+]
+
 def create_dynamodb_table():
     """Crear tabla DynamoDB para tareas"""
     print("Creando tabla DynamoDB...")
@@ -47,8 +82,9 @@ def create_dynamodb_table():
         table = dynamodb.Table(table_name)
         table.load()
         print(f"Tabla {table_name} ya existe")
+        ensure_due_date_index(table)
         return
-    except:
+    except dynamodb.meta.client.exceptions.ResourceNotFoundException:
         pass
     
     # Crear tabla
@@ -65,6 +101,66 @@ def create_dynamodb_table():
                 'AttributeName': 'id',
                 'AttributeType': 'S'
             }
+        ] + DUE_DATE_INDEX_ATTRIBUTES,
+        GlobalSecondaryIndexes=[DUE_DATE_INDEX],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    
+    # Esperar a que la tabla esté activa
+    table.wait_until_exists()
+    print(f"Tabla {table_name} creada exitosamente")
+
+def ensure_due_date_index(table):
+    """Agregar el GSI de vencimientos a una tabla creada antes de que existiera"""
+    existing = [index['IndexName'] for index in (table.global_secondary_indexes or [])]
+    if DUE_DATE_INDEX['IndexName'] in existing:
+        return
+    
+    print(f"Agregando índice {DUE_DATE_INDEX['IndexName']}...")
+    table.update(
+        AttributeDefinitions=DUE_DATE_INDEX_ATTRIBUTES,
+        GlobalSecondaryIndexUpdates=[{'Create': DUE_DATE_INDEX}]
+    )
+
+def create_index_table():
+    """Crear tabla DynamoDB de índices (tags, búsqueda, idempotencia) con clave compuesta pk/sk"""
+    print("Creando tabla DynamoDB de índices...")
+    
+    dynamodb = get_resource('dynamodb')
+    
+    table_name = 'tasks-index-table'
+    
+    try:
+        # Verificar si la tabla ya existe
+        table = dynamodb.Table(table_name)
+        table.load()
+        print(f"Tabla {table_name} ya existe")
+        return
+    except:
+        pass
+    
+    # Crear tabla
+    table = dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {
+                'AttributeName': 'pk',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': 'sk',
+                'KeyType': 'RANGE'
+            }
+        ],
+        AttributeDefinitions=[
+            {
+                'AttributeName': 'pk',
+                'AttributeType': 'S'
+            },
+            {
+                'AttributeName': 'sk',
+                'AttributeType': 'S'
+            }
         ],
         BillingMode='PAY_PER_REQUEST'
     )
@@ -72,6 +168,28 @@ def create_dynamodb_table():
     # Esperar a que la tabla esté activa
     table.wait_until_exists()
     print(f"Tabla {table_name} creada exitosamente")
+    
+    # Las claves de idempotencia expiran con TTL
+    dynamodb.meta.client.update_time_to_live(
+        TableName=table_name,
+        TimeToLiveSpecification={
+            'Enabled': True,
+            'AttributeName': 'expires_at'
+        }
+    )
+    print(f"TTL habilitado en {table_name} (expires_at)")
+
+def backfill_indexes():
+    """Preparar las tareas ya existentes para los índices (idempotente)
+    
+    Usa el TaskRepository de lambdas/ contra LocalStack.
+    """
+    os.environ.setdefault('LOCALSTACK_ENDPOINT', LOCALSTACK_ENDPOINT)
+    from repositories.task_repository import TaskRepository
+    
+    repository = TaskRepository()
+    print(f"Índice de vencimientos: {repository.backfill_due_date_index()} tareas actualizadas")
+    print(f"Índice de tags: {repository.backfill_tag_index()} tareas indexadas")
 
 def create_s3_bucket():
     """Crear bucket S3 para archivos"""
@@ -105,44 +223,85 @@ def create_s3_bucket():
     
     print("Estructura de carpetas creada en S3")
 
-def create_sqs_queue():
-    """Crear cola SQS para procesamiento en background"""
-    print("Creando cola SQS...")
-    
-    sqs = get_client('sqs')
-    queue_name = 'task-queue'
+def configure_claim_check_lifecycle():
+    """Expirar los cuerpos de mensajes grandes guardados en S3 (claim-check)
     
+    Prefijo CLAIM_CHECK_PREFIX de utils/message_codec.py. Se borran cuando ya
+    no puede quedar un mensaje que los referencie (retención de 14 días).
+    """
+    s3 = get_client('s3')
+    s3.put_bucket_lifecycle_configuration(
+        Bucket='task-manager-files',
+        LifecycleConfiguration={'Rules': [{
+            'ID': 'expire-message-bodies',
+            'Filter': {'Prefix': 'messages/'},
+            'Status': 'Enabled',
+            'Expiration': {'Days': 15}
+        }]}
+    )
+    print("Ciclo de vida de messages/ configurado en S3")
+
+def get_or_create_queue(sqs, queue_name, attributes):
+    """Crear una cola (o actualizar sus atributos si ya existe) y retornar su URL"""
     try:
-        # Crear cola
-        response = sqs.create_queue(
-            QueueName=queue_name,
-            Attributes={
-                'VisibilityTimeout': '300',
-                'MessageRetentionPeriod': '1209600',  # 14 días
-                'ReceiveMessageWaitTimeSeconds': '20'  # Long polling
-            }
-        )
-        
-        queue_url = response['QueueUrl']
-        print(f"Cola SQS creada: {queue_url}")
-        
-        return queue_url
+        response = sqs.create_queue(QueueName=queue_name, Attributes=attributes)
+        print(f"Cola SQS creada: {response['QueueUrl']}")
+        return response['QueueUrl']
         
     except Exception as e:
         if 'QueueAlreadyExists' in str(e):
             # Obtener URL de cola existente
-            response = sqs.get_queue_url(QueueName=queue_name)
-            queue_url = response['QueueUrl']
+            queue_url = sqs.get_queue_url(QueueName=queue_name)['QueueUrl']
+            sqs.set_queue_attributes(QueueUrl=queue_url, Attributes=attributes)
             print(f"Cola SQS ya existe: {queue_url}")
             return queue_url
         else:
             raise e
 
-def create_sns_topic():
-    """Crear tópico SNS para notificaciones"""
+def create_sqs_queue():
+    """Crear las colas SQS de la topología (una por prioridad más la bulk)
+    
+    Cada cola tiene su DLQ (<cola>-dlq) y una redrive policy que mueve ahí
+    los mensajes recibidos MAX_RECEIVE_COUNT veces. Retorna {clase de
+    cola: URL}. La cola 'standard' conserva el nombre task-queue y es la
+    que queda en SQS_QUEUE_URL.
+    """
+    print("Creando colas SQS...")
+    
+    sqs = get_client('sqs')
+    queue_urls = {}
+    
+    for queue_class, queue in QUEUE_TOPOLOGY.items():
+        dlq_url = get_or_create_queue(sqs, queue.dlq_name, {
+            'MessageRetentionPeriod': '1209600'  # 14 días para inspeccionar y hacer redrive
+        })
+        dlq_arn = sqs.get_queue_attributes(
+            QueueUrl=dlq_url,
+            AttributeNames=['QueueArn']
+        )['Attributes']['QueueArn']
+        
+        queue_urls[queue_class] = get_or_create_queue(sqs, queue.name, {
+            'VisibilityTimeout': str(queue.visibility_timeout),
+            'MessageRetentionPeriod': '1209600',  # 14 días
+            'ReceiveMessageWaitTimeSeconds': '20',  # Long polling
+            'RedrivePolicy': json.dumps({
+                'deadLetterTargetArn': dlq_arn,
+                'maxReceiveCount': str(MAX_RECEIVE_COUNT)
+            })
+        })
+    
+    return queue_urls
+
+def create_sns_topic(queue_urls):
+    """Crear tópico SNS para notificaciones
+    
+    La cola 'standard' se suscribe con PROCESSOR_FILTER_POLICY: SNS solo le
+    entrega los eventos que el SQS processor usa (utils/notification_attributes.py).
+    """
     print("Creando tópico SNS...")
     
     sns = get_client('sns')
+    sqs = get_client('sqs')
     topic_name = 'task-notifications'
     
     try:
@@ -151,12 +310,30 @@ def create_sns_topic():
         topic_arn = response['TopicArn']
         print(f"Tópico SNS creado: {topic_arn}")
         
-        # Suscribir un endpoint de email (opcional para desarrollo)
-        # sns.subscribe(
-        #     TopicArn=topic_arn,
-        #     Protocol='email',
-        #     Endpoint='test@example.com'
-        # )
+        queue_arn = sqs.get_queue_attributes(
+            QueueUrl=queue_urls[DEFAULT_QUEUE_CLASS],
+            AttributeNames=['QueueArn']
+        )['Attributes']['QueueArn']
+        sns.subscribe(
+            TopicArn=topic_arn,
+            Protocol='sqs',
+            Endpoint=queue_arn,
+            Attributes={'FilterPolicy': json.dumps(PROCESSOR_FILTER_POLICY)},
+            ReturnSubscriptionArn=True
+        )
+        print(f"Cola {queue_arn} suscrita a {topic_arn} (event_type: {PROCESSOR_FILTER_POLICY['event_type']})")
+        
+        # Email de alertas (opcional, ALERTS_EMAIL): solo recordatorios y
+        # tareas de prioridad alta o crítica
+        alerts_email = os.getenv('ALERTS_EMAIL')
+        if alerts_email:
+            sns.subscribe(
+                TopicArn=topic_arn,
+                Protocol='email',
+                Endpoint=alerts_email,
+                Attributes={'FilterPolicy': json.dumps(ALERTS_FILTER_POLICY)}
+            )
+            print(f"Email {alerts_email} suscrito a alertas de {topic_arn}")
         
         return topic_arn
         
@@ -190,17 +367,24 @@ Deploy producción,Desplegar versión estable a producción,pending,critical,202
     except Exception as e:
         print(f"Error creando archivo CSV: {str(e)}")
 
-def update_env_file(queue_url, topic_arn):
+def update_env_file(queue_urls, topic_arn):
     """Actualizar archivo .env con URLs reales"""
     print("Actualizando archivo .env...")
     
     env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
+    queue_url = queue_urls[DEFAULT_QUEUE_CLASS]
+    queue_env = '\n'.join(
+        f"{queue.env_var}={queue_urls[queue_class]}"
+        for queue_class, queue in QUEUE_TOPOLOGY.items()
+    )
     
     env_content = f"""# Variables de entorno para desarrollo local
 AWS_REGION=us-east-1
 DYNAMODB_TABLE_NAME=tasks-table
+DYNAMODB_INDEX_TABLE_NAME=tasks-index-table
 S3_BUCKET_NAME=task-manager-files
 SQS_QUEUE_URL={queue_url}
+{queue_env}
 SNS_TOPIC_ARN={topic_arn}
 
 # Para LocalStack
@@ -224,19 +408,24 @@ def main():
     try:
         # Crear recursos
         create_dynamodb_table()
+        create_index_table()
+        backfill_indexes()
         create_s3_bucket()
-        queue_url = create_sqs_queue()
-        topic_arn = create_sns_topic()
+        configure_claim_check_lifecycle()
+        queue_urls = create_sqs_queue()
+        topic_arn = create_sns_topic(queue_urls)
         create_sample_csv()
         
         # Actualizar archivo .env
-        update_env_file(queue_url, topic_arn)
+        update_env_file(queue_urls, topic_arn)
         
         print("\n=== Configuración completada exitosamente ===")
         print("\nRecursos creados:")
         print(f"- DynamoDB: tasks-table")
+        print("- DynamoDB: tasks-index-table")
         print(f"- S3: task-manager-files")
-        print(f"- SQS: {queue_url}")
+        for queue_class, queue_url in queue_urls.items():
+            print(f"- SQS ({queue_class}): {queue_url}")
         print(f"- SNS: {topic_arn}")
         
         print("\nPara iniciar el servidor API local, ejecuta:")
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Worker local que consume las colas SQS como el event source de Lambda
+
+Cada cola de la topología (utils/queue_topology.py) tiene N pollers que
+hacen long polling (WaitTimeSeconds=20, MaxNumberOfMessages=10), arman
+lotes con el batch size y la ventana de esa cola, e invocan el
+lambda_handler del SQS processor con un evento igual al de Lambda. Los
+mensajes exitosos se borran con delete_message_batch; los que vienen en
+batchItemFailures (o todo el lote si el handler lanza) quedan para la
+reentrega. Mientras el handler corre, la visibilidad del lote se extiende
+para que un mensaje lento no se reentregue a otro poller.
+
+Uso:
+    python local/sqs_worker.py                          # todas las colas del .env
+    python local/sqs_worker.py --queues critical,high --pollers 8
+    python local/sqs_worker.py --exit-when-idle         # drena y termina (pruebas de carga)
+"""
+
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+# Límites de ReceiveMessage en SQS
+MAX_MESSAGES = 10
+DEFAULT_WAIT_SECONDS = 20
+
+# Pollers por cola si no se indica --pollers (tope de la concurrencia de la topología)
+DEFAULT_MAX_POLLERS = 4
+
+DEFAULT_VISIBILITY_TIMEOUT = 30
+
+
+class WorkerStats:
+    """Contadores compartidos por todos los pollers"""
+    
+    FIELDS = ('received', 'batches', 'processed', 'retried', 'deleted', 'extended', 'handler_errors')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+        self.handler_ms = 0.0
+    
+    def add(self, **increments) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                if name == 'handler_ms':
+                    self.handler_ms += value
+                else:
+                    self.counts[name] += value
+    
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            summary = dict(self.counts)
+            summary['avg_batch_ms'] = round(self.handler_ms / summary['batches'], 3) if summary['batches'] else 0.0
+            return summary
+
+
+class LambdaContext:
+    """Lo mínimo del contexto de Lambda que usan los handlers"""
+    
+    function_name = 'sqs-processor-local'
+    
+    def __init__(self, timeout_seconds: int):
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout_seconds
+    
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def to_lambda_record(message: Dict[str, Any], queue_arn: str, region: str) -> Dict[str, Any]:
+    """Mensaje de ReceiveMessage -> record del evento SQS de Lambda"""
+    attributes = {}
+    for name, value in message.get('MessageAttributes', {}).items():
+        attribute = {'dataType': value['DataType'], 'stringListValues': [], 'binaryListValues': []}
+        if 'StringValue' in value:
+            attribute['stringValue'] = value['StringValue']
+        if 'BinaryValue' in value:
+            attribute['binaryValue'] = value['BinaryValue']
+        attributes[name] = attribute
+    
+    return {
+        'messageId': message['MessageId'],
+        'receiptHandle': message['ReceiptHandle'],
+        'body': message['Body'],
+        'attributes': message.get('Attributes', {}),
+        'messageAttributes': attributes,
+        'md5OfBody': message.get('MD5OfBody'),
+        'eventSource': 'aws:sqs',
+        'eventSourceARN': queue_arn,
+        'awsRegion': region
+    }
+
+
+class VisibilityHeartbeat:
+    """Extiende la visibilidad de un lote mientras el handler lo procesa
+    
+    Cada visibility_timeout / 2 segundos vuelve a fijar la visibilidad
+    en visibility_timeout, así un lote lento no reaparece en la cola.
+    """
+    
+    def __init__(self, sqs, queue_url: str, messages: List[Dict[str, Any]],
+                 visibility_timeout: int, stats: WorkerStats):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.messages = messages
+        self.visibility_timeout = visibility_timeout
+        self.stats = stats
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='visibility-heartbeat', daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self) -> None:
+        interval = max(self.visibility_timeout / 2, 0.1)
+        while not self._stop.wait(interval):
+            try:
+                for i in range(0, len(self.messages), MAX_MESSAGES):
+                    self.sqs.change_message_visibility_batch(QueueUrl=self.queue_url, Entries=[
+                        {'Id': str(j), 'ReceiptHandle': message['ReceiptHandle'],
+                         'VisibilityTimeout': self.visibility_timeout}
+                        for j, message in enumerate(self.messages[i:i + MAX_MESSAGES])
+                    ])
+                self.stats.add(extended=len(self.messages))
+            except Exception as e:
+                print(f"❌ Error extendiendo visibilidad en {self.queue_url}: {str(e)}")
+
+
+class QueuePoller:
+    """Un poller de una cola: recibe, arma lotes, invoca el handler y borra"""
+    
+    def __init__(self, sqs, queue_url: str, queue_arn: str, handler: Callable, stats: WorkerStats,
+                 batch_size: int, batching_window_seconds: float, visibility_timeout: int,
+                 wait_time_seconds: int = DEFAULT_WAIT_SECONDS):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.queue_arn = queue_arn
+        self.region = queue_arn.split(':')[3] if queue_arn.count(':') >= 5 else 'us-east-1'
+        self.handler = handler
+        self.stats = stats
+        self.batch_size = batch_size
+        self.batching_window_seconds = batching_window_seconds
+        self.visibility_timeout = visibility_timeout
+        self.wait_time_seconds = wait_time_seconds
+    
+    def run(self, stop: threading.Event, exit_when_idle: bool = False) -> None:
+        while not stop.is_set():
+            try:
+                received = self.poll_once()
+            except Exception as e:
+                print(f"❌ Error en poller de {self.queue_url}: {str(e)}")
+                stop.wait(1)
+                continue
+            if not received and exit_when_idle:
+                return
+    
+    def poll_once(self) -> int:
+        """Un ciclo: recibir (con ventana de batching) y procesar por lotes"""
+        messages = self.receive()
+        for i in range(0, len(messages), self.batch_size):
+            self.invoke(messages[i:i + self.batch_size])
+        return len(messages)
+    
+    def receive(self) -> List[Dict[str, Any]]:
+        messages = self._receive(self.wait_time_seconds)
+        if not messages or self.batching_window_seconds <= 0:
+            return messages
+        
+        # Como el event source mapping: esperar hasta llenar el lote o cerrar la ventana
+        deadline = time.monotonic() + self.batching_window_seconds
+        while len(messages) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            messages.extend(self._receive(min(self.wait_time_seconds, math.ceil(remaining))))
+        return messages
+    
+    def _receive(self, wait_time_seconds: int) -> List[Dict[str, Any]]:
+        messages = self.sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=MAX_MESSAGES,
+            WaitTimeSeconds=wait_time_seconds,
+            AttributeNames=['All'],
+            MessageAttributeNames=['All']
+        ).get('Messages', [])
+        self.stats.add(received=len(messages))
+        return messages
+    
+    def invoke(self, messages: List[Dict[str, Any]]) -> None:
+        event = {'Records': [to_lambda_record(message, self.queue_arn, self.region) for message in messages]}
+        started = time.perf_counter()
+        
+        with VisibilityHeartbeat(self.sqs, self.queue_url, messages, self.visibility_timeout, self.stats):
+            try:
+                result = self.handler(event, LambdaContext(self.visibility_timeout))
+            except Exception as e:
+                # Igual que Lambda: si el handler lanza, se reintenta todo el lote
+                print(f"💥 El handler falló con un lote de {len(messages)} mensajes: {str(e)}")
+                self.stats.add(batches=1, handler_errors=1, retried=len(messages),
+                               handler_ms=(time.perf_counter() - started) * 1000)
+                return
+        
+        failed_ids = {failure['itemIdentifier'] for failure in (result or {}).get('batchItemFailures', [])}
+        succeeded = [message for message in messages if message['MessageId'] not in failed_ids]
+        deleted = self.delete(succeeded)
+        self.stats.add(batches=1, processed=len(succeeded), retried=len(messages) - len(succeeded),
+                       deleted=deleted, handler_ms=(time.perf_counter() - started) * 1000)
+    
+    def delete(self, messages: List[Dict[str, Any]]) -> int:
+        deleted = 0
+        for i in range(0, len(messages), MAX_MESSAGES):
+            response = self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=[
+                {'Id': str(j), 'ReceiptHandle': message['ReceiptHandle']}
+                for j, message in enumerate(messages[i:i + MAX_MESSAGES])
+            ])
+            deleted += len(response.get('Successful', []))
+            for failure in response.get('Failed', []):
+                print(f"❌ Error borrando mensaje: {failure.get('Message', failure.get('Code'))}")
+        return deleted
+
+
+class SqsWorker:
+    """Pollers concurrentes sobre las colas de la topología"""
+    
+    def __init__(self, sqs, handler: Callable, queue_urls: Dict[str, str], pollers: Optional[int] = None,
+                 wait_time_seconds: int = DEFAULT_WAIT_SECONDS, batching_window_seconds: Optional[float] = None):
+        from utils.queue_topology import DEFAULT_QUEUE_CLASS, QUEUE_TOPOLOGY
+        
+        self.stats = WorkerStats()
+        self.pollers: List[QueuePoller] = []
+        
+        # Varias clases pueden compartir URL (despliegue de una sola cola)
+        seen = set()
+        for queue_class, queue_url in queue_urls.items():
+            if not queue_url or queue_url in seen:
+                continue
+            seen.add(queue_url)
+            queue = QUEUE_TOPOLOGY.get(queue_class, QUEUE_TOPOLOGY[DEFAULT_QUEUE_CLASS])
+            attributes = sqs.get_queue_attributes(
+                QueueUrl=queue_url,
+                AttributeNames=['QueueArn', 'VisibilityTimeout']
+            )['Attributes']
+            visibility_timeout = int(attributes.get('VisibilityTimeout', DEFAULT_VISIBILITY_TIMEOUT))
+            window = queue.batching_window_seconds if batching_window_seconds is None else batching_window_seconds
+            
+            for _ in range(pollers or min(queue.max_concurrency, DEFAULT_MAX_POLLERS)):
+                self.pollers.append(QueuePoller(
+                    sqs, queue_url, attributes['QueueArn'], handler, self.stats,
+                    queue.batch_size, window, visibility_timeout, wait_time_seconds
+                ))
+    
+    def run(self, exit_when_idle: bool = False, duration: Optional[float] = None) -> Dict[str, Any]:
+        """Correr los pollers hasta Ctrl+C, `duration` o (exit_when_idle) hasta vaciar las colas"""
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=poller.run, args=(stop, exit_when_idle), name=f'sqs-poller-{i}', daemon=True)
+            for i, poller in enumerate(self.pollers)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        deadline = time.monotonic() + duration if duration else None
+        try:
+            while any(thread.is_alive() for thread in threads):
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            print("\n🛑 Deteniendo pollers (terminan el long poll en curso)...")
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        
+        return self.stats.summary()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Consumir las colas SQS con el SQS processor, como Lambda')
+    parser.add_argument('--queues', default=None, help='Clases de cola separadas por coma (por defecto todas)')
+    parser.add_argument('--pollers', type=int, default=None,
+                        help=f'Pollers por cola (por defecto la concurrencia de la topología, máx. {DEFAULT_MAX_POLLERS})')
+    parser.add_argument('--wait', type=int, default=DEFAULT_WAIT_SECONDS, help='WaitTimeSeconds del long polling')
+    parser.add_argument('--batching-window', type=float, default=None, help='Ventana de batching en segundos (por defecto la de cada cola)')
+    parser.add_argument('--duration', type=float, default=None, help='Detenerse después de N segundos')
+    parser.add_argument('--exit-when-idle', action='store_true', help='Terminar cuando las colas estén vacías')
+    args = parser.parse_args(argv)
+    
+    from dotenv import load_dotenv
+    load_dotenv()
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambdas'))
+    from handlers import sqs_processor_handler
+    from utils.aws_config import aws_config, get_queue_url
+    from utils.queue_topology import QUEUE_TOPOLOGY
+    
+    queue_classes = args.queues.split(',') if args.queues else list(QUEUE_TOPOLOGY)
+    queue_urls = {queue_class: get_queue_url(queue_class) for queue_class in queue_classes}
+    if not any(queue_urls.values()):
+        print("❌ No hay colas configuradas (SQS_QUEUE_URL / SQS_QUEUE_URL_<CLASE>)")
+        return 1
+    
+    worker = SqsWorker(aws_config.get_sqs_client(), sqs_processor_handler.lambda_handler, queue_urls,
+                       args.pollers, args.wait, args.batching_window)
+    print(f"🔄 {len(worker.pollers)} pollers sobre {len({poller.queue_url for poller in worker.pollers})} colas")
+    
+    summary = worker.run(exit_when_idle=args.exit_when_idle, duration=args.duration)
+    print(f"📊 {summary['received']} recibidos, {summary['batches']} lotes, {summary['processed']} procesados, "
+          f"{summary['retried']} para reintento, {summary['deleted']} borrados, "
+          f"{summary['extended']} extensiones de visibilidad, {summary['avg_batch_ms']} ms por lote")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,6 +7,10 @@ import sys
 import os
 import json
 from datetime import datetime
+from dotenv import load_dotenv
+
+# Cargar .env (el código de lambdas solo lee variables de entorno)
+load_dotenv()
 
 # Configurar el PYTHONPATH para que incluya el directorio lambdas
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Generador de tráfico sintético para planificar capacidad
+
+Reproduce una mezcla configurable de create/list/update/upload/delete en
+lazo abierto: las llegadas siguen el RPS objetivo sin esperar a que
+terminen los requests anteriores, y la latencia se mide desde el instante
+programado (sin coordinated omission). Las tareas se eligen con
+popularidad Zipf, los tags siguen una distribución de cola larga y los
+adjuntos tienen tamaños log-normales.
+
+Uso:
+    python local/api_server.py                                   # en otra terminal
+    python local/traffic_generator.py --rps 50 --duration 60
+    python local/traffic_generator.py --rps 200 --mix create=10,list=60,update=25,delete=5
+    python local/traffic_generator.py --target handlers --rps 20  # lambda_handler directo (LocalStack)
+    python local/traffic_generator.py --rps 100 --hdr-output /tmp/latency.hgrm
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+OPERATIONS = ('create', 'list', 'update', 'upload', 'delete')
+DEFAULT_MIX = {'create': 20, 'list': 40, 'update': 25, 'upload': 5, 'delete': 10}
+
+# Tags: unos pocos muy usados y una cola larga de proyectos
+COMMON_TAGS = ['trabajo', 'personal', 'urgente', 'backend', 'frontend', 'bug', 'cliente', 'docs', 'infra', 'revisión']
+LONG_TAIL_TAGS = [f'proyecto-{n}' for n in range(90)]
+TAG_VOCABULARY = COMMON_TAGS + LONG_TAIL_TAGS
+TAG_COUNT_WEIGHTS = {0: 30, 1: 35, 2: 20, 3: 10, 4: 5}
+
+# Adjuntos: log-normal con mediana de 64 KB (la mayoría chicos, algunos grandes)
+ATTACHMENT_MEDIAN_KB = 64
+ATTACHMENT_SIGMA = 1.0
+DEFAULT_MAX_ATTACHMENT_KB = 1024
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def zipf_rank(rng: random.Random, n: int, s: float) -> int:
+    """Rango en [0, n) con probabilidad ~ 1 / (rango + 1)^s
+    
+    Usa la inversa de la CDF continua (Pareto acotada): O(1) por muestra y
+    sin tablas, aunque el conjunto de tareas crezca durante la corrida.
+    """
+    u = rng.random()
+    if abs(s - 1.0) < 1e-9:
+        rank = n ** u
+    else:
+        rank = ((n ** (1 - s) - 1) * u + 1) ** (1 / (1 - s))
+    return min(n - 1, int(rank) - 1)
+
+
+class LatencyHistogram:
+    """Histograma estilo HDR: buckets log-lineales con error relativo acotado
+    
+    Los valores (microsegundos) se agrupan con `significant_digits` dígitos
+    de precisión, así que la memoria no depende del número de muestras.
+    """
+    
+    def __init__(self, significant_digits: int = 2):
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.counts = Counter()
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+    
+    def record(self, value_us: int) -> None:
+        value_us = max(0, int(value_us))
+        shift = max(0, value_us.bit_length() - self.sub_bucket_bits)
+        self.counts[(value_us >> shift) << shift] += 1
+        self.total += 1
+        self.sum += value_us
+        self.max = max(self.max, value_us)
+    
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        return self
+    
+    def _highest_equivalent(self, bucket: int) -> int:
+        shift = max(0, bucket.bit_length() - self.sub_bucket_bits)
+        return min(self.max, bucket + (1 << shift) - 1)
+    
+    def percentile(self, percent: float) -> int:
+        """Valor por debajo del cual queda `percent`% de las muestras"""
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(self.total * percent / 100))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return self._highest_equivalent(bucket)
+        return self.max
+    
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+    
+    def percentile_distribution(self, scale: float = 1000.0) -> str:
+        """Formato de texto de HdrHistogram (.hgrm) en ms, para el plotter de HDR"""
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", '']
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            fraction = seen / self.total
+            inverse = 1 / (1 - fraction) if fraction < 1 else float('inf')
+            lines.append(f'{self._highest_equivalent(bucket) / scale:12.3f} {fraction:14.12f} {seen:10d} {inverse:14.2f}')
+        variance = sum(count * (bucket - self.mean()) ** 2 for bucket, count in self.counts.items()) / max(1, self.total)
+        lines.append(f'#[Mean    = {self.mean() / scale:12.3f}, StdDeviation   = {math.sqrt(variance) / scale:12.3f}]')
+        lines.append(f'#[Max     = {self.max / scale:12.3f}, Total count    = {self.total:12d}]')
+        return '\n'.join(lines) + '\n'
+
+
+class Workload:
+    """Genera operaciones con popularidad Zipf, tags de cola larga y adjuntos log-normales
+    
+    Las tareas viven en una lista ordenada por popularidad (índice 0 = la
+    más pedida). Solo se modifica desde el event loop, sin locks.
+    """
+    
+    def __init__(self, mix: Dict[str, float], rng: random.Random, zipf_s: float = 1.1,
+                 max_attachment_kb: int = DEFAULT_MAX_ATTACHMENT_KB):
+        self.operations = [op for op in OPERATIONS if mix.get(op, 0) > 0]
+        self.weights = [mix[op] for op in self.operations]
+        self.rng = rng
+        self.zipf_s = zipf_s
+        self.max_attachment_bytes = max_attachment_kb * 1024
+        self.task_ids: List[str] = []
+        # Bytes aleatorios reutilizados: generar MBs por request distorsiona el RPS
+        self._random_bytes = os.urandom(self.max_attachment_bytes)
+    
+    def next_operation(self) -> Tuple[str, Dict[str, Any]]:
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        if operation != 'create' and operation != 'list' and not self.task_ids:
+            operation = 'create'
+        return operation, self.build_request(operation)
+    
+    def build_request(self, operation: str) -> Dict[str, Any]:
+        return getattr(self, f'_{operation}')()
+    
+    def popular_task(self) -> str:
+        return self.task_ids[zipf_rank(self.rng, len(self.task_ids), self.zipf_s)]
+    
+    def random_tags(self) -> List[str]:
+        count = self.rng.choices(list(TAG_COUNT_WEIGHTS), list(TAG_COUNT_WEIGHTS.values()))[0]
+        return sorted({TAG_VOCABULARY[zipf_rank(self.rng, len(TAG_VOCABULARY), 1.0)] for _ in range(count)})
+    
+    def attachment_size(self) -> int:
+        size = int(self.rng.lognormvariate(math.log(ATTACHMENT_MEDIAN_KB * 1024), ATTACHMENT_SIGMA))
+        return max(1, min(size, self.max_attachment_bytes))
+    
+    def _create(self) -> Dict[str, Any]:
+        return {'body': {
+            'title': f'Tarea sintética {self.rng.randrange(10 ** 6)}',
+            'description': 'Generada por traffic_generator.py',
+            'priority': self.rng.choices(['low', 'medium', 'high'], [30, 50, 20])[0],
+            'tags': self.random_tags()
+        }}
+    
+    def _list(self) -> Dict[str, Any]:
+        kind = self.rng.random()
+        if kind < 0.5:
+            return {'params': {'limit': '50'}}
+        if kind < 0.8:
+            return {'params': {'status': self.rng.choice(['pending', 'in_progress', 'completed']), 'limit': '50'}}
+        return {'params': {'tag': TAG_VOCABULARY[zipf_rank(self.rng, len(TAG_VOCABULARY), 1.0)], 'limit': '50'}}
+    
+    def _update(self) -> Dict[str, Any]:
+        change = self.rng.choice([
+            {'status': self.rng.choice(['in_progress', 'completed'])},
+            {'priority': self.rng.choice(['low', 'medium', 'high'])},
+            {'title': f'Tarea editada {self.rng.randrange(10 ** 6)}'}
+        ])
+        return {'task_id': self.popular_task(), 'body': change}
+    
+    def _upload(self) -> Dict[str, Any]:
+        size = self.attachment_size()
+        offset = self.rng.randrange(0, len(self._random_bytes) - size + 1)
+        return {'task_id': self.popular_task(), 'body': {
+            'file_name': f'adjunto-{size}.bin',
+            'content_type': 'application/octet-stream',
+            'file_content': base64.b64encode(self._random_bytes[offset:offset + size]).decode()
+        }}
+    
+    def _delete(self) -> Dict[str, Any]:
+        # Se borran tareas de la cola fría: el conjunto caliente se mantiene estable
+        index = len(self.task_ids) - 1 - zipf_rank(self.rng, len(self.task_ids), self.zipf_s)
+        return {'task_id': self.task_ids.pop(index)}
+    
+    def record_created(self, task_id: Optional[str]) -> None:
+        """Las tareas nuevas entran con popularidad aleatoria"""
+        if task_id:
+            self.task_ids.insert(self.rng.randrange(len(self.task_ids) + 1), task_id)
+
+
+class HttpTarget:
+    """Servidor local (FastAPI) o cualquier despliegue con la misma API"""
+    
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        import requests
+        self._requests = requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+    
+    def _session(self):
+        # requests.Session no es seguro entre hilos: una por hilo del pool
+        if not hasattr(self._local, 'session'):
+            self._local.session = self._requests.Session()
+        return self._local.session
+    
+    def call(self, operation: str, request: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        session = self._session()
+        url = f'{self.base_url}/tasks'
+        if operation == 'create':
+            response = session.post(url, json=request['body'], timeout=self.timeout)
+            task_id = response.json().get('task', {}).get('id') if response.status_code == 201 else None
+            return response.status_code, task_id
+        if operation == 'list':
+            return session.get(url, params=request['params'], timeout=self.timeout).status_code, None
+        if operation == 'update':
+            return session.put(f"{url}/{request['task_id']}", json=request['body'], timeout=self.timeout).status_code, None
+        if operation == 'upload':
+            body = request['body']
+            files = {'file': (body['file_name'], base64.b64decode(body['file_content']), body['content_type'])}
+            return session.post(f"{url}/{request['task_id']}/upload", files=files, timeout=self.timeout).status_code, None
+        return session.delete(f"{url}/{request['task_id']}", timeout=self.timeout).status_code, None
+
+
+class HandlerTarget:
+    """Invoca los lambda_handler en proceso (usa la configuración AWS del entorno)"""
+    
+    def __init__(self):
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambdas'))
+        from handlers import (create_task_handler, delete_task_handler, list_tasks_handler,
+                              update_task_handler, upload_file_handler)
+        self.handlers = {
+            'create': create_task_handler.lambda_handler,
+            'list': list_tasks_handler.lambda_handler,
+            'update': update_task_handler.lambda_handler,
+            'upload': upload_file_handler.lambda_handler,
+            'delete': delete_task_handler.lambda_handler
+        }
+    
+    def call(self, operation: str, request: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        event = {}
+        if 'task_id' in request:
+            event['pathParameters'] = {'id': request['task_id']}
+        if 'body' in request:
+            event['body'] = json.dumps(request['body'])
+        if 'params' in request:
+            event['queryStringParameters'] = request['params']
+        
+        response = self.handlers[operation](event, None)
+        task_id = None
+        if operation == 'create' and response['statusCode'] == 201:
+            task_id = json.loads(response['body'])['task']['id']
+        return response['statusCode'], task_id
+
+
+class LoadReport:
+    """Histogramas por operación, códigos de estado y requests descartados"""
+    
+    def __init__(self):
+        self.histograms = {operation: LatencyHistogram() for operation in OPERATIONS}
+        self.statuses = {operation: Counter() for operation in OPERATIONS}
+        self.dropped = 0
+        self.elapsed = 0.0
+    
+    def overall(self) -> LatencyHistogram:
+        total = LatencyHistogram()
+        for histogram in self.histograms.values():
+            total.merge(histogram)
+        return total
+    
+    def summary(self) -> Dict[str, Any]:
+        operations = {}
+        for operation, histogram in self.histograms.items():
+            if not histogram.total:
+                continue
+            statuses = self.statuses[operation]
+            operations[operation] = {
+                'count': histogram.total,
+                'errors': sum(count for status, count in statuses.items() if status == 0 or status >= 500),
+                'statuses': {str(status): count for status, count in sorted(statuses.items())},
+                **{f'p{percent:g}_ms': histogram.percentile(percent) / 1000 for percent in PERCENTILES},
+                'max_ms': histogram.max / 1000
+            }
+        overall = self.overall()
+        return {
+            'requests': overall.total,
+            'dropped': self.dropped,
+            'achieved_rps': round(overall.total / self.elapsed, 1) if self.elapsed else 0.0,
+            **{f'p{percent:g}_ms': overall.percentile(percent) / 1000 for percent in PERCENTILES},
+            'operations': operations
+        }
+
+
+async def run_open_loop(target, workload: Workload, rps: float, duration: float, arrival: str = 'poisson',
+                        max_in_flight: int = 256, workers: int = 64) -> LoadReport:
+    """Disparar requests a `rps` durante `duration` segundos sin esperar respuestas
+    
+    Si hay `max_in_flight` requests sin terminar, las llegadas siguientes se
+    cuentan como descartadas (el sistema ya no sostiene el RPS objetivo).
+    """
+    loop = asyncio.get_running_loop()
+    report = LoadReport()
+    in_flight = set()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='traffic')
+    
+    async def fire(operation: str, request: Dict[str, Any], scheduled: float) -> None:
+        try:
+            status, task_id = await loop.run_in_executor(executor, target.call, operation, request)
+        except Exception:
+            status, task_id = 0, None
+        # Desde el instante programado: incluye la espera si el cliente se atrasó
+        report.histograms[operation].record((loop.time() - scheduled) * 1_000_000)
+        report.statuses[operation][status] += 1
+        if operation == 'create':
+            workload.record_created(task_id)
+    
+    started = loop.time()
+    next_at = started
+    # Uniforme: la llegada i es started + i / rps (sumar 1 / rps acumula error
+    # de punto flotante y agrega una llegada de más)
+    poisson = arrival == 'poisson'
+    planned = int(duration * rps)
+    sent = 0
+    try:
+        while (next_at < started + duration) if poisson else (sent < planned):
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            if len(in_flight) >= max_in_flight:
+                report.dropped += 1
+            else:
+                operation, request = workload.next_operation()
+                task = asyncio.ensure_future(fire(operation, request, next_at))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            
+            sent += 1
+            next_at = next_at + workload.rng.expovariate(rps) if poisson else started + sent / rps
+        
+        if in_flight:
+            await asyncio.gather(*in_flight)
+    finally:
+        executor.shutdown(wait=True)
+    
+    report.elapsed = loop.time() - started
+    return report
+
+
+def seed_tasks(target, workload: Workload, count: int, workers: int = 16) -> None:
+    """Crear las tareas iniciales (lazo cerrado, antes de medir)"""
+    requests = [workload.build_request('create') for _ in range(count)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for status, task_id in executor.map(lambda request: target.call('create', request), requests):
+            workload.record_created(task_id)
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """"create=20,list=40,..." → pesos por operación"""
+    mix = {}
+    for part in value.split(','):
+        operation, _, weight = part.partition('=')
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'Operación desconocida: {operation}')
+        mix[operation] = float(weight)
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError('La mezcla necesita al menos una operación con peso > 0')
+    return mix
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print(f"\n📈 {summary['requests']} requests, {summary['achieved_rps']} rps logrados, {summary['dropped']} descartados")
+    print(f"{'operación':<10} {'count':>7} {'errores':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}")
+    for operation, stats in summary['operations'].items():
+        print(f"{operation:<10} {stats['count']:>7} {stats['errors']:>8} "
+              f"{stats['p50_ms']:>8.1f}ms {stats['p90_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms "
+              f"{stats['p99.9_ms']:>7.1f}ms {stats['max_ms']:>7.1f}ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Tráfico sintético en lazo abierto contra la API o los handlers')
+    parser.add_argument('--target', default='http://localhost:8000',
+                        help="URL base de la API o 'handlers' para invocar los lambda_handler en proceso")
+    parser.add_argument('--rps', type=float, default=20.0, help='Requests por segundo objetivo')
+    parser.add_argument('--duration', type=float, default=30.0, help='Duración en segundos')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='Pesos por operación: create=20,list=40,...')
+    parser.add_argument('--arrival', choices=['poisson', 'uniform'], default='poisson', help='Proceso de llegadas')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Exponente Zipf de popularidad de tareas')
+    parser.add_argument('--seed-tasks', type=int, default=100, help='Tareas a crear antes de medir')
+    parser.add_argument('--max-attachment-kb', type=int, default=DEFAULT_MAX_ATTACHMENT_KB, help='Tamaño máximo de adjunto')
+    parser.add_argument('--max-in-flight', type=int, default=256, help='Requests simultáneos antes de descartar')
+    parser.add_argument('--workers', type=int, default=64, help='Hilos que ejecutan los requests')
+    parser.add_argument('--seed', type=int, default=None, help='Semilla para reproducir la corrida')
+    parser.add_argument('--hdr-output', help='Guardar la distribución de percentiles (.hgrm) del total')
+    parser.add_argument('--json-output', help='Guardar el resumen en JSON')
+    args = parser.parse_args(argv)
+    
+    if args.target == 'handlers':
+        from dotenv import load_dotenv
+        load_dotenv()
+        target = HandlerTarget()
+    else:
+        target = HttpTarget(args.target)
+    
+    workload = Workload(args.mix, random.Random(args.seed), args.zipf, args.max_attachment_kb)
+    print(f"🌱 Creando {args.seed_tasks} tareas iniciales...")
+    seed_tasks(target, workload, args.seed_tasks)
+    
+    print(f"🚦 {args.rps} rps durante {args.duration}s ({args.arrival}) contra {args.target}")
+    report = asyncio.run(run_open_loop(
+        target, workload, args.rps, args.duration, args.arrival, args.max_in_flight, args.workers
+    ))
+    
+    summary = report.summary()
+    print_report(summary)
+    
+    if args.hdr_output:
+        with open(args.hdr_output, 'w') as hdr_file:
+            hdr_file.write(report.overall().percentile_distribution())
+    if args.json_output:
+        with open(args.json_output, 'w') as json_file:
+            json.dump(summary, json_file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
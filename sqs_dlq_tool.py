@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+☣️ DLQ TOOL - INSPECCIÓN Y REDRIVE DE COLAS SQS
+===============================================
+
+Lista las DLQ de la topología de colas, muestra los mensajes en
+cuarentena con su error y contexto, y los devuelve a su cola por lotes
+una vez corregida la causa.
+"""
+
+import argparse
+import os
+import sys
+import boto3
+
+# Servicio de DLQ y topología compartidos con el procesador
+sys.path.append(os.path.join(os.path.dirname(__file__), 'lambdas'))
+from services.dead_letter_service import DeadLetterService
+from utils.queue_topology import DLQ_SUFFIX, QUEUE_TOPOLOGY
+
+# Configuración LocalStack
+LOCALSTACK_ENDPOINT = os.getenv('LOCALSTACK_ENDPOINT', 'http://localhost:4566')
+
+def get_sqs_client():
+    """Cliente SQS para LocalStack"""
+    return boto3.client('sqs', endpoint_url=LOCALSTACK_ENDPOINT, region_name='us-east-1',
+                        aws_access_key_id='test', aws_secret_access_key='test')
+
+def resolve_dlq_url(sqs, queue):
+    """URL de la DLQ a partir de la clase de cola ('critical') o del nombre"""
+    if queue in QUEUE_TOPOLOGY:
+        name = QUEUE_TOPOLOGY[queue].dlq_name
+    elif queue.endswith(DLQ_SUFFIX):
+        name = queue
+    else:
+        name = queue + DLQ_SUFFIX
+    return sqs.get_queue_url(QueueName=name)['QueueUrl']
+
+def list_dlqs(sqs):
+    """Mostrar cuántos mensajes hay en cada DLQ"""
+    print("☣️ DEAD-LETTER QUEUES:")
+    print("=" * 60)
+    
+    for queue_class, queue in QUEUE_TOPOLOGY.items():
+        try:
+            dlq_url = sqs.get_queue_url(QueueName=queue.dlq_name)['QueueUrl']
+            attrs = sqs.get_queue_attributes(
+                QueueUrl=dlq_url,
+                AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+            )['Attributes']
+            print(f"   📍 {queue.dlq_name} ({queue_class})")
+            print(f"      └─ Mensajes: {attrs.get('ApproximateNumberOfMessages', 0)}")
+            print(f"      └─ En inspección: {attrs.get('ApproximateNumberOfMessagesNotVisible', 0)}")
+        except Exception as e:
+            print(f"   ❌ {queue.dlq_name}: {str(e)}")
+
+def inspect_dlq(sqs, queue, limit):
+    """Mostrar los mensajes de una DLQ con el contexto de la cuarentena"""
+    dlq_url = resolve_dlq_url(sqs, queue)
+    messages = DeadLetterService(sqs).inspect(dlq_url, limit)
+    
+    print(f"🔍 {dlq_url} ({len(messages)} mensajes)")
+    print("=" * 60)
+    if not messages:
+        print("   📭 DLQ vacía")
+    
+    for message in messages:
+        origin = '☣️ cuarentena' if message['quarantined'] else '🔁 redrive policy'
+        print(f"   📨 {message['message_id'][:8]} | {message['action']} | Task: {message['task_id'] or 'N/A'} | {origin}")
+        print(f"      └─ Recepciones: {message['receive_count']}")
+        if message['error']:
+            print(f"      └─ Error: {message['error']}")
+        for key, value in message['context'].items():
+            print(f"      └─ {key}: {value}")
+        print(f"      └─ Body: {message['body'][:80]}")
+
+def redrive_dlq(sqs, queue, limit, target):
+    """Devolver los mensajes de una DLQ a su cola de origen"""
+    dlq_url = resolve_dlq_url(sqs, queue)
+    target_url = sqs.get_queue_url(QueueName=target)['QueueUrl'] if target else None
+    result = DeadLetterService(sqs).redrive(dlq_url, target_url=target_url, limit=limit)
+    
+    print(f"🔁 Redrive completado: {result['moved']} movidos, {result['failed']} fallidos")
+    return 0 if result['failed'] == 0 else 1
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Inspección y redrive de DLQ')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    subparsers.add_parser('list', help='Mensajes por DLQ (por defecto)')
+    
+    inspect_parser = subparsers.add_parser('inspect', help='Ver mensajes y su error')
+    inspect_parser.add_argument('queue', help='Clase de cola (critical, high, standard, bulk) o nombre')
+    inspect_parser.add_argument('--limit', type=int, default=10)
+    
+    redrive_parser = subparsers.add_parser('redrive', help='Devolver mensajes a su cola')
+    redrive_parser.add_argument('queue', help='Clase de cola (critical, high, standard, bulk) o nombre')
+    redrive_parser.add_argument('--limit', type=int, default=None, help='Máximo de mensajes (por defecto todos)')
+    redrive_parser.add_argument('--target', default=None, help='Cola destino (por defecto la de origen)')
+    
+    args = parser.parse_args()
+    sqs = get_sqs_client()
+    
+    if args.command == 'inspect':
+        inspect_dlq(sqs, args.queue, args.limit)
+    elif args.command == 'redrive':
+        return redrive_dlq(sqs, args.queue, args.limit, args.target)
+    else:
+        list_dlqs(sqs)
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,82 @@
+"""
+Configuración compartida de pytest: AWS simulado con moto
+"""
+
+import os
+import sys
+
+import pytest
+from moto import mock_aws
+
+# Agregar el directorio lambdas al path (mismo layout que en Lambda)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
+
+# Credenciales falsas para que boto3 nunca hable con AWS real
+os.environ['AWS_ACCESS_KEY_ID'] = 'test'
+os.environ['AWS_SECRET_ACCESS_KEY'] = 'test'
+os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+os.environ['AWS_REGION'] = 'us-east-1'
+os.environ.pop('LOCALSTACK_ENDPOINT', None)
+
+# Las métricas EMF no se imprimen en los tests (test_instrumentation usa MemorySink)
+os.environ['METRICS_SINK'] = 'off'
+
+
+def create_tasks_table(dynamodb):
+    """Crear la tabla de tareas con el mismo esquema que LocalStack"""
+    dynamodb.create_table(
+        TableName=os.getenv('DYNAMODB_TABLE_NAME', 'tasks-table'),
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'due_shard', 'AttributeType': 'S'},
+            {'AttributeName': 'due_date', 'AttributeType': 'S'}
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': 'due-date-index',
+            'KeySchema': [
+                {'AttributeName': 'due_shard', 'KeyType': 'HASH'},
+                {'AttributeName': 'due_date', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'}
+        }],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+def create_index_table(dynamodb):
+    """Crear la tabla de índices (pk/sk)"""
+    dynamodb.create_table(
+        TableName=os.getenv('DYNAMODB_INDEX_TABLE_NAME', 'tasks-index-table'),
+        KeySchema=[
+            {'AttributeName': 'pk', 'KeyType': 'HASH'},
+            {'AttributeName': 'sk', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'pk', 'AttributeType': 'S'},
+            {'AttributeName': 'sk', 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+@pytest.fixture(autouse=True)
+def aws():
+    """Todos los tests corren contra AWS simulado"""
+    with mock_aws():
+        import boto3
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        create_tasks_table(dynamodb)
+        create_index_table(dynamodb)
+        
+        # La configuración se congela en el primer uso: cada test la relee
+        from utils.aws_config import reset_settings
+        reset_settings()
+        
+        # El cache de tareas vive a nivel de clase: vaciarlo entre tests
+        from repositories.cached_task_repository import CachedTaskRepository
+        from utils.cache import InMemorySharedCache
+        CachedTaskRepository._local_cache.clear()
+        CachedTaskRepository.stats.reset()
+        InMemorySharedCache.reset()
+        yield
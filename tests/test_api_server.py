@@ -0,0 +1,113 @@
+"""
+Pruebas del servidor local: cuerpo de error estilo Lambda, ETag/If-Match,
+/metrics y efectos secundarios en segundo plano
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'local'))
+
+import api_server  # noqa: E402
+from runtime import SideEffectTracker  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    # Sin el bloque with: el evento de shutdown drenaría el pool compartido del módulo
+    return TestClient(api_server.app)
+
+
+def create_task(client, **fields):
+    fields.setdefault('title', 'Tarea de prueba')
+    response = client.post('/tasks', json=fields)
+    assert response.status_code == 201
+    return response.json()['task']
+
+
+def settled(condition, timeout=5):
+    """Los contadores se actualizan en el callback del Future, después de wait()"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_errors_use_lambda_message_body(client):
+    missing = client.get('/tasks/no-existe')
+    assert missing.status_code == 404
+    assert missing.json() == {'message': 'Tarea no encontrada'}
+    
+    unknown_route = client.get('/no-existe')
+    assert unknown_route.status_code == 404
+    assert set(unknown_route.json()) == {'message'}
+    
+    invalid = client.get('/tasks/search', params={'q': 'algo', 'limit': 0})
+    assert invalid.status_code == 422
+    assert invalid.json()['message'].startswith('query.limit')
+
+
+def test_etag_if_match_round_trip(client):
+    task = create_task(client)
+    
+    first = client.put(f"/tasks/{task['id']}", json={'title': 'A'}, headers={'If-Match': '"1"'})
+    assert first.status_code == 200
+    assert first.headers['ETag'] == '"2"'
+    
+    second = client.put(f"/tasks/{task['id']}", json={'title': 'B'}, headers={'If-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.json()['task']['version'] == 3
+    
+    stale = client.put(f"/tasks/{task['id']}", json={'title': 'C'}, headers={'If-Match': '"1"'})
+    assert stale.status_code == 412
+    assert set(stale.json()) == {'message'}
+    assert client.get(f"/tasks/{task['id']}").json()['task']['title'] == 'B'
+
+
+def test_metrics_exposes_routes_and_side_effects(client):
+    task = create_task(client)
+    client.get(f"/tasks/{task['id']}")
+    
+    body = client.get('/metrics').text
+    
+    assert 'http_requests_total{method="GET",route="/tasks/{task_id}",status="200"} ' in body
+    assert 'http_request_duration_seconds_count{method="POST",route="/tasks"} ' in body
+    assert '# TYPE side_effects_failed_total counter' in body
+    assert '# TYPE side_effects_in_flight gauge' in body
+
+
+def test_side_effect_tracker_counts_failures():
+    tracker = SideEffectTracker(max_workers=1)
+    
+    def fail():
+        raise RuntimeError('SNS no disponible')
+    
+    tracker.submit(fail)
+    tracker.submit(lambda: None)
+    assert tracker.drain(timeout=5) == 0
+    
+    assert settled(lambda: (tracker.failed, tracker.completed) == (1, 1))
+
+
+def test_side_effect_tracker_drain_waits_for_pending():
+    tracker = SideEffectTracker(max_workers=2)
+    release = threading.Event()
+    finished = []
+    
+    tracker.submit(lambda: release.wait(5) and finished.append('lento'))
+    assert tracker.in_flight == 1
+    assert tracker.drain(timeout=0.05) == 1
+    
+    release.set()
+    assert tracker.drain(timeout=5) == 0
+    assert finished == ['lento']
+    assert settled(lambda: tracker.in_flight == 0)
+    
+    # Iniciado el apagado, lo nuevo corre en línea
+    tracker.submit(lambda: finished.append('en línea'))
+    assert finished == ['lento', 'en línea']
@@ -0,0 +1,25 @@
+"""
+Smoke test del suite de benchmarks (tabla mínima, pocas iteraciones)
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARK = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'bench_handlers.py')
+
+
+def test_benchmark_suite_runs_every_scenario(tmp_path):
+    output = tmp_path / 'results.json'
+    completed = subprocess.run(
+        [sys.executable, BENCHMARK, '--sizes', '40', '--iterations', '3', '--memory-iterations', '2',
+         '--baseline', str(tmp_path / 'baselines.json'), '--output', str(output)],
+        capture_output=True, text=True
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+    
+    results = json.loads(output.read_text())
+    assert set(results) == {f'{s}@40' for s in ('create', 'list', 'update', 'upload', 'sqs_processor', 'delete')}
+    assert results['update@40']['dynamodb_calls_per_request'] == 1.0
+    assert all(r['p99_ms'] >= r['p50_ms'] > 0 and r['peak_alloc_kb'] > 0 for r in results.values())
@@ -0,0 +1,90 @@
+"""
+Pruebas de respuesta parcial, cuarentena de mensajes venenosos y redrive
+"""
+
+import json
+
+import boto3
+import pytest
+
+from handlers import sqs_processor_handler
+from services.dead_letter_service import DeadLetterService
+from services.idempotency_service import IdempotencyService
+
+
+@pytest.fixture(autouse=True)
+def clear_idempotency_cache():
+    IdempotencyService._recent_keys.clear()
+    DeadLetterService._dlq_urls.clear()
+
+
+@pytest.fixture
+def queues():
+    """task-queue con su DLQ y redrive policy, como en setup_localstack"""
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    dlq_url = sqs.create_queue(QueueName='task-queue-dlq')['QueueUrl']
+    dlq_arn = sqs.get_queue_attributes(QueueUrl=dlq_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+    queue_url = sqs.create_queue(QueueName='task-queue', Attributes={
+        'RedrivePolicy': json.dumps({'deadLetterTargetArn': dlq_arn, 'maxReceiveCount': '5'})
+    })['QueueUrl']
+    queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+    return {'url': queue_url, 'arn': queue_arn, 'dlq_url': dlq_url}
+
+
+def make_record(queues, message_id, body, receive_count=1):
+    return {
+        'messageId': message_id,
+        'eventSourceARN': queues['arn'],
+        'attributes': {'ApproximateReceiveCount': str(receive_count)},
+        'body': body if isinstance(body, str) else json.dumps(body)
+    }
+
+
+def test_only_failed_messages_are_reported_for_retry(queues):
+    event = {'Records': [
+        make_record(queues, 'ok', {'type': 'task_processing', 'task_id': 'task-1'}),
+        make_record(queues, 'bad', '{no es json')
+    ]}
+    
+    result = sqs_processor_handler.lambda_handler(event, None)
+    
+    assert result['batchItemFailures'] == [{'itemIdentifier': 'bad'}]
+    assert result['processedCount'] == 1 and result['quarantinedCount'] == 0
+
+
+def test_poison_message_is_quarantined_with_error_context(queues, monkeypatch):
+    monkeypatch.setenv('POISON_RECEIVE_COUNT', '3')
+    event = {'Records': [
+        make_record(queues, 'poison', '{no es json', receive_count=3),
+        make_record(queues, 'ok', {'type': 'task_processing', 'task_id': 'task-1'}, receive_count=3)
+    ]}
+    
+    result = sqs_processor_handler.lambda_handler(event, None)
+    
+    assert result['batchItemFailures'] == []
+    assert result['quarantinedCount'] == 1
+    
+    [message] = DeadLetterService().inspect(queues['dlq_url'])
+    assert message['quarantined'] and message['action'] == 'invalid_json'
+    assert 'Invalid JSON' in message['error']
+    assert message['context']['source_queue'] == 'task-queue'
+    assert message['context']['receive_count'] == 3
+    
+    # inspect no consume: el mensaje sigue en la DLQ
+    assert len(DeadLetterService().inspect(queues['dlq_url'])) == 1
+
+
+def test_redrive_returns_messages_without_quarantine_attributes(queues):
+    service = DeadLetterService()
+    for i in range(12):
+        service.quarantine(make_record(queues, f'm-{i}', {'action': 'process_new_task', 'task_id': f'task-{i}'}), 'boom')
+    
+    assert service.redrive(queues['dlq_url'], limit=5) == {'moved': 5, 'failed': 0}
+    assert service.redrive(queues['dlq_url']) == {'moved': 7, 'failed': 0}
+    assert service.inspect(queues['dlq_url']) == []
+    
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    messages = sqs.receive_message(QueueUrl=queues['url'], MaxNumberOfMessages=10,
+                                   MessageAttributeNames=['All'])['Messages']
+    assert all('MessageAttributes' not in message for message in messages)
+    assert json.loads(messages[0]['Body'])['action'] == 'process_new_task'
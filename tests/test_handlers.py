@@ -0,0 +1,92 @@
+"""
+Pruebas de los handlers Lambda con eventos de API Gateway
+"""
+
+import json
+
+import pytest
+
+from handlers import create_task_handler, list_tasks_handler, update_task_handler, update_tags_handler
+
+
+def create_task(**fields):
+    fields.setdefault('title', 'Tarea de prueba')
+    response = create_task_handler.lambda_handler({'body': json.dumps(fields)}, None)
+    assert response['statusCode'] == 201
+    return json.loads(response['body'])['task']
+
+
+def update_event(task_id, body, if_match=None):
+    event = {'pathParameters': {'id': task_id}, 'body': json.dumps(body)}
+    if if_match:
+        event['headers'] = {'if-match': if_match}
+    return event
+
+
+def test_update_returns_etag_and_honors_if_match():
+    task = create_task()
+    
+    response = update_task_handler.lambda_handler(update_event(task['id'], {'title': 'A'}, '"1"'), None)
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] == '"2"'
+    
+    stale = update_task_handler.lambda_handler(update_event(task['id'], {'title': 'B'}, '"1"'), None)
+    assert stale['statusCode'] == 412
+
+
+def test_patch_tags_adds_and_removes():
+    task = create_task(tags=['backlog'])
+    event = {'pathParameters': {'id': task['id']}, 'body': json.dumps({'add': ['urgente'], 'remove': ['backlog']})}
+    
+    response = update_tags_handler.lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['task']['tags'] == ['urgente']
+
+
+@pytest.mark.parametrize('body', [{'add': ['']}, {'add': ['  ']}, {'add': ['a', 'a']}, {'remove': ['']}])
+def test_patch_tags_rejects_empty_or_repeated_tags(body):
+    task = create_task(tags=['a'])
+    event = {'pathParameters': {'id': task['id']}, 'body': json.dumps(body)}
+    
+    response = update_tags_handler.lambda_handler(event, None)
+    
+    assert response['statusCode'] == 400
+    assert create_task_handler.lambda_handler({'body': json.dumps({'title': 'X', 'tags': ['']})}, None)['statusCode'] == 400
+
+
+def test_create_with_idempotency_key_replays_without_duplicates():
+    event = {'headers': {'Idempotency-Key': 'abc-123'}, 'body': json.dumps({'title': 'Una sola vez'})}
+    
+    first = create_task_handler.lambda_handler(event, None)
+    second = create_task_handler.lambda_handler(event, None)
+    
+    assert first['statusCode'] == second['statusCode'] == 201
+    assert first['headers']['Idempotent-Replayed'] == 'false'
+    assert second['headers']['Idempotent-Replayed'] == 'true'
+    assert json.loads(first['body'])['task']['id'] == json.loads(second['body'])['task']['id']
+    
+    listed = list_tasks_handler.lambda_handler({'queryStringParameters': {}}, None)
+    assert len(json.loads(listed['body'])['tasks']) == 1
+    
+    reused = dict(event, body=json.dumps({'title': 'Otra tarea'}))
+    assert create_task_handler.lambda_handler(reused, None)['statusCode'] == 422
+
+
+def test_list_tasks_by_ids():
+    first, second = create_task(title='Uno'), create_task(title='Dos')
+    event = {'queryStringParameters': {'ids': f"{second['id']},no-existe,{first['id']}"}}
+    
+    response = list_tasks_handler.lambda_handler(event, None)
+    assert response['statusCode'] == 200
+    assert [task['id'] for task in json.loads(response['body'])['tasks']] == [second['id'], first['id']]
+
+
+@pytest.mark.parametrize('ids', ['', ','])
+def test_list_tasks_with_empty_ids_returns_nothing(ids):
+    create_task(title='Uno')
+    
+    response = list_tasks_handler.lambda_handler({'queryStringParameters': {'ids': ids}}, None)
+    
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['tasks'] == []
@@ -0,0 +1,77 @@
+"""
+Pruebas de la deduplicación de mensajes SQS (claims con lease en DynamoDB y LRU local)
+"""
+
+import json
+
+import pytest
+
+from handlers import sqs_processor_handler
+from services.idempotency_service import IdempotencyService
+
+
+@pytest.fixture(autouse=True)
+def clear_idempotency_cache():
+    IdempotencyService._recent_keys.clear()
+
+
+def test_processor_deduplicates_redeliveries_with_metrics():
+    event = {'Records': [{'messageId': 'm1', 'body': json.dumps({'type': 'task_processing', 'task_id': 't1'})}]}
+    
+    first = sqs_processor_handler.lambda_handler(event, None)
+    assert first['dedup'] == {'local_hits': 0, 'remote_hits': 0, 'claimed': 1, 'in_progress': 0}
+    
+    # Reentrega al mismo contenedor: se descarta sin ir a DynamoDB
+    second = sqs_processor_handler.lambda_handler(event, None)
+    assert second['dedup']['local_hits'] == 1
+    
+    # Reentrega a otro contenedor: la descarta el put condicional
+    IdempotencyService._recent_keys.clear()
+    third = sqs_processor_handler.lambda_handler(event, None)
+    assert third['dedup']['remote_hits'] == 1
+    assert third['processedMessages'][0]['duplicate']
+
+
+def test_failed_message_releases_its_key():
+    event = {'Records': [{'messageId': 'm1', 'body': 'no es json'}]}
+    
+    assert sqs_processor_handler.lambda_handler(event, None)['failedCount'] == 1
+    assert sqs_processor_handler.lambda_handler(event, None)['dedup']['claimed'] == 1
+
+
+def test_message_claimed_by_crashed_consumer_is_not_dropped():
+    def event_for(task_id):
+        return {'Records': [{'messageId': task_id, 'body': json.dumps({'type': 'task_processing', 'task_id': task_id})}]}
+    busy_event, crashed_event = event_for('t1'), event_for('t2')
+    
+    # Otro consumidor reservó la clave y sigue dentro de su lease: se reintenta, no se descarta
+    IdempotencyService().claim(sqs_processor_handler.get_idempotency_key(busy_event['Records'][0]))
+    busy = sqs_processor_handler.lambda_handler(busy_event, None)
+    assert busy['failedCount'] == 1 and busy['dedup']['in_progress'] == 1
+    assert busy['batchItemFailures'] == [{'itemIdentifier': 't1'}]
+    
+    # El consumidor murió a mitad del batch y su lease caducó: la reentrega se procesa
+    IdempotencyService(lease_seconds=-1).claim(sqs_processor_handler.get_idempotency_key(crashed_event['Records'][0]))
+    redelivered = sqs_processor_handler.lambda_handler(crashed_event, None)
+    assert redelivered['dedup']['claimed'] == 1
+    assert not redelivered['processedMessages'][0].get('duplicate')
+    
+    # Completado: ahora sí es un duplicado
+    IdempotencyService._recent_keys.clear()
+    assert sqs_processor_handler.lambda_handler(crashed_event, None)['processedMessages'][0]['duplicate']
+
+
+def test_complete_many_batches_writes_in_chunks_of_25(monkeypatch):
+    from repositories.idempotency_repository import COMPLETED, IdempotencyRepository
+    
+    repository = IdempotencyRepository()
+    calls = []
+    batch_write_item = repository.client.batch_write_item
+    monkeypatch.setattr(repository.client, 'batch_write_item',
+                        lambda **kwargs: calls.append(kwargs) or batch_write_item(**kwargs))
+    
+    keys = [f'k{i}' for i in range(30)]
+    repository.complete_many(keys)
+    
+    assert [len(call['RequestItems'][repository.table_name]) for call in calls] == [25, 5]
+    assert repository.claim('k29') == COMPLETED
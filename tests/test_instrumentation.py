@@ -0,0 +1,154 @@
+"""
+Pruebas de la instrumentación de llamadas AWS (EMF)
+"""
+
+import json
+import marshal
+import sys
+import threading
+import time
+
+import boto3
+import pytest
+
+from handlers import create_task_handler, list_tasks_handler, update_task_handler
+from utils import instrumentation, profiling
+from utils.instrumentation import MemorySink
+
+
+class FakeContext:
+    aws_request_id = 'req-1'
+
+
+@pytest.fixture
+def sink():
+    memory = MemorySink()
+    instrumentation.set_sink(memory)
+    yield memory
+    instrumentation.set_sink(None)
+
+
+def call_records(sink):
+    return [r for r in sink.records if 'Operation' in r]
+
+
+def invocation_records(sink):
+    return [r for r in sink.records if 'Duration' in r]
+
+
+def test_each_aws_call_emits_emf_record_attributed_to_handler(sink):
+    response = create_task_handler.lambda_handler({'body': json.dumps({'title': 'Medida'})}, FakeContext())
+    assert response['statusCode'] == 201
+    
+    calls = call_records(sink)
+    put = next(r for r in calls if r['Operation'] == 'PutItem')
+    assert put['Service'] == 'dynamodb'
+    assert put['Handler'] == 'create_task_handler' and put['RequestId'] == 'req-1'
+    assert put['RequestBytes'] > 0 and put['Latency'] >= 0 and put['Retries'] == 0
+    assert put['ConsumedCapacity'] > 0
+    
+    metrics = put['_aws']['CloudWatchMetrics'][0]
+    assert metrics['Dimensions'] == [['Service', 'Operation']]
+    assert {m['Name'] for m in metrics['Metrics']} >= {'Latency', 'Retries', 'RequestBytes', 'ConsumedCapacity'}
+    
+    [summary] = invocation_records(sink)
+    assert summary['Handler'] == 'create_task_handler'
+    assert summary['AwsCalls'] == len(calls)
+    assert summary['Operations']['dynamodb.PutItem']['calls'] >= 1
+    assert summary['Duration'] >= summary['AwsTime'] > 0
+
+
+def test_parallel_calls_keep_handler_attribution(sink, monkeypatch):
+    monkeypatch.setenv('DYNAMODB_BATCH_GET_CONCURRENCY', '4')
+    ids = []
+    for n in range(3):
+        body = json.loads(create_task_handler.lambda_handler({'body': json.dumps({'title': f'T{n}'})}, None)['body'])
+        ids.append(body['task']['id'])
+    sink.clear()
+    
+    # 250 ids → 3 bloques de BatchGetItem en hilos distintos
+    wanted = ids + [f'missing-{n}' for n in range(247)]
+    response = list_tasks_handler.lambda_handler({'queryStringParameters': {'ids': ','.join(wanted)}}, None)
+    assert response['statusCode'] == 200
+    
+    batch_gets = [r for r in call_records(sink) if r['Operation'] == 'BatchGetItem']
+    assert len(batch_gets) == 3
+    assert all(r['Handler'] == 'list_tasks_handler' for r in batch_gets)
+    assert invocation_records(sink)[0]['Operations']['dynamodb.BatchGetItem']['calls'] == 3
+
+
+def test_failed_calls_are_recorded_with_error(sink):
+    created = json.loads(create_task_handler.lambda_handler({'body': json.dumps({'title': 'X'})}, None)['body'])
+    sink.clear()
+    
+    response = update_task_handler.lambda_handler({
+        'pathParameters': {'id': created['task']['id']},
+        'headers': {'If-Match': '"99"'},
+        'body': json.dumps({'title': 'Y'})
+    }, None)
+    assert response['statusCode'] == 412
+    
+    failed = [r for r in call_records(sink) if r.get('Error')]
+    assert failed and failed[0]['Error'] == 'ConditionalCheckFailedException'
+    assert failed[0]['Operation'] == 'UpdateItem'
+
+
+def test_first_invocation_reports_cold_start(sink, monkeypatch):
+    monkeypatch.setattr(profiling, '_cold_start_taken', False)
+    
+    create_task_handler.lambda_handler({'body': json.dumps({'title': 'Fría'})}, FakeContext())
+    create_task_handler.lambda_handler({'body': json.dumps({'title': 'Caliente'})}, FakeContext())
+    
+    [cold] = [r for r in sink.records if 'InitDuration' in r]
+    assert cold['Handler'] == 'create_task_handler'
+    assert cold['InitDuration'] > 0
+    assert 'aws_config' in cold['Phases']
+    assert [r['ColdStart'] for r in invocation_records(sink)] == ['true', 'false']
+
+
+def test_import_timer_measures_new_modules(tmp_path, monkeypatch):
+    (tmp_path / 'modulo_lento.py').write_text('import time\ntime.sleep(0.02)\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    
+    timer = profiling.ImportTimer()
+    timer.install()
+    try:
+        __import__('modulo_lento')
+    finally:
+        timer.uninstall()
+        sys.modules.pop('modulo_lento', None)
+    
+    [timing] = [t for t in timer.timings if t['module'] == 'modulo_lento']
+    assert timing['ms'] >= 20 and timing['depth'] == 0
+    assert timer.total_ms() >= 20
+
+
+def test_sampling_profiler_collapses_stacks():
+    def busy_wait():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+    
+    sampler = profiling.SamplingProfiler(threading.get_ident(), 0.001)
+    sampler.start()
+    busy_wait()
+    stacks = sampler.stop()
+    
+    folded = profiling.collapsed_stacks(stacks)
+    assert 'busy_wait (test_instrumentation.py:' in folded
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in folded.splitlines())
+
+
+def test_sampled_invocation_writes_profile_to_s3(monkeypatch):
+    boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='profiles-bucket')
+    monkeypatch.setenv('PROFILE_SAMPLE_RATE', '1')
+    monkeypatch.setenv('PROFILE_MODE', 'cprofile')
+    monkeypatch.setenv('PROFILE_OUTPUT', 's3://profiles-bucket/lambda')
+    
+    create_task_handler.lambda_handler({'body': json.dumps({'title': 'Perfilada'})}, FakeContext())
+    
+    s3 = boto3.client('s3', region_name='us-east-1')
+    [obj] = s3.list_objects_v2(Bucket='profiles-bucket')['Contents']
+    assert obj['Key'].startswith('lambda/create_task_handler/') and obj['Key'].endswith('-req-1.prof')
+    stats = marshal.loads(s3.get_object(Bucket='profiles-bucket', Key=obj['Key'])['Body'].read())
+    assert any(func[2] == 'lambda_handler' for func in stats)
@@ -0,0 +1,84 @@
+"""
+Pruebas del codec de mensajes: compresión, claim-check en S3 y rehidratación diferida
+"""
+
+import json
+
+import boto3
+import pytest
+
+from handlers import sqs_processor_handler
+from models import TaskCreate
+from services.idempotency_service import IdempotencyService
+from services.task_service import TaskService
+from utils.message_codec import CODEC_KEY, GZIP_CODEC, S3_CODEC, LazyMessage, decode_message, encode_message
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='task-manager-files')
+    monkeypatch.setenv('S3_BUCKET_NAME', 'task-manager-files')
+    return 'task-manager-files'
+
+
+def big_message(size):
+    return {'action': 'process_new_task', 'task_id': 'task-1', 'task_data': {'description': 'x' * size}}
+
+
+def test_small_messages_stay_plain_json():
+    message = {'action': 'send_reminder', 'task_id': 'task-1'}
+    
+    body = encode_message(message)
+    
+    assert json.loads(body) == message
+    assert decode_message(body) == message
+
+
+def test_large_messages_are_compressed_and_rehydrated_lazily():
+    message = big_message(50_000)
+    
+    body = encode_message(message)
+    envelope = json.loads(body)
+    assert envelope[CODEC_KEY] == GZIP_CODEC and len(body) < 5_000
+    
+    decoded = decode_message(body)
+    assert isinstance(decoded, LazyMessage)
+    assert decoded['action'] == 'process_new_task' and 'Type' not in decoded
+    assert decoded.get('idempotency_key') is None
+    assert not decoded.loaded
+    assert decoded['task_data']['description'] == 'x' * 50_000
+    assert dict(decoded) == message
+
+
+def test_oversized_messages_go_to_s3(bucket, monkeypatch):
+    monkeypatch.setenv('MESSAGE_MAX_INLINE_BYTES', '1024')
+    # Texto poco comprimible: el sobre supera el límite en línea
+    message = big_message(0)
+    message['task_data']['files'] = [f'tasks/task-1/{n * 7919 % 100003}.pdf' for n in range(2000)]
+    
+    envelope = json.loads(encode_message(message))
+    
+    assert envelope[CODEC_KEY] == S3_CODEC and envelope['headers']['task_id'] == 'task-1'
+    assert boto3.client('s3', region_name='us-east-1').head_object(Bucket=bucket, Key=envelope['key'])
+    assert dict(decode_message(json.dumps(envelope))) == message
+
+
+def test_processor_handles_enveloped_messages_without_rehydrating(bucket, monkeypatch):
+    monkeypatch.setenv('MESSAGE_COMPRESS_THRESHOLD_BYTES', '100')
+    monkeypatch.setenv('MESSAGE_MAX_INLINE_BYTES', '100')
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    url = sqs.create_queue(QueueName='task-queue')['QueueUrl']
+    monkeypatch.setenv('SQS_QUEUE_URL', url)
+    IdempotencyService._recent_keys.clear()
+    
+    TaskService().queue_service.enqueue_task_processing(
+        TaskService().create_task(TaskCreate(title='Grande', description='d' * 900, tags=['a', 'b']))
+    )
+    message = sqs.receive_message(QueueUrl=url)['Messages'][0]
+    assert json.loads(message['Body'])[CODEC_KEY] == S3_CODEC
+    
+    record = {'messageId': message['MessageId'], 'body': message['Body']}
+    result = sqs_processor_handler.lambda_handler({'Records': [record]}, None)
+    
+    assert result['processedCount'] == 1
+    assert result['processedMessages'][0]['message_type'] == 'process_new_task'
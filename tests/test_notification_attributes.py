@@ -0,0 +1,95 @@
+"""
+Pruebas de los MessageAttributes de SNS: filter policies y despacho sin parsear el cuerpo
+"""
+
+import json
+
+import boto3
+import pytest
+
+from handlers import sqs_processor_handler
+from models import TaskCreate, TaskUpdate
+from services.idempotency_service import IdempotencyService
+from services.task_service import TaskService
+from utils.notification_attributes import PROCESSOR_FILTER_POLICY, attribute_value, message_attributes
+
+
+@pytest.fixture(autouse=True)
+def clear_state(monkeypatch):
+    IdempotencyService._recent_keys.clear()
+    monkeypatch.setattr(sqs_processor_handler, '_rollup_repository', None)
+
+
+@pytest.fixture
+def filtered_queue(monkeypatch):
+    """Cola suscrita con la filter policy del processor (como en setup_localstack)
+    
+    Los mensajes directos de QueueService van a otra cola: aquí solo llega SNS.
+    """
+    sns = boto3.client('sns', region_name='us-east-1')
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    arn = sns.create_topic(Name='task-notifications')['TopicArn']
+    url = sqs.create_queue(QueueName='task-notifications-queue')['QueueUrl']
+    queue_arn = sqs.get_queue_attributes(QueueUrl=url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+    sns.subscribe(
+        TopicArn=arn, Protocol='sqs', Endpoint=queue_arn,
+        Attributes={'FilterPolicy': json.dumps(PROCESSOR_FILTER_POLICY)}
+    )
+    monkeypatch.setenv('SNS_TOPIC_ARN', arn)
+    monkeypatch.setenv('SQS_QUEUE_URL', sqs.create_queue(QueueName='task-queue')['QueueUrl'])
+    return url
+
+
+def drain(queue_url):
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    records = []
+    while True:
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+        if not messages:
+            return records
+        for message in messages:
+            records.append({'messageId': message['MessageId'], 'body': message['Body']})
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+
+
+def test_message_attributes_skip_empty_values():
+    attributes = message_attributes('task_reminder', priority=None, status='pending')
+
+    assert set(attributes) == {'event_type', 'status'}
+    assert attributes['event_type'] == {'DataType': 'String', 'StringValue': 'task_reminder'}
+    assert attribute_value({'event_type': {'Type': 'String', 'Value': 'task_created'}}, 'event_type') == 'task_created'
+    assert attribute_value({'event_type': {'dataType': 'String', 'stringValue': 'task_updated'}}, 'event_type') == 'task_updated'
+    assert attribute_value({}, 'event_type') is None
+
+
+def test_filter_policy_delivers_only_processor_events(filtered_queue):
+    service = TaskService()
+    task = service.create_task(TaskCreate(title='Uno', priority='high'))
+    service.update_task(task.id, TaskUpdate(status='completed'))
+    service.delete_task(task.id)
+
+    envelopes = [json.loads(record['body']) for record in drain(filtered_queue)]
+    event_types = sorted(envelope['MessageAttributes']['event_type']['Value'] for envelope in envelopes)
+
+    assert event_types == ['task_created', 'task_updated']
+    created = next(e for e in envelopes if e['MessageAttributes']['event_type']['Value'] == 'task_created')
+    assert created['MessageAttributes']['priority']['Value'] == 'high'
+    assert created['MessageAttributes']['status']['Value'] == 'pending'
+
+
+def test_processor_dispatches_on_attributes_without_parsing_body(monkeypatch):
+    parsed = []
+    monkeypatch.setattr(sqs_processor_handler, 'parse_sns_message', lambda content: parsed.append(content) or {})
+    envelope = {
+        'Type': 'Notification',
+        'MessageId': 'sns-1',
+        'Subject': 'Tarea eliminada: Uno',
+        'Message': '{"task_id": "t1"}',
+        'MessageAttributes': {'event_type': {'Type': 'String', 'Value': 'task_deleted'}}
+    }
+
+    result = sqs_processor_handler.lambda_handler({'Records': [{'messageId': 'm1', 'body': json.dumps(envelope)}]}, None)
+
+    assert result['failedCount'] == 0
+    assert result['processedMessages'][0]['notification_type'] == 'task_deleted'
+    assert parsed == []
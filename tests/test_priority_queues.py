@@ -0,0 +1,105 @@
+"""
+Pruebas del ruteo por prioridad entre las colas de la topología
+"""
+
+import json
+from datetime import datetime
+
+import boto3
+import pytest
+
+from handlers import sqs_processor_handler
+from models import Task, TaskPriority, TaskStatus
+from services.idempotency_service import IdempotencyService
+from services.queue_service import QueueService
+from utils.queue_topology import QUEUE_TOPOLOGY, event_source_mapping, queue_class_for
+
+
+@pytest.fixture
+def queues(monkeypatch):
+    """Una cola por clase de la topología, con su variable de entorno"""
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    urls = {}
+    for queue_class, queue in QUEUE_TOPOLOGY.items():
+        urls[queue_class] = sqs.create_queue(QueueName=queue.name)['QueueUrl']
+        monkeypatch.setenv(queue.env_var, urls[queue_class])
+    monkeypatch.setenv('SQS_QUEUE_URL', urls['standard'])
+    return urls
+
+
+def make_task(title, priority):
+    now = datetime.utcnow()
+    return Task(id=f'task-{title}', title=title, status=TaskStatus.PENDING, priority=priority,
+                created_at=now, updated_at=now)
+
+
+def receive_bodies(queue_url):
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    bodies = []
+    while True:
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+        if not messages:
+            return bodies
+        for message in messages:
+            bodies.append(json.loads(message['Body']))
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+
+
+def test_queue_class_for_routes_bulk_and_priorities():
+    assert queue_class_for('generate_task_report') == 'bulk'
+    assert queue_class_for('cleanup_completed_tasks') == 'bulk'
+    assert queue_class_for('process_new_task', 'critical') == 'critical'
+    assert queue_class_for('process_new_task', 'low') == 'standard'
+    assert queue_class_for('send_reminder') == 'standard'
+    assert event_source_mapping('critical')['BatchSize'] == 1
+
+
+def test_critical_tasks_skip_bulk_backlog(queues):
+    service = QueueService()
+    for _ in range(5):
+        service.enqueue_generate_report()
+    service.enqueue_cleanup_tasks()
+    service.enqueue_task_processing(make_task('Urgente', TaskPriority.CRITICAL))
+    service.enqueue_task_processing(make_task('Normal', TaskPriority.MEDIUM))
+    
+    critical = receive_bodies(queues['critical'])
+    assert [body['task_data']['title'] for body in critical] == ['Urgente']
+    assert [body['task_data']['title'] for body in receive_bodies(queues['standard'])] == ['Normal']
+    assert len(receive_bodies(queues['bulk'])) == 6
+
+
+def test_reminders_are_split_by_priority(queues):
+    reminders = [
+        {'task_id': f'task-{i}', 'priority': priority, 'idempotency_key': f'reminder#{i}', 'delay_seconds': 0}
+        for i, priority in enumerate(['high', 'low', 'high', 'critical'] * 6)
+    ]
+    
+    assert QueueService().enqueue_task_reminders(reminders) == 24
+    assert len(receive_bodies(queues['high'])) == 12
+    assert len(receive_bodies(queues['standard'])) == 6
+    assert len(receive_bodies(queues['critical'])) == 6
+
+
+def test_single_queue_deployment_falls_back(monkeypatch):
+    url = boto3.client('sqs', region_name='us-east-1').create_queue(QueueName='task-queue')['QueueUrl']
+    monkeypatch.setenv('SQS_QUEUE_URL', url)
+    
+    service = QueueService()
+    service.enqueue_generate_report()
+    service.enqueue_task_processing(make_task('Urgente', TaskPriority.CRITICAL))
+    
+    assert len(receive_bodies(url)) == 2
+
+
+def test_processor_reports_queue_class():
+    IdempotencyService._recent_keys.clear()
+    event = {'Records': [{
+        'messageId': 'm-1',
+        'eventSourceARN': 'arn:aws:sqs:us-east-1:000000000000:task-queue-critical',
+        'body': json.dumps({'type': 'task_processing', 'task_id': 'task-1'})
+    }]}
+    
+    result = sqs_processor_handler.lambda_handler(event, None)
+    
+    assert result['queueClass'] == 'critical'
+    assert result['processedCount'] == 1
@@ -0,0 +1,79 @@
+"""
+Pruebas del scheduler de recordatorios y su entrega por el SQS processor
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import boto3
+import pytest
+
+from handlers import sqs_processor_handler
+from models import TaskCreate
+from services.idempotency_service import IdempotencyService
+from services.reminder_service import ReminderService
+from services.task_service import TaskService
+
+
+@pytest.fixture(autouse=True)
+def clear_idempotency_cache():
+    IdempotencyService._recent_keys.clear()
+
+
+@pytest.fixture
+def queue_url(monkeypatch):
+    url = boto3.client('sqs', region_name='us-east-1').create_queue(QueueName='task-queue')['QueueUrl']
+    monkeypatch.setenv('SQS_QUEUE_URL', url)
+    return url
+
+
+@pytest.fixture
+def topic_arn(monkeypatch):
+    arn = boto3.client('sns', region_name='us-east-1').create_topic(Name='task-notifications')['TopicArn']
+    monkeypatch.setenv('SNS_TOPIC_ARN', arn)
+    return arn
+
+
+def receive_all(queue_url):
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    records = []
+    while True:
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+        if not messages:
+            return records
+        for message in messages:
+            records.append({'messageId': message['MessageId'], 'body': message['Body']})
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+
+
+def test_scheduler_enqueues_only_upcoming_window(queue_url, monkeypatch):
+    monkeypatch.setenv('REMINDER_LEAD_MINUTES', '60')
+    now = datetime.utcnow()
+    service = TaskService()
+    in_window = service.create_task(TaskCreate(title='Pronto', due_date=now + timedelta(minutes=60)))
+    service.create_task(TaskCreate(title='Lejos', due_date=now + timedelta(hours=5)))
+    service.create_task(TaskCreate(title='Vencida', due_date=now - timedelta(hours=1)))
+    
+    result = ReminderService().schedule_upcoming(now)
+    
+    assert result['found'] == 1 and result['enqueued'] == 1
+    bodies = [json.loads(record['body']) for record in receive_all(queue_url)]
+    reminders = [body for body in bodies if body['action'] == 'send_reminder']
+    assert len(reminders) == 1
+    body = reminders[0]
+    assert body['task_id'] == in_window.id
+    assert body['idempotency_key'].startswith(f'reminder#{in_window.id}#')
+
+
+def test_processor_publishes_reminders_once(topic_arn):
+    reminder = {'action': 'send_reminder', 'task_id': 't1', 'title': 'Tarea', 'idempotency_key': 'reminder#t1#x'}
+    event = {'Records': [
+        {'messageId': 'm1', 'body': json.dumps(reminder)},
+        {'messageId': 'm2', 'body': json.dumps(reminder)}
+    ]}
+    
+    result = sqs_processor_handler.lambda_handler(event, None)
+    
+    assert result['failedCount'] == 0
+    duplicates = [message for message in result['processedMessages'] if message.get('duplicate')]
+    assert len(duplicates) == 1
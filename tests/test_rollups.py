@@ -0,0 +1,104 @@
+"""
+Pruebas de los rollups de throughput y la serie de tiempo
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import boto3
+import pytest
+
+from handlers import sqs_processor_handler, stats_timeseries_handler
+from models import TaskCreate, TaskUpdate
+from repositories.rollup_repository import RollupRepository
+from services.idempotency_service import IdempotencyService
+from services.stats_service import StatsService
+from services.task_service import TaskService
+
+
+@pytest.fixture(autouse=True)
+def clear_state(monkeypatch):
+    IdempotencyService._recent_keys.clear()
+    monkeypatch.setattr(sqs_processor_handler, '_rollup_repository', None)
+
+
+@pytest.fixture
+def subscribed_queue(monkeypatch):
+    """Cola suscrita al tópico de notificaciones (como en la infraestructura)"""
+    sns = boto3.client('sns', region_name='us-east-1')
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    arn = sns.create_topic(Name='task-notifications')['TopicArn']
+    url = sqs.create_queue(QueueName='task-queue')['QueueUrl']
+    queue_arn = sqs.get_queue_attributes(QueueUrl=url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+    sns.subscribe(TopicArn=arn, Protocol='sqs', Endpoint=queue_arn)
+    monkeypatch.setenv('SNS_TOPIC_ARN', arn)
+    monkeypatch.setenv('SQS_QUEUE_URL', url)
+    return url
+
+
+def drain(queue_url):
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    records = []
+    while True:
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+        if not messages:
+            return records
+        for message in messages:
+            records.append({'messageId': message['MessageId'], 'body': message['Body']})
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+
+
+def test_notifications_feed_hourly_and_daily_rollups(subscribed_queue):
+    service = TaskService()
+    first = service.create_task(TaskCreate(title='Uno'))
+    service.create_task(TaskCreate(title='Dos'))
+    service.update_task(first.id, TaskUpdate(status='in_progress'))
+    service.update_task(first.id, TaskUpdate(status='completed'))
+    service.update_task(first.id, TaskUpdate(title='Sin cambio de estado'))
+    
+    records = drain(subscribed_queue)
+    envelopes = [json.loads(r['body']) for r in records]
+    notification_types = [json.loads(e['Message']).get('notification_type') for e in envelopes if 'Message' in e]
+    assert notification_types.count('task_created') == 2
+    assert notification_types.count('task_updated') == 2
+    
+    sqs_processor_handler.lambda_handler({'Records': records}, None)
+    
+    now = datetime.utcnow()
+    for granularity in ('hour', 'day'):
+        buckets = RollupRepository().find_buckets(now - timedelta(hours=1), now, granularity)
+        assert sum(b['created'] for b in buckets) == 2
+        assert sum(b['completed'] for b in buckets) == 1
+
+
+def test_timeseries_fills_empty_buckets():
+    repository = RollupRepository()
+    start = datetime(2024, 5, 1, 0, 30)
+    repository.increment('created', datetime(2024, 5, 1, 1, 10), count=3)
+    repository.increment('completed', datetime(2024, 5, 1, 3, 59))
+    
+    series = StatsService().timeseries(start, datetime(2024, 5, 1, 4, 0))
+    
+    assert [b['bucket'] for b in series] == [f'2024-05-01T0{h}' for h in range(5)]
+    assert [b['created'] for b in series] == [0, 3, 0, 0, 0]
+    assert [b['completed'] for b in series] == [0, 0, 0, 1, 0]
+    
+    daily = StatsService().timeseries(start, datetime(2024, 5, 2), 'day')
+    assert daily == [
+        {'bucket': '2024-05-01', 'created': 3, 'completed': 1},
+        {'bucket': '2024-05-02', 'created': 0, 'completed': 0}
+    ]
+
+
+def test_timeseries_handler_validates_parameters():
+    def call(params):
+        return stats_timeseries_handler.lambda_handler({'queryStringParameters': params}, None)
+    
+    assert call({'granularity': 'week'})['statusCode'] == 400
+    assert call({'from': 'ayer'})['statusCode'] == 400
+    assert call({'from': '2024-05-02T00:00:00', 'to': '2024-05-01T00:00:00'})['statusCode'] == 400
+    assert call({'from': '2020-01-01T00:00:00', 'to': '2024-01-01T00:00:00'})['statusCode'] == 400
+    
+    response = call({'granularity': 'day', 'from': '2024-05-01T00:00:00', 'to': '2024-05-03T12:00:00'})
+    assert response['statusCode'] == 200
+    assert [b['bucket'] for b in json.loads(response['body'])['series']] == ['2024-05-01', '2024-05-02', '2024-05-03']
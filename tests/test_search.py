@@ -0,0 +1,79 @@
+"""
+Pruebas de la búsqueda de texto completo
+"""
+
+import pytest
+
+from models import TaskCreate, TaskUpdate
+from repositories.search_index_repository import InMemorySearchIndexRepository, SearchIndexRepository
+from services.task_service import TaskService
+from utils.text_search import tokenize, bm25
+
+
+@pytest.fixture(params=['dynamodb', 'memory'])
+def backend(request, monkeypatch):
+    """Cada prueba corre con el índice en DynamoDB y en memoria"""
+    monkeypatch.setenv('SEARCH_INDEX_BACKEND', request.param)
+    SearchIndexRepository._cache.clear()
+    InMemorySearchIndexRepository.reset()
+    return request.param
+
+
+def create_task(title, description=None):
+    return TaskService().create_task(TaskCreate(title=title, description=description))
+
+
+def test_tokenize_normalizes_accents_and_stopwords():
+    assert tokenize('Revisión de la Documentación, v2!') == ['revision', 'documentacion', 'v2']
+
+
+def test_bm25_prefers_rarer_terms_and_shorter_documents():
+    assert bm25(tf=1, df=1, doc_len=5, avg_doc_len=5, doc_count=10) > bm25(tf=1, df=8, doc_len=5, avg_doc_len=5, doc_count=10)
+    assert bm25(tf=1, df=1, doc_len=3, avg_doc_len=5, doc_count=10) > bm25(tf=1, df=1, doc_len=20, avg_doc_len=5, doc_count=10)
+
+
+def test_search_ranks_and_matches_prefixes(backend):
+    docs = create_task('Documentación', 'Actualizar documentación del API')
+    create_task('Deploy producción', 'Revisar documentación de despliegue y monitoreo del cluster')
+    create_task('Comprar café')
+    
+    results = TaskService().search_tasks('docu')
+    
+    assert len(results) == 2
+    assert results[0].id == docs.id
+
+
+def test_search_index_follows_updates_and_deletes(backend):
+    service = TaskService()
+    task = create_task('Preparar informe')
+    
+    service.update_task(task.id, TaskUpdate(title='Preparar presentación'))
+    assert service.search_tasks('informe') == []
+    assert [t.id for t in service.search_tasks('presentacion')] == [task.id]
+    
+    service.delete_task(task.id)
+    assert service.search_tasks('preparar') == []
+
+
+def test_search_handler_validates_limit():
+    from handlers import search_tasks_handler
+    
+    def status_for(limit):
+        event = {'queryStringParameters': {'q': 'informe', 'limit': limit}}
+        return search_tasks_handler.lambda_handler(event, None)['statusCode']
+    
+    assert status_for('0') == 400
+    assert status_for('abc') == 400
+    assert status_for(str(search_tasks_handler.MAX_SEARCH_LIMIT + 1)) == 400
+    assert status_for('5') == 200
+
+
+def test_search_cache_is_bounded(monkeypatch):
+    from utils.cache import LRUCache
+    
+    monkeypatch.setattr(SearchIndexRepository, '_cache', LRUCache(max_size=2, ttl_seconds=30))
+    repository = SearchIndexRepository()
+    for prefix in ('aa', 'bb', 'cc'):
+        repository.find_postings(prefix)
+    
+    assert len(SearchIndexRepository._cache) == 2
@@ -0,0 +1,78 @@
+"""
+Presupuesto de cold start por handler: tiempo de import y módulos cargados
+
+Cada handler se importa en un intérprete nuevo (como un contenedor Lambda
+recién creado). Si una dependencia pesada vuelve al init, el test falla.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+LAMBDAS_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambdas')
+
+# Margen generoso para tiempo (CI ruidoso); el número de módulos es estable
+IMPORT_TIME_BUDGET_MS = 1500
+
+# Módulos que solo deben cargarse en el handler que los usa (o al primer uso)
+DEFERRED_MODULES = ('services.file_service', 'services.notification_service', 'services.queue_service', 'dotenv')
+
+HANDLER_BUDGETS = {
+    'create_task_handler': {'max_modules': 520, 'allowed': ()},
+    'list_tasks_handler': {'max_modules': 520, 'allowed': ()},
+    'list_tags_handler': {'max_modules': 520, 'allowed': ()},
+    'search_tasks_handler': {'max_modules': 520, 'allowed': ()},
+    'update_task_handler': {'max_modules': 520, 'allowed': ()},
+    'update_tags_handler': {'max_modules': 520, 'allowed': ()},
+    'delete_task_handler': {'max_modules': 520, 'allowed': ()},
+    'upload_file_handler': {'max_modules': 520, 'allowed': ('services.file_service',)},
+    'sqs_processor_handler': {'max_modules': 460, 'allowed': ()},
+    'reminder_scheduler_handler': {'max_modules': 520, 'allowed': ('services.queue_service',)},
+    # StatsService trae NumPy (opcional) para el resumen
+    'stats_timeseries_handler': {'max_modules': 620, 'allowed': ()}
+}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import handlers.{handler}
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{'ms': elapsed_ms, 'modules': len(sys.modules), 'loaded': sorted(sys.modules)}}))
+"""
+
+
+def cold_import(handler):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(handler=handler)],
+        cwd=LAMBDAS_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('handler', sorted(HANDLER_BUDGETS))
+def test_handler_cold_import_budget(handler):
+    budget = HANDLER_BUDGETS[handler]
+    result = cold_import(handler)
+    
+    assert result['ms'] < IMPORT_TIME_BUDGET_MS
+    assert result['modules'] <= budget['max_modules']
+    unexpected = [m for m in DEFERRED_MODULES if m in result['loaded'] and m not in budget['allowed']]
+    assert unexpected == []
+
+
+@pytest.mark.parametrize('function_name,hooked', [(None, False), ('task-manager-createtask', True)])
+def test_import_timer_is_only_installed_in_lambda(function_name, hooked):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    env.pop('AWS_LAMBDA_FUNCTION_NAME', None)
+    if function_name:
+        env['AWS_LAMBDA_FUNCTION_NAME'] = function_name
+    probe = "import builtins, handlers; print(builtins.__import__.__name__ != '__import__')"
+    output = subprocess.run(
+        [sys.executable, '-c', probe], cwd=LAMBDAS_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    
+    assert output.strip().splitlines()[-1] == str(hooked)
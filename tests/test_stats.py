@@ -0,0 +1,67 @@
+"""
+Pruebas del resumen de estadísticas (Scan segmentado + agregación por página)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import services.stats_service as stats_service
+from models import TaskCreate, TaskUpdate
+from services.stats_service import StatsService
+from services.task_service import TaskService
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def aggregation(request, monkeypatch):
+    """Ambas implementaciones deben dar el mismo resultado"""
+    if request.param == 'python':
+        monkeypatch.setattr(stats_service, 'np', None)
+    elif stats_service.np is None:
+        pytest.skip('NumPy no instalado')
+    return request.param
+
+
+def test_summary_covers_whole_table(aggregation, monkeypatch):
+    monkeypatch.setenv('STATS_SCAN_SEGMENTS', '3')
+    service = TaskService()
+    now = datetime.utcnow()
+    
+    overdue = service.create_task(TaskCreate(title='Vencida', priority='high', due_date=now - timedelta(days=1)))
+    service.create_task(TaskCreate(title='A tiempo', due_date=now + timedelta(days=1)))
+    done = service.create_task(TaskCreate(title='Hecha', due_date=now - timedelta(days=2)))
+    service.update_task(done.id, TaskUpdate(status='completed'))
+    service.add_file_to_task(overdue.id, 'tasks/a.txt')
+    for n in range(5):
+        service.create_task(TaskCreate(title=f'Sin fecha {n}', priority='low'))
+    
+    stats = StatsService().summary(now=now)
+    
+    assert stats == {
+        'total_tasks': 8,
+        'by_status': {'pending': 7, 'completed': 1},
+        'by_priority': {'high': 1, 'medium': 2, 'low': 5},
+        'with_files': 1,
+        'overdue': 1
+    }
+    assert stats['overdue'] == service.count_overdue_tasks(now)
+
+
+def test_overdue_converts_stored_offsets_to_utc(aggregation):
+    # Item anterior a la normalización: 10:00-05:00 es 15:00 UTC
+    items = [{'status': 'pending', 'priority': 'medium', 'due_date': '2026-01-01T10:00:00-05:00'}]
+    
+    assert stats_service.aggregate_page(items, '2026-01-01T12:00:00').overdue == 0
+    assert stats_service.aggregate_page(items, '2026-01-01T16:00:00').overdue == 1
+
+
+def test_malformed_due_date_is_skipped(aggregation):
+    items = [
+        {'status': 'pending', 'priority': 'medium', 'due_date': 'not-a-date'},
+        {'status': 'pending', 'priority': 'high', 'due_date': '2026-01-01T10:00:00'}
+    ]
+    
+    aggregate = stats_service.aggregate_page(items, '2026-01-01T12:00:00')
+    
+    assert aggregate.total == 2
+    assert aggregate.overdue == 1
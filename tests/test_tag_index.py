@@ -0,0 +1,86 @@
+"""
+Pruebas del índice invertido de tags
+"""
+
+from models import TaskCreate, TaskUpdate
+from repositories.tag_index_repository import _intersect_sorted, _union_sorted
+from services.task_service import TaskService
+
+
+def create_task(title, tags):
+    return TaskService().create_task(TaskCreate(title=title, tags=tags))
+
+
+def test_intersect_and_union_sorted_lists():
+    a = ['9#a', '7#c', '5#e', '1#g']
+    b = ['8#b', '7#c', '1#g']
+    
+    assert _intersect_sorted([a, b]) == ['7#c', '1#g']
+    assert _union_sorted([a, b]) == ['9#a', '8#b', '7#c', '5#e', '1#g']
+
+
+def test_tag_queries_use_index():
+    service = TaskService()
+    first = create_task('Primera', ['trabajo', 'urgente'])
+    second = create_task('Segunda', ['trabajo'])
+    create_task('Tercera', ['casa'])
+    
+    trabajo = service.list_tasks(tag_filter='trabajo')
+    assert [task.id for task in trabajo] == [second.id, first.id]
+    
+    both = service.list_tasks(tag_filter='trabajo,urgente')
+    assert [task.id for task in both] == [first.id]
+    
+    either = service.list_tasks(tag_filter='urgente,casa', tag_match_all=False)
+    assert len(either) == 2
+
+
+def test_index_follows_updates_and_deletes():
+    service = TaskService()
+    task = create_task('Tarea', ['a', 'b'])
+    
+    service.update_task(task.id, TaskUpdate(tags=['b', 'c']))
+    assert service.list_tasks(tag_filter='a') == []
+    assert [t.id for t in service.list_tasks(tag_filter='c')] == [task.id]
+    
+    service.update_tags(task.id, remove=['c'], add=['d'])
+    assert service.list_tasks(tag_filter='c') == []
+    assert [t.id for t in service.list_tasks(tag_filter='d')] == [task.id]
+    
+    service.delete_task(task.id)
+    assert service.list_tasks(tag_filter='b') == []
+
+
+def test_tag_counts_for_autocomplete():
+    service = TaskService()
+    create_task('Uno', ['trabajo', 'tramite'])
+    task = create_task('Dos', ['trabajo'])
+    service.remove_tags(task.id, ['trabajo'])
+    create_task('Tres', ['trabajo', 'casa'])
+    
+    assert service.get_tag_counts(prefix='tra') == [
+        {'tag': 'trabajo', 'count': 2},
+        {'tag': 'tramite', 'count': 1}
+    ]
+
+
+def test_backfill_indexes_tasks_written_before_the_index():
+    from datetime import datetime
+    from models import Task
+    from repositories.task_repository import TaskRepository
+    
+    repository = TaskRepository()
+    legacy = Task(id='legacy-1', title='Antigua', status='pending', priority='medium', tags=['trabajo', 'viejo'],
+                  created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1))
+    # Escrita directo en la tabla, como antes de existir el índice
+    item = {key: value for key, value in repository._task_to_dynamodb_item(legacy).items() if value is not None}
+    repository.table.put_item(Item=item)
+    recent = create_task('Nueva', ['trabajo'])
+    service = TaskService()
+    assert [t.id for t in service.list_tasks(tag_filter='trabajo')] == [recent.id]
+    
+    assert repository.backfill_tag_index() == 2
+    assert repository.backfill_tag_index() == 2
+    
+    assert [t.id for t in service.list_tasks(tag_filter='trabajo')] == [recent.id, legacy.id]
+    assert service.get_tag_counts() == [{'tag': 'trabajo', 'count': 2}, {'tag': 'viejo', 'count': 1}]
@@ -0,0 +1,80 @@
+"""
+Pruebas del cache read-through de tareas
+"""
+
+import pytest
+
+from models import TaskCreate, TaskUpdate
+from repositories.cached_task_repository import CachedTaskRepository, get_task_repository
+from repositories.task_repository import TaskRepository
+from services.task_service import TaskService
+from utils.cache import CacheBackend, InMemorySharedCache
+
+
+def test_find_by_id_hits_local_cache_after_first_read():
+    task = TaskService().create_task(TaskCreate(title='Cacheada'))
+    repository = CachedTaskRepository()
+    
+    assert repository.find_by_id(task.id).title == 'Cacheada'
+    assert repository.find_by_id(task.id).title == 'Cacheada'
+    
+    stats = CachedTaskRepository.stats.snapshot()
+    assert stats['counts'] == {'local_hit': 1, 'shared_hit': 0, 'miss': 1}
+    assert stats['hit_ratio'] == 0.5
+
+
+def test_writes_invalidate_cached_task():
+    service = TaskService()
+    task = service.create_task(TaskCreate(title='Original'))
+    assert service.get_task_by_id(task.id).title == 'Original'
+    
+    service.update_task(task.id, TaskUpdate(title='Editada'))
+    assert service.get_task_by_id(task.id).title == 'Editada'
+    
+    service.add_tags(task.id, ['nuevo'])
+    assert service.get_task_by_id(task.id).tags == ['nuevo']
+    
+    service.delete_task(task.id)
+    assert service.get_task_by_id(task.id) is None
+
+
+def test_shared_cache_serves_other_processes():
+    task = TaskService().create_task(TaskCreate(title='Compartida'))
+    CachedTaskRepository(shared_cache=InMemorySharedCache()).find_by_id(task.id)
+    
+    # Otro contenedor: cache local vacío y la tabla ya no tiene la tarea
+    CachedTaskRepository._local_cache.clear()
+    TaskRepository().table.delete_item(Key={'id': task.id})
+    
+    cached = CachedTaskRepository(shared_cache=InMemorySharedCache()).find_by_id(task.id)
+    assert cached.title == 'Compartida'
+    assert CachedTaskRepository.stats.snapshot()['counts']['shared_hit'] == 1
+
+
+def test_cache_is_off_by_default_in_lambda(monkeypatch):
+    monkeypatch.delenv('TASK_CACHE_TTL_SECONDS', raising=False)
+    assert isinstance(get_task_repository(), CachedTaskRepository)
+    
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'task-manager-gettask')
+    assert type(get_task_repository()) is TaskRepository
+    
+    monkeypatch.setenv('TASK_CACHE_TTL_SECONDS', '5')
+    assert isinstance(get_task_repository(), CachedTaskRepository)
+
+
+@pytest.mark.parametrize('name,value', [('SERVER_SOFTWARE', 'gunicorn/23.0.0'), ('WEB_CONCURRENCY', '4')])
+def test_cache_is_off_by_default_with_several_workers(monkeypatch, name, value):
+    monkeypatch.delenv('TASK_CACHE_TTL_SECONDS', raising=False)
+    monkeypatch.delenv('AWS_LAMBDA_FUNCTION_NAME', raising=False)
+    monkeypatch.setenv(name, value)
+    
+    assert type(get_task_repository()) is TaskRepository
+
+
+def test_incomplete_cache_backend_fails_at_instantiation():
+    class OnlyGet(CacheBackend):
+        def get(self, key):
+            return None
+    
+    with pytest.raises(TypeError):
+        OnlyGet()
@@ -0,0 +1,188 @@
+"""
+Pruebas del repositorio de tareas contra DynamoDB simulado
+"""
+
+import pytest
+
+from models import TaskCreate, TaskUpdate
+from repositories.task_repository import TaskRepository, VersionConflictError
+from services.task_service import TaskService
+
+
+def create_task(**fields):
+    fields.setdefault('title', 'Tarea de prueba')
+    return TaskService().create_task(TaskCreate(**fields))
+
+
+def test_update_increments_version():
+    task = create_task()
+    assert task.version == 1
+    
+    updated = TaskRepository().update(task.id, {'title': 'Nuevo título'})
+    assert updated.version == 2
+    assert updated.title == 'Nuevo título'
+
+
+def test_update_with_stale_version_conflicts():
+    task = create_task()
+    repository = TaskRepository()
+    repository.update(task.id, {'title': 'Primero'}, expected_version=1)
+    
+    with pytest.raises(VersionConflictError):
+        repository.update(task.id, {'title': 'Segundo'}, expected_version=1)
+    
+    assert repository.find_by_id(task.id).title == 'Primero'
+
+
+def test_update_task_if_match_missing_task_returns_none():
+    result = TaskService().update_task('no-existe', TaskUpdate(title='x'), expected_version=1)
+    assert result is None
+
+
+def test_add_and_remove_tags_keep_concurrent_changes():
+    task = create_task(tags=['a'])
+    service = TaskService()
+    
+    service.add_tags(task.id, ['b'])
+    service.add_tags(task.id, ['c', 'a'])
+    updated = service.remove_tags(task.id, ['a'])
+    
+    assert sorted(updated.tags) == ['b', 'c']
+
+
+def test_update_tags_uses_string_set_without_read():
+    task = create_task(tags=['a', 'b'])
+    repository = TaskRepository()
+    
+    updated = repository.update_tags(task.id, add=['c'], remove=['a'])
+    
+    assert updated.tags == ['b', 'c']
+    assert updated.version == 3
+    assert repository.table.get_item(Key={'id': task.id})['Item']['tags'] == {'b', 'c'}
+
+
+def test_update_tags_missing_task_returns_none():
+    assert TaskRepository().update_tags('no-existe', add=['a']) is None
+
+
+def test_update_tags_migrates_legacy_list():
+    task = create_task()
+    repository = TaskRepository()
+    repository.table.update_item(
+        Key={'id': task.id},
+        UpdateExpression='SET tags = :tags',
+        ExpressionAttributeValues={':tags': ['viejo', 'otro']}
+    )
+    
+    updated = TaskService().update_tags(task.id, add=['nuevo'], remove=['otro'])
+    
+    assert sorted(updated.tags) == ['nuevo', 'viejo']
+    assert repository.table.get_item(Key={'id': task.id})['Item']['tags'] == {'nuevo', 'viejo'}
+
+
+def test_update_tags_only_treats_operand_type_errors_as_legacy(monkeypatch):
+    from botocore.exceptions import ClientError
+    
+    task = create_task()
+    repository = TaskRepository()
+    
+    def invalid_input(**kwargs):
+        raise ClientError({'Error': {'Code': 'ValidationException', 'Message': 'Item size has exceeded the maximum allowed size'}}, 'UpdateItem')
+    monkeypatch.setattr(repository.table, 'update_item', invalid_input)
+    
+    with pytest.raises(ClientError):
+        repository.update_tags(task.id, add=['a'])
+
+
+def test_due_date_index_only_contains_open_tasks():
+    from datetime import datetime, timedelta
+    
+    now = datetime.utcnow()
+    service = TaskService()
+    overdue = create_task(due_date=now - timedelta(days=2))
+    soon = create_task(due_date=now + timedelta(hours=1))
+    create_task(due_date=now + timedelta(days=30))
+    done = create_task(due_date=now - timedelta(days=1))
+    create_task()
+    service.update_task(done.id, TaskUpdate(status='completed'))
+    
+    assert service.count_overdue_tasks(now) == 1
+    
+    due = service.list_tasks_due(due_after=now - timedelta(days=7), due_before=now + timedelta(days=1))
+    assert [task.id for task in due] == [overdue.id, soon.id]
+    
+    # Reabrir la tarea la devuelve al índice
+    service.update_task(done.id, TaskUpdate(status='in_progress'))
+    assert service.count_overdue_tasks(now) == 2
+
+
+def test_due_dates_with_offset_are_stored_in_utc():
+    from datetime import datetime, timedelta, timezone
+    
+    # 10:00-05:00 es 15:00Z: no vence antes de las 12:00 UTC
+    eastern = timezone(timedelta(hours=-5))
+    task = create_task(due_date=datetime(2026, 1, 1, 10, 0, tzinfo=eastern))
+    repository = TaskRepository()
+    
+    assert repository.table.get_item(Key={'id': task.id})['Item']['due_date'] == '2026-01-01T15:00:00'
+    assert repository.find_due_between(due_before='2026-01-01T12:00:00') == []
+    assert [t.id for t in repository.find_due_between(due_before='2026-01-01T16:00:00')] == [task.id]
+    
+    repository.update(task.id, {'due_date': datetime(2026, 1, 2, 1, 0, tzinfo=eastern)})
+    assert repository.table.get_item(Key={'id': task.id})['Item']['due_date'] == '2026-01-02T06:00:00'
+
+
+def test_backfill_rewrites_due_dates_with_offset():
+    task = create_task()
+    repository = TaskRepository()
+    # Item anterior a la normalización: offset guardado tal cual y sin due_shard
+    repository.table.update_item(
+        Key={'id': task.id},
+        UpdateExpression='SET due_date = :due_date REMOVE due_shard',
+        ExpressionAttributeValues={':due_date': '2026-01-01T10:00:00-05:00'}
+    )
+    
+    assert repository.backfill_due_date_index() == 1
+    item = repository.table.get_item(Key={'id': task.id})['Item']
+    assert item['due_date'] == '2026-01-01T15:00:00' and 'due_shard' in item
+    assert repository.backfill_due_date_index() == 0
+
+
+def test_find_by_ids_uses_batch_get_in_chunks(monkeypatch):
+    tasks = [create_task(title=f'Tarea {n}') for n in range(120)]
+    ids = [task.id for task in reversed(tasks)] + ['no-existe']
+    
+    repository = TaskRepository()
+    calls = []
+    repository.dynamodb.meta.client.meta.events.register(
+        'before-call.dynamodb.BatchGetItem', lambda **kwargs: calls.append(kwargs)
+    )
+    
+    found = repository.find_by_ids(ids)
+    assert [task.id for task in found] == ids[:-1]
+    assert len(calls) == 2
+
+
+def test_find_by_ids_retries_unprocessed_keys(monkeypatch):
+    first, second = create_task(title='Uno'), create_task(title='Dos')
+    repository = TaskRepository()
+    client = repository.dynamodb.meta.client
+    real_batch_get = client.batch_get_item
+    responses = []
+    
+    def flaky_batch_get(RequestItems):
+        response = real_batch_get(RequestItems=RequestItems)
+        if not responses:
+            # Simular throttling: la segunda clave vuelve como no procesada
+            table = repository.table.name
+            unprocessed = response['Responses'][table].pop()
+            response['UnprocessedKeys'] = {table: {'Keys': [{'id': unprocessed['id']}]}}
+        responses.append(response)
+        return response
+    
+    monkeypatch.setattr(client, 'batch_get_item', flaky_batch_get)
+    monkeypatch.setattr('repositories.task_repository.time.sleep', lambda seconds: None)
+    
+    found = repository.find_by_ids([first.id, second.id])
+    assert {task.id for task in found} == {first.id, second.id}
+    assert len(responses) == 2
@@ -0,0 +1,59 @@
+"""
+Pruebas del generador de tráfico: distribuciones, histograma y lazo abierto
+"""
+
+import asyncio
+import os
+import random
+import sys
+from collections import Counter
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'local'))
+
+from traffic_generator import HandlerTarget, LatencyHistogram, Workload, run_open_loop, seed_tasks, zipf_rank  # noqa: E402
+
+
+def test_zipf_ranks_are_skewed_towards_popular_tasks():
+    rng = random.Random(7)
+    counts = Counter(zipf_rank(rng, 100, 1.1) for _ in range(20000))
+    
+    assert set(counts) <= set(range(100))
+    assert counts[0] > counts[5] > counts[50]
+    # Con s=1.1 el 10% más popular concentra la mayoría de los pedidos
+    assert sum(counts[rank] for rank in range(10)) > 0.5 * 20000
+
+
+def test_histogram_percentiles_within_precision():
+    histogram = LatencyHistogram(significant_digits=2)
+    for value in range(1, 10001):
+        histogram.record(value)
+    
+    assert abs(histogram.percentile(50) - 5000) / 5000 < 0.01
+    assert abs(histogram.percentile(99) - 9900) / 9900 < 0.01
+    assert histogram.percentile(100) == histogram.max == 10000
+    # Memoria acotada: muchos menos buckets que muestras
+    assert len(histogram.counts) < 1000
+    
+    distribution = histogram.percentile_distribution()
+    assert 'Total count    =        10000' in distribution
+
+
+def test_open_loop_against_handlers():
+    boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='task-manager-files')
+    target = HandlerTarget()
+    mix = {'create': 30, 'list': 30, 'update': 20, 'upload': 10, 'delete': 10}
+    workload = Workload(mix, random.Random(3), max_attachment_kb=8)
+    seed_tasks(target, workload, 10)
+    assert len(workload.task_ids) == 10
+    
+    report = asyncio.run(run_open_loop(target, workload, rps=40, duration=0.5, arrival='uniform', workers=4))
+    summary = report.summary()
+    
+    assert summary['requests'] + summary['dropped'] == 20
+    assert summary['p99_ms'] >= summary['p50_ms'] > 0
+    statuses = Counter()
+    for stats in summary['operations'].values():
+        statuses.update(stats['statuses'])
+    assert statuses and all(status in ('200', '201') for status in statuses)
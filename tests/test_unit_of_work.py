@@ -0,0 +1,92 @@
+"""
+Pruebas de la unidad de trabajo (identity map + escrituras encoladas)
+"""
+
+import pytest
+
+from models import TaskCreate, TaskUpdate
+from repositories.task_repository import TaskRepository
+from services.task_service import TaskService
+from utils.unit_of_work import UnitOfWork, unit_of_work
+
+
+def count_calls(repository, operation):
+    calls = []
+    repository.table.meta.client.meta.events.register(
+        f'before-call.dynamodb.{operation}', lambda **kwargs: calls.append(operation)
+    )
+    return calls
+
+
+def test_repeat_reads_are_served_from_identity_map(monkeypatch):
+    monkeypatch.setenv('TASK_CACHE_TTL_SECONDS', '0')
+    task = TaskService().create_task(TaskCreate(title='Una lectura'))
+    
+    with unit_of_work():
+        service = TaskService()
+        calls = count_calls(service.task_repository, 'GetItem')
+        assert service.get_task_by_id(task.id).title == 'Una lectura'
+        assert service.get_task_by_id(task.id).title == 'Una lectura'
+        
+        # Las escrituras dejan el estado nuevo en el mapa
+        service.update_task(task.id, TaskUpdate(title='Editada'))
+        assert service.get_task_by_id(task.id).title == 'Editada'
+    
+    assert len(calls) == 1
+
+
+def test_add_file_is_a_single_conditional_update():
+    task = TaskService().create_task(TaskCreate(title='Con archivo'))
+    
+    updated = TaskService().add_file_to_task(task.id, 'tasks/a.txt')
+    assert updated.files == ['tasks/a.txt']
+    assert updated.version == 2
+    
+    assert TaskService().add_file_to_task('no-existe', 'tasks/b.txt') is None
+    assert TaskRepository().find_by_id('no-existe') is None
+
+
+def test_index_writes_are_flushed_at_the_end():
+    service = TaskService()
+    task = service.create_task(TaskCreate(title='Tags', tags=['viejo']))
+    
+    with unit_of_work():
+        service.update_task(task.id, TaskUpdate(tags=['nuevo']))
+        assert service.list_tasks(tag_filter='nuevo') == []
+    
+    assert [t.id for t in service.list_tasks(tag_filter='nuevo')] == [task.id]
+    assert service.list_tasks(tag_filter='viejo') == []
+
+
+class FailingTable:
+    """Tabla cuyo batch_writer siempre falla al enviar"""
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def batch_writer(self, overwrite_by_pkeys=None):
+        raise RuntimeError(f'{self.name} no disponible')
+
+
+def test_index_flush_errors_do_not_fail_the_invocation():
+    service = TaskService()
+    task = service.create_task(TaskCreate(title='Tags', tags=['viejo']))
+    
+    with unit_of_work() as uow:
+        service.update_task(task.id, TaskUpdate(title='Guardada', tags=['nuevo']))
+        uow.queue_put(FailingTable('tasks-index-table-caida'), ['pk', 'sk'], {'pk': 'x', 'sk': 'y'})
+    
+    # La tarea quedó escrita y las demás tablas del flush se enviaron
+    assert TaskRepository().find_by_id(task.id).title == 'Guardada'
+    assert [t.id for t in service.list_tasks(tag_filter='nuevo')] == [task.id]
+
+
+
+def test_flush_error_does_not_replace_the_handler_exception(monkeypatch):
+    def broken_flush(self):
+        raise RuntimeError('flush roto')
+    monkeypatch.setattr(UnitOfWork, 'flush', broken_flush)
+    
+    with pytest.raises(ValueError, match='del handler'):
+        with unit_of_work():
+            raise ValueError('error del handler')